@@ -0,0 +1,100 @@
+"""partition analytics_events by created_at
+
+Existing events are moved into monthly partitions (analytics_events_pYYYYMMDD),
+whatever ANALYTICS_PARTITION_PERIOD is set to; an empty table gets none, so the
+app creates them with the configured period.
+
+Revision ID: eccc15d23f2b
+Revises: 43b1dbe8d0ca
+Create Date: 2026-10-19 18:12:40.118305
+
+"""
+from datetime import timedelta
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'eccc15d23f2b'
+down_revision = '43b1dbe8d0ca'
+branch_labels = None
+depends_on = None
+
+COLUMNS = (
+    "id, user_id, artifact_id, event_type, session_id, dwell_time_seconds, distance_meters,"
+    " event_metadata, user_latitude, user_longitude, created_at, received_at"
+)
+
+
+def _columns(created_at_primary_key: bool):
+    return [
+        sa.Column('id', sa.Integer(), server_default=sa.text("nextval('analytics_events_id_seq'::regclass)"), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('artifact_id', sa.Integer(), nullable=True),
+        # eventtype already exists (initial migration)
+        sa.Column('event_type', postgresql.ENUM(name='eventtype', create_type=False), nullable=False),
+        sa.Column('session_id', sa.String(), nullable=True),
+        sa.Column('dwell_time_seconds', sa.Float(), nullable=True),
+        sa.Column('distance_meters', sa.Float(), nullable=True),
+        sa.Column('event_metadata', sa.JSON(), nullable=True),
+        sa.Column('user_latitude', sa.Float(), nullable=True),
+        sa.Column('user_longitude', sa.Float(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=not created_at_primary_key),
+        sa.Column('received_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['artifact_id'], ['artifacts.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint(*(['id', 'created_at'] if created_at_primary_key else ['id'])),
+    ]
+
+
+def _replace_table(partitioned: bool) -> None:
+    """Recreate analytics_events (partitioned or not) and move its rows over."""
+    op.rename_table('analytics_events', 'analytics_events_old')
+    op.execute('ALTER INDEX analytics_events_pkey RENAME TO analytics_events_old_pkey')
+    for column in ('id', 'created_at', 'received_at'):
+        op.drop_index(f'ix_analytics_events_{column}', table_name='analytics_events_old')
+    op.execute('ALTER SEQUENCE analytics_events_id_seq OWNED BY NONE')
+
+    op.create_table(
+        'analytics_events', *_columns(partitioned),
+        **({'postgresql_partition_by': 'RANGE (created_at)'} if partitioned else {}),
+    )
+    for column in ('id', 'created_at', 'received_at'):
+        op.create_index(op.f(f'ix_analytics_events_{column}'), 'analytics_events', [column], unique=False)
+
+    if partitioned:
+        # One partition per month holding events, as of this revision (not the app's settings)
+        months = op.get_bind().execute(sa.text(
+            "SELECT DISTINCT date_trunc('month', COALESCE(created_at, received_at, now()) AT TIME ZONE 'UTC')::date"
+            ' FROM analytics_events_old'
+        )).scalars().all()
+        for month in months:
+            next_month = (month + timedelta(days=32)).replace(day=1)
+            op.execute(
+                f'CREATE TABLE analytics_events_p{month:%Y%m%d} PARTITION OF analytics_events'
+                f" FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') TO ('{next_month.isoformat()} 00:00:00+00')"
+            )
+    op.execute(
+        f'INSERT INTO analytics_events ({COLUMNS})'
+        f' SELECT {COLUMNS.replace("created_at,", "COALESCE(created_at, received_at, now()),")}'
+        ' FROM analytics_events_old'
+    )
+    op.drop_table('analytics_events_old')
+    op.execute('ALTER SEQUENCE analytics_events_id_seq OWNED BY analytics_events.id')
+
+
+def upgrade() -> None:
+    # SQLite databases (created with create_all) keep partitions in separate tables
+    # next to analytics_events, see app.services.analytics_partitions
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    _replace_table(partitioned=True)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    # Dropping the partitioned table drops its partitions
+    _replace_table(partitioned=False)
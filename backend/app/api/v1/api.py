@@ -1,8 +1,15 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import auth, artifacts, reports, users
+from app.api.v1.endpoints import auth, artifacts, reports, users, profiles, imports, exports, assets, uploads, storage, analytics
 
 api_router = APIRouter()
 api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
 api_router.include_router(artifacts.router, prefix="/artifacts", tags=["artifacts"])
+api_router.include_router(assets.router, prefix="/assets", tags=["assets"])
+api_router.include_router(uploads.router, prefix="/uploads", tags=["uploads"])
+api_router.include_router(storage.router, prefix="/storage", tags=["uploads"])
+api_router.include_router(analytics.router, prefix="/analytics", tags=["analytics"])
 api_router.include_router(reports.router, prefix="/reports", tags=["reports"])
 api_router.include_router(users.router, prefix="/users", tags=["users"])
+api_router.include_router(profiles.router, prefix="/admin/profiles", tags=["admin"])
+api_router.include_router(imports.router, prefix="/admin/imports", tags=["admin"])
+api_router.include_router(exports.router, prefix="/admin/exports", tags=["admin"])
@@ -0,0 +1,263 @@
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, List, Optional, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.deps import get_db, get_current_creator, get_current_user_optional
+from app.core.profiling import run_in_threadpool
+from app.models.analytics import EventType, RollupGranularity, SketchScope
+from app.models.artifact import Artifact
+from app.models.user import User, UserRole
+from app.schemas.analytics import AnalyticsIngestResult, AnalyticsSummary, Heatmap, UniqueVisitors
+from app.services.analytics_ingest import ingest_events
+from app.services.analytics_rollups import get_summary
+from app.services.exports import parse_bbox
+from app.services.heatmaps import DEFAULT_CELL_SIZE_M, artifact_bbox, get_heatmap
+from app.services.unique_visitors import VisitorPeriod, count_unique_visitors
+
+# Clients batch events (and keep them while offline), then send them as a JSON array
+# or, for large backlogs, as an NDJSON stream. Accepted events are buffered and
+# written in bulk, so they show up in reports after a short delay.
+# Dashboards read the hourly/daily rollups (see scripts/update_rollups.py), never
+# the raw events.
+
+router = APIRouter()
+
+NDJSON_CONTENT_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+MAX_LINE_BYTES = 64 * 1024
+DEFAULT_WINDOW = {RollupGranularity.HOUR: timedelta(hours=48), RollupGranularity.DAY: timedelta(days=30)}
+DEFAULT_VISITOR_WINDOW = timedelta(days=30)
+DEFAULT_HEATMAP_WINDOW = timedelta(days=7)
+TOP_ARTIFACTS = 10
+
+async def _ndjson_lines(stream: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, Optional[bytes]]]:
+    """
+    (line index, line) for every non-blank line of the stream; a line longer than
+    MAX_LINE_BYTES comes as (index, None) and ends it.
+    """
+    pending = b""
+    index = 0
+    async for chunk in stream:
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield index, line
+            index += 1
+        if len(pending) > MAX_LINE_BYTES:
+            yield index, None
+            return
+    if pending.strip():
+        yield index, pending
+
+async def _ingest_stream(request: Request, db: Session, user_id: Optional[int]) -> AnalyticsIngestResult:
+    accepted = 0
+    rejected: List[dict] = []
+    batch: List[Any] = []
+    indexes: List[int] = []
+
+    async def send() -> None:
+        nonlocal accepted
+        try:
+            count, batch_rejected = await run_in_threadpool(ingest_events, db, batch, user_id)
+        except HTTPException as e:
+            if e.status_code != 503:
+                raise
+            # Earlier batches are in; the client resends from this line
+            raise HTTPException(
+                status_code=503,
+                detail={"message": e.detail, "accepted": accepted, "resume_from": indexes[0]},
+                headers=e.headers,
+            )
+        accepted += count
+        rejected.extend({**r, "index": indexes[r["index"]]} for r in batch_rejected)
+
+    async def stop(message: str, resume_from: int) -> None:
+        # Lines before this one are in (or rejected); the client resends the rest
+        if batch:
+            await send()
+        raise HTTPException(
+            status_code=413, detail={"message": message, "accepted": accepted, "resume_from": resume_from}
+        )
+
+    async for index, line in _ndjson_lines(request.stream()):
+        if index >= settings.ANALYTICS_MAX_STREAM_EVENTS:
+            await stop(f"At most {settings.ANALYTICS_MAX_STREAM_EVENTS} events per stream", index)
+        if line is None:
+            await stop(f"Line {index + 1} longer than {MAX_LINE_BYTES} bytes", index)
+        try:
+            batch.append(json.loads(line))
+        except ValueError:
+            rejected.append({"index": index, "error": "Invalid JSON"})
+            continue
+        indexes.append(index)
+        if len(batch) >= settings.ANALYTICS_MAX_BATCH_EVENTS:
+            await send()
+            batch, indexes = [], []
+    if batch:
+        await send()
+    rejected.sort(key=lambda r: r["index"])
+    return AnalyticsIngestResult(accepted=accepted, rejected=rejected)
+
+@router.post("/events", response_model=AnalyticsIngestResult, status_code=202)
+async def post_events(
+    *,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: Optional[User] = Depends(get_current_user_optional),
+) -> Any:
+    """
+    Record a batch of analytics events: a JSON array (or {"events": [...]}) of up to
+    ANALYTICS_MAX_BATCH_EVENTS, or an application/x-ndjson stream with one event per
+    line. Invalid events are reported by index and the rest accepted. When the buffer
+    is full the answer is a 503 with Retry-After; for streams its detail says which
+    line to resume from, as does a 413 for a stream over ANALYTICS_MAX_STREAM_EVENTS
+    lines or with a line over MAX_LINE_BYTES.
+    """
+    user_id = current_user.id if current_user else None
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type in NDJSON_CONTENT_TYPES:
+        return await _ingest_stream(request, db, user_id)
+
+    try:
+        body = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Body must be a JSON array of events")
+    items = body.get("events") if isinstance(body, dict) else body
+    if not isinstance(items, list):
+        raise HTTPException(status_code=400, detail="Body must be a JSON array of events")
+    if len(items) > settings.ANALYTICS_MAX_BATCH_EVENTS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {settings.ANALYTICS_MAX_BATCH_EVENTS} events per request; stream larger batches as NDJSON",
+        )
+    accepted, rejected = await run_in_threadpool(ingest_events, db, items, user_id)
+    return AnalyticsIngestResult(accepted=accepted, rejected=rejected)
+
+def _window(granularity: RollupGranularity, start: Optional[datetime], end: Optional[datetime]) -> Tuple[datetime, datetime]:
+    end = end or datetime.now(timezone.utc)
+    start = start or end - DEFAULT_WINDOW[granularity]
+    # Buckets are UTC
+    return tuple(t.replace(tzinfo=timezone.utc) if t.tzinfo is None else t for t in (start, end))
+
+@router.get("/artifacts/{artifact_id}", response_model=AnalyticsSummary)
+def get_artifact_analytics(
+    *,
+    db: Session = Depends(get_db),
+    artifact_id: int,
+    granularity: RollupGranularity = RollupGranularity.DAY,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    current_user: User = Depends(get_current_creator),
+) -> Any:
+    """
+    Event counts, dwell time and distance distributions for one artifact, per hour
+    or day (UTC) over [start, end); the last 30 days (48 hours) by default.
+    """
+    artifact = db.get(Artifact, artifact_id)
+    if not artifact:
+        raise HTTPException(status_code=404, detail="Artifact not found")
+    if artifact.creator_id != current_user.id and current_user.role != UserRole.TENANT_ADMIN:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    start, end = _window(granularity, start, end)
+    return get_summary(db, granularity, start, end, artifact_id=artifact_id)
+
+@router.get("/dashboard", response_model=AnalyticsSummary)
+def get_dashboard(
+    *,
+    db: Session = Depends(get_db),
+    granularity: RollupGranularity = RollupGranularity.DAY,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    creator_id: Optional[int] = None,
+    current_user: User = Depends(get_current_creator),
+) -> Any:
+    """
+    The same totals and series across the current creator's artifacts, with the ones
+    with the most events. Admins see all artifacts, or one creator's with creator_id.
+    """
+    if current_user.role != UserRole.TENANT_ADMIN:
+        creator_id = current_user.id
+    start, end = _window(granularity, start, end)
+    return get_summary(db, granularity, start, end, creator_id=creator_id, top=TOP_ARTIFACTS)
+
+@router.get("/unique-visitors", response_model=UniqueVisitors)
+def get_unique_visitors(
+    *,
+    db: Session = Depends(get_db),
+    period: VisitorPeriod = VisitorPeriod.DAY,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    artifact_id: Optional[List[int]] = Query(None),
+    creator_id: Optional[int] = None,
+    current_user: User = Depends(get_current_creator),
+) -> Any:
+    """
+    Estimated distinct visitors per day, week or month over [start, end) (whole UTC
+    days, the last 30 by default), for the given artifacts together or else across
+    the current creator's artifacts. Admins may ask for any creator, or everyone.
+    Estimates are within ±2 `standard_error` (relative) 95% of the time.
+    """
+    is_admin = current_user.role == UserRole.TENANT_ADMIN
+    end = end or datetime.now(timezone.utc)
+    start = start or end - DEFAULT_VISITOR_WINDOW
+    if artifact_id:
+        owners = dict(db.query(Artifact.id, Artifact.creator_id).filter(Artifact.id.in_(artifact_id)).all())
+        if len(owners) < len(set(artifact_id)):
+            raise HTTPException(status_code=404, detail="Artifact not found")
+        if not is_admin and any(owner != current_user.id for owner in owners.values()):
+            raise HTTPException(status_code=403, detail="Not enough permissions")
+        return count_unique_visitors(db, SketchScope.ARTIFACT, artifact_id, period, start, end)
+    if not is_admin:
+        creator_id = current_user.id
+    if creator_id is None:
+        return count_unique_visitors(db, SketchScope.ALL, [0], period, start, end)
+    return count_unique_visitors(db, SketchScope.CREATOR, [creator_id], period, start, end)
+
+@router.get("/heatmap", response_model=Heatmap)
+def get_visitor_heatmap(
+    *,
+    db: Session = Depends(get_db),
+    artifact_id: Optional[int] = None,
+    radius_m: Optional[float] = Query(None, gt=0, le=10000),
+    bbox: Optional[str] = None,
+    cell_size_m: Optional[float] = Query(None, ge=1, le=100000),
+    resolution: Optional[int] = Query(None, ge=1, le=1024),
+    event_type: Optional[EventType] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    current_user: User = Depends(get_current_creator),
+) -> Any:
+    """
+    Where users were when recording events, binned into a grid: around an artifact
+    (its own events, within `radius_m`, default 1.5x its max_view_distance, in
+    `cell_size_m` cells, default 5 m) or over a `bbox` (min_lng,min_lat,max_lng,max_lat;
+    the current creator's artifacts, or everything for admins; `resolution` cells
+    along the longer side unless `cell_size_m` is given). The last 7 days by default.
+    """
+    is_admin = current_user.role == UserRole.TENANT_ADMIN
+    end = end or datetime.now(timezone.utc)
+    start = start or end - DEFAULT_HEATMAP_WINDOW
+    if artifact_id is not None:
+        artifact = db.get(Artifact, artifact_id)
+        if not artifact:
+            raise HTTPException(status_code=404, detail="Artifact not found")
+        if artifact.creator_id != current_user.id and not is_admin:
+            raise HTTPException(status_code=403, detail="Not enough permissions")
+        radius = radius_m or 1.5 * (artifact.max_view_distance or settings.MAX_VIEW_DISTANCE_M)
+        return get_heatmap(
+            db, artifact_bbox(artifact, radius), start, end, cell_size_meters=cell_size_m or DEFAULT_CELL_SIZE_M,
+            event_type=event_type, artifact_id=artifact_id,
+        )
+    try:
+        box = parse_bbox(bbox)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if box is None:
+        raise HTTPException(status_code=400, detail="Pass artifact_id or bbox")
+    return get_heatmap(
+        db, box, start, end, cell_size_meters=cell_size_m, resolution=resolution, event_type=event_type,
+        creator_id=None if is_admin else current_user.id,
+    )
@@ -1,25 +1,109 @@
-from typing import Any, List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query, File, UploadFile, Form
+from typing import Any, Dict, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Header, Query, File, UploadFile, Form
 from sqlalchemy.orm import Session
 import json
 
+from app.core.config import settings
 from app.core.deps import get_db, get_current_active_user, get_current_creator
-from app.models.artifact import Artifact, ArtifactType, ArtifactStatus, AssetType
+from app.core.profiling import run_in_threadpool
+from app.models.artifact import Artifact, ArtifactType, ArtifactStatus, AssetType, ProcessingStatus
 from app.models.user import User
 from app.schemas.artifact import (
     Artifact as ArtifactSchema,
     ArtifactCreate,
     ArtifactUpdate,
     ArtifactWithDistance,
-    ArtifactsNearResponse
+    ArtifactsNearResponse,
+    PrefetchManifest,
 )
-from app.services.artifacts import get_artifacts_near, calculate_distance_and_status
+from app.services.artifacts import get_artifacts_near, calculate_distance_and_status, get_prefetch_manifest
+from app.services.assets import get_asset, register_asset
 from app.services.file_upload import handle_file_upload, validate_file
+from app.services.media_processing import enqueue_media_processing, is_stalled, wait_for_processing
+from app.services.variant_selection import ClientProfile, DeviceClass, client_profile, select_variant
 
 router = APIRouter()
 
+ASSET_SHA256_DESCRIPTION = "Reuse stored content (see GET /assets/{sha256}) instead of uploading a file"
+
+def get_client_profile(
+    device_class: Optional[DeviceClass] = Query(None, description="Client device tier"),
+    bandwidth_kbps: Optional[float] = Query(None, gt=0, description="Client's estimated bandwidth"),
+    save_data: Optional[str] = Header(None, alias="Save-Data"),
+    downlink: Optional[float] = Header(None, alias="Downlink"),
+    device_memory: Optional[float] = Header(None, alias="Device-Memory"),
+) -> ClientProfile:
+    """Device class and bandwidth from query parameters, or the equivalent client hints."""
+    return client_profile(device_class, bandwidth_kbps, save_data, downlink, device_memory)
+
+def _save_artifact(
+    db: Session, artifact: Artifact, upload_result: Optional[Dict[str, Any]] = None
+) -> Artifact:
+    if upload_result:
+        asset = register_asset(db, upload_result, AssetType(artifact.asset_type))
+        artifact.variants = asset.variants
+        artifact.file_size_bytes = asset.size_bytes
+        artifact.preview_url = asset.preview_url
+        artifact.triangle_count = asset.triangle_count
+        artifact.texture_resolution = asset.texture_resolution
+        # Content seen before already has its thumbnail (and derivatives);
+        # new content is processed in the background
+        processed = upload_result.get("thumbnail_url") and (
+            asset.variants is not None
+            or artifact.asset_type not in (AssetType.IMAGE, AssetType.MODEL_3D, AssetType.VIDEO)
+        )
+        artifact.processing_status = ProcessingStatus.READY if processed else ProcessingStatus.PENDING
+    db.add(artifact)
+    db.commit()
+    db.refresh(artifact)
+    return artifact
+
+async def _create_artifact(
+    db: Session, artifact: Artifact, upload_result: Optional[Dict[str, Any]]
+) -> Artifact:
+    artifact = await run_in_threadpool(_save_artifact, db, artifact, upload_result)
+    if artifact.processing_status == ProcessingStatus.PENDING:
+        await run_in_threadpool(enqueue_media_processing, artifact.id)
+    return artifact
+
+def _stored_asset(db: Session, sha256: str, asset_type: AssetType) -> Dict[str, Any]:
+    asset = get_asset(db, sha256.lower())
+    if not asset:
+        raise HTTPException(status_code=404, detail="Asset not found, upload the file instead")
+    if asset.asset_type != asset_type:
+        raise HTTPException(status_code=400, detail=f"Asset is a {asset.asset_type.value}, not a {asset_type.value}")
+    return {
+        "asset_url": asset.url,
+        "thumbnail_url": asset.thumbnail_url,
+        "file_size_bytes": asset.size_bytes,
+        "sha256": asset.sha256,
+    }
+
+async def _upload_asset(
+    db: Session, file: Optional[UploadFile], asset_sha256: Optional[str], asset_type: AssetType
+) -> Optional[Dict[str, Any]]:
+    """Store an uploaded file, or reference already stored content by hash (hash-first upload)."""
+    if asset_sha256:
+        return await run_in_threadpool(_stored_asset, db, asset_sha256, asset_type)
+    if not file:
+        return None
+    
+    # Validate file
+    validation_result = await run_in_threadpool(validate_file, file, asset_type)
+    if not validation_result["valid"]:
+        raise HTTPException(status_code=400, detail=validation_result["error"])
+    
+    # Upload file
+    upload_result = await handle_file_upload(file, asset_type)
+    if not upload_result["success"]:
+        raise HTTPException(status_code=500, detail=upload_result["error"])
+    return upload_result
+
+# Upload endpoints are async so files stream to disk without holding a threadpool
+# thread per upload; database work is handed to the threadpool explicitly.
+
 @router.post("/", response_model=ArtifactSchema)
-def create_artifact(
+async def create_artifact(
     *,
     db: Session = Depends(get_db),
     title: str = Form(...),
@@ -27,21 +111,16 @@ def create_artifact(
     category: str = Form(None),
     latitude: float = Form(...),
     longitude: float = Form(...),
-    file: UploadFile = File(...),
+    file: Optional[UploadFile] = File(None),
+    asset_sha256: Optional[str] = Form(None, description=ASSET_SHA256_DESCRIPTION),
     current_user: User = Depends(get_current_creator),
 ) -> Any:
     """
     Create a new artifact with file upload.
     """
-    # Validate file
-    validation_result = validate_file(file, AssetType.IMAGE)
-    if not validation_result["valid"]:
-        raise HTTPException(status_code=400, detail=validation_result["error"])
-    
-    # Handle file upload
-    upload_result = handle_file_upload(file, AssetType.IMAGE)
-    if not upload_result["success"]:
-        raise HTTPException(status_code=500, detail=upload_result["error"])
+    upload_result = await _upload_asset(db, file, asset_sha256, AssetType.IMAGE)
+    if upload_result is None:
+        raise HTTPException(status_code=400, detail="Provide a file or asset_sha256")
     
     # Create artifact
     artifact = Artifact(
@@ -64,11 +143,7 @@ def create_artifact(
         report_count=0
     )
     
-    db.add(artifact)
-    db.commit()
-    db.refresh(artifact)
-    
-    return artifact
+    return await _create_artifact(db, artifact, upload_result)
 
 @router.get("/near", response_model=ArtifactsNearResponse)
 def get_nearby_artifacts(
@@ -80,9 +155,11 @@ def get_nearby_artifacts(
     types: Optional[str] = Query(None, description="Comma-separated artifact types"),
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
+    profile: ClientProfile = Depends(get_client_profile),
 ) -> Any:
     """
-    Get artifacts near a location.
+    Get artifacts near a location, each with the asset variant to download for
+    its distance and the client's device class/bandwidth.
     """
     # Parse artifact types if provided
     artifact_types = None
@@ -99,7 +176,8 @@ def get_nearby_artifacts(
         radius_meters=radius,
         artifact_types=artifact_types,
         skip=skip,
-        limit=limit
+        limit=limit,
+        profile=profile,
     )
     
     # Check if there are more artifacts beyond the limit
@@ -111,6 +189,26 @@ def get_nearby_artifacts(
         has_more=has_more
     )
 
+@router.get("/prefetch", response_model=PrefetchManifest)
+def get_prefetch_manifest_for_location(
+    *,
+    db: Session = Depends(get_db),
+    lat: float = Query(..., ge=-90, le=90, description="Latitude"),
+    lng: float = Query(..., ge=-180, le=180, description="Longitude"),
+    heading: Optional[float] = Query(None, ge=0, lt=360, description="Compass heading the user faces"),
+    budget_bytes: int = Query(
+        settings.PREFETCH_DEFAULT_BUDGET_BYTES, ge=0, le=1024 ** 3, description="Download budget in bytes"
+    ),
+    radius: int = Query(1000, description="Search radius in meters", le=5000),
+    profile: ClientProfile = Depends(get_client_profile),
+) -> Any:
+    """
+    Ordered manifest of asset URLs, sizes and hashes for an AR session: artifacts
+    the user is likely to view next (close to their view range, in the direction
+    they face) come first, up to budget_bytes. Download them in order.
+    """
+    return get_prefetch_manifest(db, lat, lng, heading, budget_bytes, radius, profile)
+
 @router.get("/{artifact_id}", response_model=ArtifactWithDistance)
 def get_artifact(
     *,
@@ -118,9 +216,11 @@ def get_artifact(
     artifact_id: int,
     lat: Optional[float] = Query(None, description="User latitude for distance calculation"),
     lng: Optional[float] = Query(None, description="User longitude for distance calculation"),
+    profile: ClientProfile = Depends(get_client_profile),
 ) -> Any:
     """
-    Get artifact by ID with optional distance calculation.
+    Get artifact by ID with optional distance calculation. selected_variant is the
+    asset variant for that distance (full detail without one) and the client's device.
     """
     artifact = db.query(Artifact).filter(
         Artifact.id == artifact_id,
@@ -137,16 +237,18 @@ def get_artifact(
     
     artifact_dict = artifact.__dict__.copy()
     artifact_dict.update(distance_info)
+    artifact_dict["selected_variant"] = select_variant(artifact, distance_info.get("distance_meters"), profile)
     
     return ArtifactWithDistance(**artifact_dict)
 
 @router.post("/", response_model=ArtifactSchema)
-def create_artifact(
+async def create_artifact(
     *,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_creator),
     artifact_data: str = Form(..., description="JSON string of artifact data"),
     file: Optional[UploadFile] = File(None, description="Asset file"),
+    asset_sha256: Optional[str] = Form(None, description=ASSET_SHA256_DESCRIPTION),
 ) -> Any:
     """
     Create a new artifact.
@@ -161,14 +263,8 @@ def create_artifact(
     thumbnail_url = None
     file_size_bytes = None
     
-    if file:
-        # Validate file
-        validation_result = validate_file(file, artifact_in.asset_type)
-        if not validation_result["valid"]:
-            raise HTTPException(status_code=400, detail=validation_result["error"])
-        
-        # Upload file
-        upload_result = handle_file_upload(file, artifact_in.asset_type)
+    upload_result = await _upload_asset(db, file, asset_sha256, artifact_in.asset_type)
+    if upload_result:
         asset_url = upload_result["asset_url"]
         thumbnail_url = upload_result.get("thumbnail_url")
         file_size_bytes = upload_result["file_size_bytes"]
@@ -201,11 +297,7 @@ def create_artifact(
     # Note: PostGIS location field disabled for now
     # artifact.location = text(f"POINT({artifact_in.location.longitude} {artifact_in.location.latitude})")
     
-    db.add(artifact)
-    db.commit()
-    db.refresh(artifact)
-    
-    return artifact
+    return await _create_artifact(db, artifact, upload_result)
 
 @router.patch("/{artifact_id}", response_model=ArtifactSchema)
 def update_artifact(
@@ -247,36 +339,73 @@ def update_artifact(
     
     return artifact
 
+def _get_own_artifact(db: Session, artifact_id: int, current_user: User) -> Artifact:
+    artifact = db.query(Artifact).filter(Artifact.id == artifact_id).first()
+    if not artifact:
+        raise HTTPException(status_code=404, detail="Artifact not found")
+    
+    # Check ownership
+    if artifact.creator_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    return artifact
+
 @router.post("/{artifact_id}/publish", response_model=ArtifactSchema)
-def publish_artifact(
+async def publish_artifact(
     *,
     db: Session = Depends(get_db),
     artifact_id: int,
     current_user: User = Depends(get_current_creator),
+    wait: bool = Query(False, description="Wait for background media processing to finish"),
+    timeout: float = Query(10, gt=0, le=60, description="Seconds to wait when wait=true"),
 ) -> Any:
     """
     Publish an artifact (make it visible to users).
+    Returns 409 while its media is still processing (unless it finishes within
+    `timeout` with wait=true) or if processing failed.
     """
-    artifact = db.query(Artifact).filter(Artifact.id == artifact_id).first()
-    if not artifact:
-        raise HTTPException(status_code=404, detail="Artifact not found")
-    
-    # Check ownership
-    if artifact.creator_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Not enough permissions")
+    artifact = await run_in_threadpool(_get_own_artifact, db, artifact_id, current_user)
     
     # Validate artifact is ready for publishing
     if not artifact.asset_url:
         raise HTTPException(status_code=400, detail="Artifact must have an asset file")
     
+    if wait:
+        await wait_for_processing(db, artifact, timeout)
+    if artifact.processing_status in (ProcessingStatus.PENDING, ProcessingStatus.PROCESSING):
+        raise HTTPException(status_code=409, detail="Media is still processing, retry later or pass wait=true")
+    if artifact.processing_status == ProcessingStatus.FAILED:
+        raise HTTPException(status_code=409, detail=f"Media processing failed: {artifact.processing_error}")
+    
     artifact.status = ArtifactStatus.PUBLISHED
     from sqlalchemy.sql import func
     artifact.published_at = func.now()
     
+    return await run_in_threadpool(_save_artifact, db, artifact)
+
+@router.post("/{artifact_id}/reprocess", response_model=ArtifactSchema)
+def reprocess_artifact(
+    *,
+    db: Session = Depends(get_db),
+    artifact_id: int,
+    current_user: User = Depends(get_current_creator),
+) -> Any:
+    """
+    Queue an artifact's media for processing again, e.g. after it failed or its
+    worker was lost mid-job.
+    """
+    artifact = _get_own_artifact(db, artifact_id, current_user)
+    if not artifact.asset_url:
+        raise HTTPException(status_code=400, detail="Artifact has no asset file")
+    if artifact.processing_status == ProcessingStatus.PROCESSING and not is_stalled(artifact):
+        raise HTTPException(status_code=409, detail="Media is already processing")
+    
+    artifact.processing_status = ProcessingStatus.PENDING
+    artifact.processing_attempts = 0
+    artifact.processing_error = None
     db.add(artifact)
     db.commit()
+    enqueue_media_processing(artifact.id)
     db.refresh(artifact)
-    
     return artifact
 
 @router.get("/", response_model=List[ArtifactSchema])
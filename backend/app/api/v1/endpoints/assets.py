@@ -0,0 +1,28 @@
+from typing import Any
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app.core.deps import get_db, get_current_creator
+from app.models.user import User
+from app.schemas.asset import Asset as AssetSchema
+from app.services.assets import SHA256_PATTERN, get_asset, is_stored
+
+router = APIRouter()
+
+@router.get("/{sha256}", response_model=AssetSchema)
+def read_asset(
+    sha256: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_creator),
+) -> Any:
+    """
+    Hash-first upload check: look up stored content by its SHA-256 before uploading it.
+    On 200, create the artifact with `asset_sha256` instead of a file; on 404, upload the file.
+    """
+    sha256 = sha256.lower()
+    if not SHA256_PATTERN.match(sha256):
+        raise HTTPException(status_code=400, detail="Expected a hex SHA-256 digest")
+    asset = get_asset(db, sha256)
+    if not asset or not is_stored(asset):
+        raise HTTPException(status_code=404, detail="Asset not found")
+    return asset
@@ -1,20 +1,45 @@
 from datetime import timedelta
-from typing import Any
+from typing import Any, Optional
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 
-from app.core import security
+from app.core import password_pool, security
 from app.core.config import settings
 from app.core.deps import get_db, get_current_user
+from app.core.profiling import run_in_threadpool
 from app.models.user import User
 from app.schemas.auth import Token, UserLogin, UserRegister, OAuthLogin
 from app.schemas.user import User as UserSchema
 
 router = APIRouter()
 
+# Auth endpoints are async so bcrypt runs in the password pool without holding a
+# threadpool thread; database work is handed to the threadpool explicitly.
+
+def _get_user_by_email(db: Session, email: str) -> Optional[User]:
+    return db.query(User).filter(User.email == email).first()
+
+def _save(db: Session, user: User) -> None:
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+
+async def _authenticate(db: Session, email: str, password: str) -> Optional[User]:
+    user = await run_in_threadpool(_get_user_by_email, db, email)
+    if not user or not user.hashed_password:
+        return None
+    valid, new_hash = await password_pool.verify_password(password, user.hashed_password)
+    if not valid:
+        return None
+    if new_hash:
+        # BCRYPT_ROUNDS changed since this hash was made
+        user.hashed_password = new_hash
+        await run_in_threadpool(_save, db, user)
+    return user
+
 @router.post("/register", response_model=UserSchema)
-def register(
+async def register(
     *,
     db: Session = Depends(get_db),
     user_in: UserRegister,
@@ -22,7 +47,7 @@ def register(
     """
     Create new user account.
     """
-    user = db.query(User).filter(User.email == user_in.email).first()
+    user = await run_in_threadpool(_get_user_by_email, db, user_in.email)
     if user:
         raise HTTPException(
             status_code=400,
@@ -31,27 +56,25 @@ def register(
     
     user = User(
         email=user_in.email,
-        hashed_password=security.get_password_hash(user_in.password),
+        hashed_password=await password_pool.hash_password(user_in.password),
         full_name=user_in.full_name,
         role=user_in.role,
         is_active=True,
     )
-    db.add(user)
-    db.commit()
-    db.refresh(user)
+    await run_in_threadpool(_save, db, user)
     return user
 
 @router.post("/login", response_model=Token)
-def login_access_token(
+async def login_access_token(
     db: Session = Depends(get_db), 
     form_data: OAuth2PasswordRequestForm = Depends()
 ) -> Any:
     """
     OAuth2 compatible token login, get an access token for future requests.
     """
-    user = db.query(User).filter(User.email == form_data.username).first()
+    user = await _authenticate(db, form_data.username, form_data.password)
     
-    if not user or not security.verify_password(form_data.password, user.hashed_password):
+    if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password"
@@ -65,13 +88,13 @@ def login_access_token(
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     return {
         "access_token": security.create_access_token(
-            user.email, expires_delta=access_token_expires
+            user.email, expires_delta=access_token_expires, claims=security.user_token_claims(user)
         ),
         "token_type": "bearer",
     }
 
 @router.post("/login/email", response_model=Token)
-def login_email(
+async def login_email(
     *,
     db: Session = Depends(get_db),
     user_in: UserLogin,
@@ -79,9 +102,9 @@ def login_email(
     """
     Login with email and password.
     """
-    user = db.query(User).filter(User.email == user_in.email).first()
+    user = await _authenticate(db, user_in.email, user_in.password)
     
-    if not user or not security.verify_password(user_in.password, user.hashed_password):
+    if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password"
@@ -95,7 +118,7 @@ def login_email(
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     return {
         "access_token": security.create_access_token(
-            user.email, expires_delta=access_token_expires
+            user.email, expires_delta=access_token_expires, claims=security.user_token_claims(user)
         ),
         "token_type": "bearer",
     }
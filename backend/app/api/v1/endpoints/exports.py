@@ -0,0 +1,83 @@
+from datetime import datetime
+from typing import Any, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from app.core.deps import get_current_admin
+from app.models.analytics import EventType
+from app.models.artifact import ArtifactStatus
+from app.models.user import User
+from app.services.exports import (
+    MEDIA_TYPES, ExportFormat, export_analytics_events, export_artifacts, gzip_stream, parse_bbox
+)
+
+router = APIRouter()
+
+BBOX_DESCRIPTION = "min_lng,min_lat,max_lng,max_lat (min_lng > max_lng crosses the antimeridian)"
+
+def _bbox(bbox: Optional[str] = Query(None, description=BBOX_DESCRIPTION)):
+    try:
+        return parse_bbox(bbox)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid bbox, expected {BBOX_DESCRIPTION}")
+
+def _stream(chunks, name: str, format: ExportFormat, gzip: bool) -> StreamingResponse:
+    # No Content-Length: the body goes out with chunked transfer encoding as rows are read
+    headers = {"Content-Disposition": f'attachment; filename="{name}.{format.value}"'}
+    if gzip:
+        chunks = gzip_stream(chunks)
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(chunks, media_type=MEDIA_TYPES[format], headers=headers)
+
+@router.get("/artifacts")
+def export_artifacts_endpoint(
+    *,
+    current_user: User = Depends(get_current_admin),
+    format: ExportFormat = ExportFormat.GEOJSON,
+    gzip: bool = False,
+    bbox=Depends(_bbox),
+    status: Optional[ArtifactStatus] = None,
+    creator_id: Optional[int] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+) -> Any:
+    """
+    Stream artifacts as a GeoJSON FeatureCollection or NDJSON. Admin only.
+    Rows are read through a server-side cursor, so exports of any size use constant memory.
+    """
+    chunks = export_artifacts(
+        format,
+        bbox=bbox,
+        status=status,
+        creator_id=creator_id,
+        created_after=created_after,
+        created_before=created_before,
+    )
+    return _stream(chunks, "artifacts", format, gzip)
+
+@router.get("/analytics-events")
+def export_analytics_events_endpoint(
+    *,
+    current_user: User = Depends(get_current_admin),
+    format: ExportFormat = ExportFormat.NDJSON,
+    gzip: bool = False,
+    bbox=Depends(_bbox),
+    creator_id: Optional[int] = Query(None, description="Only events on this creator's artifacts"),
+    artifact_id: Optional[int] = None,
+    event_type: Optional[EventType] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+) -> Any:
+    """
+    Stream analytics events as NDJSON or GeoJSON (located at the user's position). Admin only.
+    """
+    chunks = export_analytics_events(
+        format,
+        bbox=bbox,
+        creator_id=creator_id,
+        artifact_id=artifact_id,
+        event_type=event_type,
+        created_after=created_after,
+        created_before=created_before,
+    )
+    return _stream(chunks, "analytics_events", format, gzip)
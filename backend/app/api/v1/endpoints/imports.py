@@ -0,0 +1,81 @@
+from typing import Any, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, File, UploadFile, Form
+from sqlalchemy.orm import Session
+
+from app.core.deps import get_db, get_current_admin
+from app.models.import_job import ImportJob, ImportFormat, ImportStatus
+from app.models.user import User
+from app.schemas.import_job import ImportJob as ImportJobSchema
+from app.services.bulk_import import create_import_job, format_from_filename, run_import
+
+router = APIRouter()
+
+@router.post("/", response_model=ImportJobSchema)
+def import_artifacts(
+    *,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin),
+    file: UploadFile = File(..., description="CSV or GeoJSON FeatureCollection"),
+    format: Optional[ImportFormat] = Form(None, description="Defaults to the file extension"),
+    creator_id: Optional[int] = Form(None, description="Owner of the imported artifacts (default: you)"),
+    publish: bool = Form(False),
+    job_id: Optional[int] = Form(None, description="Resume an interrupted import of the same file"),
+) -> Any:
+    """
+    Bulk import artifacts from CSV/GeoJSON. Admin only.
+    Rows are validated with the ArtifactCreate rules and loaded in batches;
+    poll GET /admin/imports/{job_id} for progress.
+    """
+    if job_id is not None:
+        job = db.query(ImportJob).filter(ImportJob.id == job_id).first()
+        if not job:
+            raise HTTPException(status_code=404, detail="Import job not found")
+        if job.status == ImportStatus.COMPLETED:
+            raise HTTPException(status_code=400, detail="Import job already completed")
+    else:
+        import_format = format or format_from_filename(file.filename)
+        if import_format is None:
+            raise HTTPException(status_code=400, detail="Could not infer import format, pass format=csv|geojson")
+        job = create_import_job(
+            db,
+            source_name=file.filename or "upload",
+            format=import_format,
+            creator_id=creator_id or current_user.id,
+            publish=publish,
+        )
+    
+    try:
+        run_import(job, file.file)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Could not parse import file: {e}")
+    
+    db.refresh(job)
+    return job
+
+@router.get("/", response_model=List[ImportJobSchema])
+def list_import_jobs(
+    *,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin),
+    skip: int = 0,
+    limit: int = 50,
+) -> Any:
+    """
+    List bulk import jobs. Admin only.
+    """
+    return db.query(ImportJob).order_by(ImportJob.created_at.desc()).offset(skip).limit(limit).all()
+
+@router.get("/{job_id}", response_model=ImportJobSchema)
+def read_import_job(
+    *,
+    db: Session = Depends(get_db),
+    job_id: int,
+    current_user: User = Depends(get_current_admin),
+) -> Any:
+    """
+    Get bulk import progress. Admin only.
+    """
+    job = db.query(ImportJob).filter(ImportJob.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return job
@@ -0,0 +1,37 @@
+from typing import Any, List
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
+import os
+
+from app.core.deps import get_current_admin
+from app.core.profiling import PROFILE_ID_PATTERN, list_profiles, profile_path
+from app.models.user import User
+from app.schemas.profile import ProfileInfo
+
+router = APIRouter()
+
+@router.get("/", response_model=List[ProfileInfo])
+def read_profiles(
+    current_user: User = Depends(get_current_admin),
+) -> Any:
+    """
+    List stored request profiles, newest first. Admin only.
+    """
+    return list_profiles()
+
+@router.get("/{profile_id}")
+def read_profile(
+    profile_id: str,
+    current_user: User = Depends(get_current_admin),
+) -> Any:
+    """
+    Download a request profile in speedscope format (open it at speedscope.app). Admin only.
+    """
+    if not PROFILE_ID_PATTERN.match(profile_id) or not os.path.exists(profile_path(profile_id)):
+        raise HTTPException(status_code=404, detail="Profile not found")
+    
+    return FileResponse(
+        profile_path(profile_id),
+        media_type="application/json",
+        filename=f"{profile_id}.speedscope.json",
+    )
@@ -0,0 +1,56 @@
+import hmac
+import os
+import time
+import uuid
+
+import aiofiles
+import aiofiles.os
+from fastapi import APIRouter, Header, HTTPException, Request, Response
+
+from app.services.resumable_uploads import SESSION_DIR
+from app.services.storage import get_storage, sign_local_put
+
+# Target of the local storage backend's presigned PUT URLs, so clients use the same
+# direct-upload flow as with S3. The signature is the only credential.
+
+router = APIRouter()
+
+@router.put("/{key:path}")
+async def put_object(
+    *,
+    request: Request,
+    key: str,
+    length: int,
+    expires: int,
+    signature: str,
+    content_type: str = Header("", alias="Content-Type"),
+) -> Response:
+    """
+    Store the request body under `key`. The URL's signature covers the key, the
+    Content-Type, the exact length and the expiry.
+    """
+    if not get_storage().is_local:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not hmac.compare_digest(signature, sign_local_put(key, content_type, length, expires)):
+        raise HTTPException(status_code=403, detail="Invalid signature")
+    if expires < time.time():
+        raise HTTPException(status_code=403, detail="Upload URL expired")
+    if os.path.normpath(key) != key or not key.startswith(f"{SESSION_DIR}/"):
+        raise HTTPException(status_code=400, detail="Invalid key")
+
+    temp_path = f"{key}.{uuid.uuid4().hex}"
+    received = 0
+    try:
+        async with aiofiles.open(temp_path, "wb") as f:
+            async for chunk in request.stream():
+                received += len(chunk)
+                if received > length:
+                    raise HTTPException(status_code=413, detail="Body exceeds the signed length")
+                await f.write(chunk)
+        if received != length:
+            raise HTTPException(status_code=400, detail=f"Expected {length} bytes, received {received}")
+        await aiofiles.os.replace(temp_path, key)
+    finally:
+        if await aiofiles.os.path.exists(temp_path):
+            await aiofiles.os.remove(temp_path)
+    return Response(status_code=200)
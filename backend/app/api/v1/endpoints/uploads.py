@@ -0,0 +1,203 @@
+import hmac
+from typing import Any, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.deps import get_db, get_current_creator
+from app.core.profiling import run_in_threadpool
+from app.models.upload_session import UploadSession
+from app.models.user import User
+from app.schemas.upload_session import (
+    DirectUploadSession, UploadSession as UploadSessionSchema, UploadSessionCreate,
+)
+from app.services.resumable_uploads import (
+    append_chunk, create_session, finalize_direct_session, finalize_session, lock_session,
+    presign_direct_upload, record_offset, session_lock, sessions_for_storage_event,
+)
+
+# Resumable uploads, modelled on the tus protocol: create a session, PATCH the file
+# in chunks at Upload-Offset (HEAD tells where to resume after a dropped connection),
+# then finalize it into an asset and create the artifact with asset_sha256.
+# Direct uploads skip the API for the bytes: the client PUTs the whole file to a
+# presigned storage URL, then finalizes (or the bucket's webhook does it for them).
+
+router = APIRouter()
+
+CHUNK_CONTENT_TYPE = "application/offset+octet-stream"
+
+def _get_own_session(db: Session, upload_id: str, current_user: User) -> UploadSession:
+    upload = db.get(UploadSession, upload_id)
+    if not upload:
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    if upload.creator_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    return upload
+
+def _offset_headers(upload: UploadSession) -> dict:
+    return {
+        "Upload-Offset": str(upload.upload_offset),
+        "Upload-Length": str(upload.upload_length),
+        "Cache-Control": "no-store",
+    }
+
+@router.post("/", response_model=UploadSessionSchema, status_code=201)
+def create_upload_session(
+    *,
+    db: Session = Depends(get_db),
+    upload_in: UploadSessionCreate,
+    response: Response,
+    current_user: User = Depends(get_current_creator),
+) -> Any:
+    """
+    Start a resumable upload of `upload_length` bytes.
+    """
+    upload = create_session(
+        db, current_user.id, upload_in.asset_type, upload_in.filename, upload_in.upload_length
+    )
+    response.headers["Location"] = f"{settings.API_V1_STR}/uploads/{upload.id}"
+    return upload
+
+@router.post("/direct", response_model=DirectUploadSession, status_code=201)
+def create_direct_upload(
+    *,
+    db: Session = Depends(get_db),
+    upload_in: UploadSessionCreate,
+    response: Response,
+    current_user: User = Depends(get_current_creator),
+) -> Any:
+    """
+    Start a direct upload: PUT the file to `upload_url` with `upload_headers`, then
+    POST /uploads/{id}/finalize.
+    """
+    upload = create_session(
+        db, current_user.id, upload_in.asset_type, upload_in.filename, upload_in.upload_length,
+        direct=True,
+    )
+    response.headers["Location"] = f"{settings.API_V1_STR}/uploads/{upload.id}"
+    return DirectUploadSession(
+        **UploadSessionSchema.model_validate(upload).model_dump(), **presign_direct_upload(upload)
+    )
+
+@router.post("/storage-events")
+async def receive_storage_event(
+    *,
+    request: Request,
+    db: Session = Depends(get_db),
+    authorization: Optional[str] = Header(None),
+) -> Any:
+    """
+    Webhook for the bucket's ObjectCreated notifications (S3 via SNS/Lambda, MinIO
+    webhook target): finalizes the direct uploads whose objects arrived.
+    """
+    secret = settings.STORAGE_WEBHOOK_SECRET
+    if not secret:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not hmac.compare_digest(authorization or "", f"Bearer {secret}"):
+        raise HTTPException(status_code=401, detail="Invalid webhook token")
+
+    uploads = await run_in_threadpool(sessions_for_storage_event, db, await request.json())
+    results = {}
+    for upload in uploads:
+        async with session_lock(upload.id):
+            try:
+                await run_in_threadpool(lock_session, db, upload)
+                if upload.completed_at is not None:
+                    await run_in_threadpool(db.rollback)
+                    results[upload.id] = "completed"
+                    continue
+                await finalize_direct_session(db, upload)
+                results[upload.id] = "completed"
+            except HTTPException as e:
+                # Reported, not retried: the client sees the error when it finalizes
+                await run_in_threadpool(db.rollback)
+                results[upload.id] = e.detail
+    return {"uploads": results}
+
+@router.get("/{upload_id}", response_model=UploadSessionSchema)
+def read_upload_session(
+    *,
+    db: Session = Depends(get_db),
+    upload_id: str,
+    current_user: User = Depends(get_current_creator),
+) -> Any:
+    """
+    Get upload progress.
+    """
+    return _get_own_session(db, upload_id, current_user)
+
+@router.head("/{upload_id}")
+def read_upload_offset(
+    *,
+    db: Session = Depends(get_db),
+    upload_id: str,
+    current_user: User = Depends(get_current_creator),
+) -> Response:
+    """
+    Where to resume: the Upload-Offset header holds the bytes received so far.
+    """
+    upload = _get_own_session(db, upload_id, current_user)
+    return Response(status_code=200, headers=_offset_headers(upload))
+
+@router.patch("/{upload_id}", status_code=204)
+async def upload_chunk(
+    *,
+    request: Request,
+    db: Session = Depends(get_db),
+    upload_id: str,
+    offset: int = Header(..., alias="Upload-Offset"),
+    content_type: str = Header(..., alias="Content-Type"),
+    current_user: User = Depends(get_current_creator),
+) -> Response:
+    """
+    Append the request body at Upload-Offset, which must equal the current offset.
+    Responds with the new Upload-Offset; a connection dropped mid-body keeps the
+    bytes that arrived.
+    """
+    if content_type != CHUNK_CONTENT_TYPE:
+        raise HTTPException(status_code=415, detail=f"Content-Type must be {CHUNK_CONTENT_TYPE}")
+
+    upload = await run_in_threadpool(_get_own_session, db, upload_id, current_user)
+    async with session_lock(upload_id):
+        await run_in_threadpool(lock_session, db, upload)
+        if upload.completed_at is not None:
+            raise HTTPException(status_code=409, detail="Upload already finalized")
+        if upload.storage_key:
+            raise HTTPException(status_code=409, detail="Direct uploads are sent to their upload_url")
+        if offset != upload.upload_offset:
+            raise HTTPException(
+                status_code=409, detail="Upload-Offset does not match", headers=_offset_headers(upload)
+            )
+        try:
+            await append_chunk(upload, request.stream())
+        finally:
+            await run_in_threadpool(record_offset, db, upload)
+
+    return Response(status_code=204, headers=_offset_headers(upload))
+
+@router.post("/{upload_id}/finalize", response_model=UploadSessionSchema)
+async def finalize_upload(
+    *,
+    db: Session = Depends(get_db),
+    upload_id: str,
+    current_user: User = Depends(get_current_creator),
+) -> Any:
+    """
+    Validate and store a complete upload. The response's asset_sha256 is then passed
+    to POST /artifacts/ instead of a file, which starts media processing.
+    Finalizing twice returns the same result.
+    """
+    upload = await run_in_threadpool(_get_own_session, db, upload_id, current_user)
+    async with session_lock(upload_id):
+        await run_in_threadpool(lock_session, db, upload)
+        if upload.completed_at is None and upload.storage_key:
+            await finalize_direct_session(db, upload)
+        elif upload.completed_at is None:
+            if upload.upload_offset != upload.upload_length:
+                raise HTTPException(
+                    status_code=409,
+                    detail=f"Upload incomplete: {upload.upload_offset} of {upload.upload_length} bytes received",
+                    headers=_offset_headers(upload),
+                )
+            await finalize_session(db, upload)
+    return upload
@@ -0,0 +1,148 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, make_transient_to_detached, object_session
+from sqlalchemy.orm.util import identity_key
+
+from app.core.config import settings
+from app.core.metrics import record_cache_lookup
+from app.core.security import decode_token
+from app.models.user import User
+
+class TTLCache:
+    """A thread-safe LRU mapping whose entries also expire after a TTL."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0 or self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+# token -> {"uid", "role"}; user id -> column snapshot of the User row
+token_cache = TTLCache(settings.AUTH_CACHE_MAX_ENTRIES, settings.AUTH_CACHE_TTL_SECONDS)
+user_cache = TTLCache(settings.AUTH_CACHE_MAX_ENTRIES, settings.AUTH_CACHE_TTL_SECONDS)
+
+# Bumped by every invalidation, so a load that raced with a write is not cached
+_generation = 0
+_PENDING_INVALIDATIONS = "auth_cache_pending_user_ids"
+
+def invalidate_user(user_id: Optional[int]) -> None:
+    """Drop a cached user, e.g. after changing users with a bulk UPDATE the ORM events don't see."""
+    global _generation
+    _generation += 1
+    if user_id is not None:
+        user_cache.pop(user_id)
+
+def clear() -> None:
+    global _generation
+    _generation += 1
+    token_cache.clear()
+    user_cache.clear()
+
+def decode_token_cached(db: Session, token: str) -> Optional[Dict[str, Any]]:
+    """
+    Decode and verify a token once per TTL. Tokens issued before they carried a
+    user id are resolved by email here, so only their first use costs a query.
+    """
+    claims = token_cache.get(token)
+    record_cache_lookup("auth_token", claims is not None)
+    if claims is not None:
+        return claims
+
+    payload = decode_token(token)
+    if payload is None:
+        return None
+    claims = {"uid": payload.get("uid"), "role": payload.get("role")}
+    if claims["uid"] is None:
+        email = payload.get("sub")
+        if email is None:
+            return None
+        user_id = db.query(User.id).filter(User.email == email).scalar()
+        if user_id is None:
+            return None
+        claims["uid"] = user_id
+
+    expires_in = payload.get("exp", 0) - time.time()
+    if expires_in > 0:
+        token_cache.set(token, claims, ttl=expires_in)
+    return claims
+
+def _snapshot(user: User) -> Dict[str, Any]:
+    return {attr.key: getattr(user, attr.key) for attr in User.__mapper__.column_attrs}
+
+def get_user_cached(db: Session, user_id: int) -> Optional[User]:
+    """
+    Return the User for `user_id`, attached to `db` without querying when cached.
+    The row, not the token's role claim, stays authoritative for permissions.
+    """
+    key = identity_key(User, user_id)
+    if key in db.identity_map:
+        return db.identity_map[key]
+
+    snapshot = user_cache.get(user_id)
+    record_cache_lookup("auth_user", snapshot is not None)
+    if snapshot is not None:
+        user = User(**snapshot)
+        make_transient_to_detached(user)
+        db.add(user)
+        return user
+
+    generation = _generation
+    user = db.get(User, user_id)
+    if user is not None and generation == _generation:
+        user_cache.set(user_id, _snapshot(user))
+    return user
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _user_changed(mapper, connection, target: User) -> None:
+    invalidate_user(target.id)
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(_PENDING_INVALIDATIONS, set()).add(target.id)
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session: Session) -> None:
+    # Again after commit: another request may have re-cached the row between flush and commit
+    for user_id in session.info.pop(_PENDING_INVALIDATIONS, ()):
+        invalidate_user(user_id)
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_pending(session: Session, previous_transaction) -> None:
+    session.info.pop(_PENDING_INVALIDATIONS, None)
@@ -0,0 +1,62 @@
+from typing import Dict, Optional
+
+from starlette.exceptions import HTTPException
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Room for the form fields and part headers sent along with the file
+MULTIPART_OVERHEAD_BYTES = 1024 * 1024
+
+class BodySizeLimitMiddleware:
+    """
+    Caps request bodies by path prefix before anything parses them. Starlette's
+    multipart parser spools a whole upload to disk before the endpoint runs, so
+    per-file limits checked there can't stop an oversized upload from being
+    received. A Content-Length over the limit gets a 413 without reading the body;
+    bodies without one (chunked) are counted and cut off once they pass it.
+    """
+
+    def __init__(self, app: ASGIApp, limits: Dict[str, int]):
+        self.app = app
+        # Longest prefix first, so the most specific limit applies
+        self.limits = sorted(limits.items(), key=lambda item: len(item[0]), reverse=True)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        limit = self._limit(scope)
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > limit:
+            await self._reject(limit)(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # Raised inside body parsing, which FastAPI turns into this response
+                    raise HTTPException(status_code=413, detail=_too_large(limit))
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+    def _limit(self, scope: Scope) -> Optional[int]:
+        if scope["type"] != "http" or scope["method"] not in ("POST", "PUT", "PATCH"):
+            return None
+        for prefix, limit in self.limits:
+            if scope["path"].startswith(prefix):
+                return limit
+        return None
+
+    @staticmethod
+    def _reject(limit: int) -> JSONResponse:
+        return JSONResponse({"detail": _too_large(limit)}, status_code=413, headers={"Connection": "close"})
+
+def _too_large(limit: int) -> str:
+    return f"Request body too large (max {limit / 1024 / 1024:.0f}MB)"
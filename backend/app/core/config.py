@@ -7,6 +7,14 @@ class Settings(BaseSettings):
     API_V1_STR: str = "/api/v1"
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key-here-change-in-production")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8  # 8 days
+    # Per-process cache of decoded tokens and users; other workers see changes within the TTL
+    AUTH_CACHE_TTL_SECONDS: int = 60  # 0 disables the cache
+    AUTH_CACHE_MAX_ENTRIES: int = 10000
+    # Password hashing: bcrypt cost factor, dedicated worker processes (0 hashes on the
+    # request thread) and how many more hashes may wait before logins get a 503
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_QUEUE_LIMIT: int = 32
     
     # Database
     DATABASE_URL: str = os.getenv("DATABASE_URL", "postgresql://rayankhoury@localhost:5432/ar_map_explorer")
@@ -42,17 +50,93 @@ class Settings(BaseSettings):
     MAX_MODEL_SIZE_MB: int = 25
     MAX_TRIANGLES: int = 150000
     MAX_TEXTURE_SIZE: int = 4096
+    # Model LODs and the optimized model variant cap embedded textures at this edge length
+    MODEL_TEXTURE_MAX_SIZE: int = 2048
+    # Unreferenced content-addressed assets are kept this long (time to finish a hash-first upload)
+    ASSET_GC_GRACE_HOURS: int = 24
+    # Set to an nginx `internal` location aliasing the uploads directory (e.g.
+    # "/protected-uploads") to have nginx send asset files with sendfile()
+    ASSET_ACCEL_REDIRECT_PREFIX: str = ""
+    # Resumable upload sessions idle this long are removed by scripts/gc_assets.py
+    UPLOAD_SESSION_TTL_HOURS: int = 24
+    
+    # Background media processing: "thread" (in-process pool), "celery" (workers started
+    # with `celery -A app.worker worker`, broker REDIS_URL) or "inline" (tests, scripts)
+    MEDIA_PROCESSING_BACKEND: str = "thread"
+    MEDIA_PROCESSING_WORKERS: int = 2
+    MEDIA_PROCESSING_MAX_RETRIES: int = 3
+    MEDIA_PROCESSING_RETRY_DELAY_SECONDS: float = 2.0  # Doubled on every retry
+    # A running job refreshes its heartbeat this often; PROCESSING jobs without one for
+    # MEDIA_PROCESSING_STALE_SECONDS were lost with their process and are requeued, as
+    # are PENDING jobs, on startup and every MEDIA_PROCESSING_RECOVERY_INTERVAL_SECONDS
+    MEDIA_PROCESSING_HEARTBEAT_SECONDS: float = 30.0
+    MEDIA_PROCESSING_STALE_SECONDS: float = 300.0
+    MEDIA_PROCESSING_RECOVERY_INTERVAL_SECONDS: float = 300.0
+    # Video posters and HLS renditions need an ffmpeg binary (name on PATH or full path);
+    # without one, videos are stored and served as uploaded
+    FFMPEG_PATH: str = "ffmpeg"
+    VIDEO_HLS_ENABLED: bool = True
+    VIDEO_PROCESSING_TIMEOUT_SECONDS: int = 900  # Per ffmpeg run
     
     # Distance constraints
     MIN_VIEW_DISTANCE_M: int = 0
     MAX_VIEW_DISTANCE_M: int = 2000
+    # AR prefetch manifest: default download budget and how many nearby artifacts are ranked
+    PREFETCH_DEFAULT_BUDGET_BYTES: int = 50 * 1024 * 1024
+    PREFETCH_MAX_CANDIDATES: int = 200
+
+    # Analytics ingestion: events are buffered ("memory" per process, "redis" shared via
+    # REDIS_URL, or "inline" inserts for tests/scripts) and written in multi-row inserts
+    # every ANALYTICS_FLUSH_BATCH_SIZE events or ANALYTICS_FLUSH_INTERVAL_SECONDS
+    ANALYTICS_BUFFER_BACKEND: str = "memory"
+    ANALYTICS_FLUSH_BATCH_SIZE: int = 1000
+    ANALYTICS_FLUSH_INTERVAL_SECONDS: float = 2.0
+    # Buffered events beyond this get a 503 (clients keep and retry them)
+    ANALYTICS_BUFFER_MAX_EVENTS: int = 20000
+    ANALYTICS_MAX_BATCH_EVENTS: int = 1000  # Per JSON request
+    ANALYTICS_MAX_STREAM_EVENTS: int = 50000  # Per NDJSON request
+    ANALYTICS_MAX_EVENT_AGE_HOURS: int = 72  # Older (offline-buffered) events are rejected
+    # Each rollup run (scripts/update_rollups.py) re-reads events written this long
+    # before its watermark, to catch inserts that committed out of order
+    ANALYTICS_ROLLUP_OVERLAP_MINUTES: int = 10
+    # Heatmaps of windows still receiving (late) events are cached this long per process
+    ANALYTICS_HEATMAP_CACHE_SECONDS: int = 300
+    ANALYTICS_HEATMAP_MAX_CELLS: int = 250_000
+    # Events are partitioned by created_at per "day", "week" or "month"; partitions
+    # older than ANALYTICS_RETENTION_DAYS are archived to ANALYTICS_ARCHIVE_DIR and
+    # dropped by scripts/manage_partitions.py. Fixed for the life of a database: one
+    # that already had events when it was partitioned (PostgreSQL) uses "month"
+    ANALYTICS_PARTITION_PERIOD: str = "month"
+    ANALYTICS_RETENTION_DAYS: int = 400
+    ANALYTICS_ARCHIVE_DIR: str = "archive/analytics"
+    
+    # Observability
+    DEBUG: bool = False
+    SQL_QUERY_BUDGET: int = 0  # Max statements per request, 0 disables the check
+    SQL_QUERY_BUDGET_ENFORCE: bool = False  # Fail requests over budget (for tests)
+    SQL_REPEATED_STATEMENT_THRESHOLD: int = 5  # Same statement this often = likely N+1
+    
+    # Request profiling (admin `X-Profile: 1` header or a random sample of requests)
+    PROFILE_DIR: str = "profiles"
+    PROFILE_INTERVAL_MS: float = 5.0
+    PROFILE_SAMPLE_RATE: float = 0.0  # Fraction of all requests profiled continuously
+    PROFILE_MAX_FILES: int = 200
     
     # AWS S3 (optional for production file storage)
     AWS_ACCESS_KEY_ID: str = os.getenv("AWS_ACCESS_KEY_ID", "")
     AWS_SECRET_ACCESS_KEY: str = os.getenv("AWS_SECRET_ACCESS_KEY", "")
     AWS_REGION: str = os.getenv("AWS_REGION", "us-east-1")
     S3_BUCKET: str = os.getenv("S3_BUCKET", "")
-    
+    # Where uploads and derivatives are stored: "local" (uploads/ on this node) or "s3"
+    STORAGE_BACKEND: str = "local"
+    S3_ENDPOINT_URL: str = ""  # For S3-compatible services such as MinIO
+    S3_PUBLIC_URL: str = ""  # Base URL clients fetch objects from (CDN); defaults to the bucket
+    # Lifetime of presigned direct-upload URLs
+    PRESIGNED_URL_EXPIRE_SECONDS: int = 3600
+    # Bearer token the bucket's object-created notifications are sent with; empty
+    # disables POST /uploads/storage-events
+    STORAGE_WEBHOOK_SECRET: str = ""
+
     class Config:
         case_sensitive = True
 
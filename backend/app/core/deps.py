@@ -3,11 +3,11 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from app.core.database import SessionLocal
-from app.core.security import verify_token
+from app.core.auth_cache import decode_token_cached, get_user_cached
 from app.models.user import User
-from app.schemas.auth import TokenData
 
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
 
 def get_db() -> Generator:
     try:
@@ -26,17 +26,25 @@ def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    token = credentials.credentials
-    email = verify_token(token)
-    if email is None:
+    # Served from the auth cache on the common path, without touching the database
+    claims = decode_token_cached(db, credentials.credentials)
+    if claims is None:
         raise credentials_exception
     
-    token_data = TokenData(email=email)
-    user = db.query(User).filter(User.email == token_data.email).first()
+    user = get_user_cached(db, claims["uid"])
     if user is None:
         raise credentials_exception
     return user
 
+def get_current_user_optional(
+    db: Session = Depends(get_db),
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
+) -> Optional[User]:
+    """The authenticated user, or None for anonymous requests (a bad token is still a 401)."""
+    if credentials is None:
+        return None
+    return get_current_user(db, credentials)
+
 def get_current_active_user(
     current_user: User = Depends(get_current_user),
 ) -> User:
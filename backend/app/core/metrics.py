@@ -0,0 +1,154 @@
+import os
+import time
+from typing import Dict, Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# With several uvicorn/gunicorn workers, set PROMETHEUS_MULTIPROC_DIR to an empty
+# directory before starting them: every worker then writes its counters to
+# memory-mapped files there and /metrics aggregates all of them.
+
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000, 100_000_000)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+# HTTP
+REQUEST_COUNT = Counter(
+    "http_requests_total", "HTTP requests handled", ["method", "route", "status"]
+)
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency", ["method", "route"]
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight", "HTTP requests currently being handled", ["method"],
+    multiprocess_mode="livesum",
+)
+RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes", "HTTP response body size", ["method", "route"],
+    buckets=SIZE_BUCKETS,
+)
+
+# Database (fed by QueryStatsMiddleware)
+DB_QUERIES_PER_REQUEST = Histogram(
+    "db_queries_per_request", "SQL statements issued per request", ["route"],
+    buckets=COUNT_BUCKETS,
+)
+DB_TIME_PER_REQUEST = Histogram(
+    "db_time_per_request_seconds", "Time spent in SQL statements per request", ["route"]
+)
+
+# Domain
+ARTIFACTS_NEAR_SCANNED = Histogram(
+    "artifacts_near_candidates_scanned", "Candidate rows loaded by get_artifacts_near",
+    buckets=COUNT_BUCKETS,
+)
+ARTIFACTS_NEAR_RETURNED = Histogram(
+    "artifacts_near_results_returned", "Artifacts returned by get_artifacts_near",
+    buckets=COUNT_BUCKETS,
+)
+UPLOAD_BYTES = Counter("upload_bytes_total", "Bytes received in uploads", ["asset_type"])
+UPLOAD_DURATION = Histogram(
+    "upload_duration_seconds", "Time to store an uploaded file", ["asset_type"]
+)
+THUMBNAIL_DURATION = Histogram(
+    "thumbnail_generation_seconds", "Time to generate a thumbnail", ["asset_type"]
+)
+MEDIA_PROCESSING_JOBS = Counter(
+    "media_processing_jobs_total", "Media processing attempts by asset type and result",
+    ["asset_type", "result"],
+)
+PASSWORD_HASH_DURATION = Histogram(
+    "password_hash_duration_seconds", "Queue wait plus bcrypt time per hash/verify", ["operation"]
+)
+PASSWORD_HASH_REJECTED = Counter(
+    "password_hash_rejected_total", "Hash/verify requests rejected because the pool was saturated"
+)
+ANALYTICS_EVENTS_RECEIVED = Counter(
+    "analytics_events_received_total", "Analytics events by ingestion result (accepted/rejected/throttled)",
+    ["result"],
+)
+ANALYTICS_EVENTS_FLUSHED = Counter(
+    "analytics_events_flushed_total", "Analytics events written to the database"
+)
+ANALYTICS_FLUSH_DURATION = Histogram(
+    "analytics_flush_duration_seconds", "Time to insert one batch of analytics events"
+)
+ANALYTICS_EVENTS_BUFFERED = Gauge(
+    "analytics_events_buffered", "Analytics events waiting in this process's memory buffer",
+    multiprocess_mode="livesum",
+)
+CACHE_REQUESTS = Counter(
+    "cache_requests_total", "Cache lookups by cache and result (hit/miss)", ["cache", "result"]
+)
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Return the Prometheus exposition for this process, or all workers in multiprocess mode."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+_route_paths: Dict[object, str] = {}
+
+def route_label(scope: Scope) -> str:
+    """
+    Route template (e.g. /api/v1/artifacts/{artifact_id}) that handled the request.
+    Using templates instead of raw paths keeps label cardinality bounded.
+    """
+    endpoint = scope.get("endpoint")
+    if endpoint is None:
+        return "unmatched"
+    if not _route_paths:
+        for route in scope["app"].routes:
+            _route_paths[getattr(route, "endpoint", None) or getattr(route, "app", None)] = route.path
+    return _route_paths.get(endpoint, "unmatched")
+
+class MetricsMiddleware:
+    """Per-route request counts, latency, response sizes and in-flight requests."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+        response_size = 0
+
+        async def send_with_metrics(message: Message) -> None:
+            nonlocal status_code, response_size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                response_size += len(message.get("body", b""))
+            await send(message)
+
+        in_flight = REQUESTS_IN_FLIGHT.labels(method)
+        in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            duration = time.perf_counter() - start
+            in_flight.dec()
+            route = route_label(scope)
+            REQUEST_COUNT.labels(method, route, str(status_code)).inc()
+            REQUEST_LATENCY.labels(method, route).observe(duration)
+            RESPONSE_SIZE.labels(method, route).observe(response_size)
@@ -0,0 +1,15 @@
+import importlib
+from functools import lru_cache
+from types import ModuleType
+from typing import Optional
+
+@lru_cache(maxsize=None)
+def optional_import(name: str) -> Optional[ModuleType]:
+    """
+    Import a heavy optional dependency on first use.
+    Returns None if the module (or a native library it needs) isn't available.
+    """
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        return None
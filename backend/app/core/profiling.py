@@ -0,0 +1,289 @@
+import asyncio
+import functools
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from fastapi import HTTPException
+from fastapi.dependencies.models import Dependant
+from fastapi.dependencies.utils import is_async_gen_callable, is_coroutine_callable, is_gen_callable
+from fastapi.routing import APIRoute
+from fastapi.security import HTTPAuthorizationCredentials
+from starlette import concurrency
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+PROFILE_ID_PATTERN = re.compile(r"^[0-9]{8}T[0-9]{6}-[0-9a-f]{8}$")
+PROFILE_SUFFIX = ".speedscope.json"
+
+_active_profiler: ContextVar[Optional["RequestProfiler"]] = ContextVar(
+    "active_profiler", default=None
+)
+
+class RequestProfiler:
+    """
+    Wall-clock sampling profiler scoped to a single request.
+
+    A background thread snapshots `sys._current_frames()` every interval and keeps
+    the stacks that belong to this request: the event loop thread while the
+    request's task is running, and the threadpool workers while they run one of its
+    sync endpoints or dependencies, or a function it passed to run_in_threadpool().
+    Those mark their thread themselves (see _profiled_thread).
+    """
+
+    def __init__(self, name: str, interval: float):
+        self.id = f"{datetime.utcnow():%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+        self.name = name
+        self.interval = interval
+        self._task = asyncio.current_task()
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._frame_index: Dict[Tuple[str, str, int], int] = {}
+        self._samples: Dict[int, List[Tuple[List[int], float]]] = {}
+        self._threads: Dict[int, int] = {}  # Worker thread -> nesting depth
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+        self._started = 0.0
+        self.duration = 0.0
+
+    def start(self) -> None:
+        self._started = time.perf_counter()
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.duration = time.perf_counter() - self._started
+
+    def _run(self) -> None:
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            self._sample(now - last)
+            last = now
+
+    def _sample(self, weight: float) -> None:
+        for ident, frame in sys._current_frames().items():
+            if ident == self._thread.ident:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(frame)
+                frame = frame.f_back
+            stack.reverse()
+            if ident == self._loop_thread:
+                if asyncio.current_task(self._loop) is not self._task:
+                    continue
+            elif ident not in self._threads:
+                continue
+            self._samples.setdefault(ident, []).append(
+                ([self._frame_id(f) for f in stack], weight)
+            )
+
+    def _frame_id(self, frame) -> int:
+        code = frame.f_code
+        key = (code.co_name, code.co_filename, code.co_firstlineno)
+        index = self._frame_index.get(key)
+        if index is None:
+            index = self._frame_index[key] = len(self._frame_index)
+        return index
+
+    def to_speedscope(self) -> dict:
+        """Serialize as a speedscope file (https://www.speedscope.app/file-format-schema.json)."""
+        frames = [{"name": name, "file": file, "line": line} for name, file, line in self._frame_index]
+        profiles = []
+        for ident, samples in self._samples.items():
+            thread = "event loop" if ident == self._loop_thread else f"worker thread {ident}"
+            profiles.append({
+                "type": "sampled",
+                "name": f"{self.name} ({thread})",
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": sum(weight for _, weight in samples),
+                "samples": [stack for stack, _ in samples],
+                "weights": [weight for _, weight in samples],
+            })
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": f"{self.name} - {self.duration * 1000:.1f} ms",
+            "exporter": "ar-map-explorer",
+            "shared": {"frames": frames},
+            "profiles": profiles,
+        }
+
+    def save(self) -> str:
+        os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+        path = profile_path(self.id)
+        with open(path, "w") as f:
+            json.dump(self.to_speedscope(), f)
+        _prune_profiles()
+        return path
+
+@contextmanager
+def _profiled_thread():
+    """Count the current thread as the profiled request's while the block runs."""
+    profiler = _active_profiler.get()
+    if profiler is None:
+        yield
+        return
+    ident = threading.get_ident()
+    profiler._threads[ident] = profiler._threads.get(ident, 0) + 1
+    try:
+        yield
+    finally:
+        profiler._threads[ident] -= 1
+        if not profiler._threads[ident]:
+            del profiler._threads[ident]
+
+class _ProfiledCall:
+    """
+    A sync endpoint or dependency that marks its worker thread while it runs.
+    Compares equal to the wrapped callable, so dependency_overrides keyed on the
+    original still apply.
+    """
+
+    def __init__(self, call: Callable[..., Any]):
+        self.call = call
+        functools.update_wrapper(self, call)
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        with _profiled_thread():
+            return self.call(*args, **kwargs)
+
+    def __hash__(self) -> int:
+        return hash(self.call)
+
+    def __eq__(self, other: Any) -> bool:
+        return other is self or other == self.call
+
+def _profile_dependant(dependant: Dependant, wrapped: Dict[Any, _ProfiledCall]) -> None:
+    call = dependant.call
+    if call is not None and not isinstance(call, _ProfiledCall) and not (
+        is_coroutine_callable(call) or is_gen_callable(call) or is_async_gen_callable(call)
+    ):
+        if call not in wrapped:
+            wrapped[call] = _ProfiledCall(call)
+        dependant.call = wrapped[call]
+    for sub_dependant in dependant.dependencies:
+        _profile_dependant(sub_dependant, wrapped)
+
+def profile_sync_handlers(routes: Iterable[Any]) -> None:
+    """
+    Make the routes' sync endpoints and dependencies (which FastAPI runs in the
+    threadpool) mark their worker threads for the request profiler. Call after
+    all routers are included.
+    """
+    wrapped: Dict[Any, _ProfiledCall] = {}
+    for route in routes:
+        if isinstance(route, APIRoute):
+            _profile_dependant(route.dependant, wrapped)
+
+async def run_in_threadpool(func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """starlette's run_in_threadpool, with the worker thread profiled along with the request."""
+    def run() -> Any:
+        with _profiled_thread():
+            return func(*args, **kwargs)
+
+    return await concurrency.run_in_threadpool(run)
+
+def profile_path(profile_id: str) -> str:
+    return os.path.join(settings.PROFILE_DIR, f"{profile_id}{PROFILE_SUFFIX}")
+
+def list_profiles() -> List[dict]:
+    """Stored profiles, newest first."""
+    if not os.path.isdir(settings.PROFILE_DIR):
+        return []
+    profiles = []
+    for entry in os.scandir(settings.PROFILE_DIR):
+        if entry.name.endswith(PROFILE_SUFFIX):
+            stat = entry.stat()
+            profiles.append({
+                "id": entry.name[:-len(PROFILE_SUFFIX)],
+                "size_bytes": stat.st_size,
+                "created_at": datetime.utcfromtimestamp(stat.st_mtime),
+            })
+    return sorted(profiles, key=lambda p: p["id"], reverse=True)
+
+def _prune_profiles() -> None:
+    for profile in list_profiles()[settings.PROFILE_MAX_FILES:]:
+        try:
+            os.remove(profile_path(profile["id"]))
+        except FileNotFoundError:
+            pass
+
+def _is_admin(authorization: str) -> bool:
+    """Run the request's bearer token through get_current_admin."""
+    from app.core.database import SessionLocal
+    from app.core.deps import get_current_active_user, get_current_admin, get_current_user
+
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    db = SessionLocal()
+    try:
+        credentials = HTTPAuthorizationCredentials(scheme=scheme, credentials=token)
+        user = get_current_user(db=db, credentials=credentials)
+        get_current_admin(get_current_active_user(user))
+        return True
+    except HTTPException:
+        return False
+    finally:
+        db.close()
+
+def _profile_requested(scope: Scope) -> bool:
+    headers = dict(scope["headers"])
+    if headers.get(b"x-profile") in (b"1", b"true"):
+        return True
+    return re.search(rb"(^|&)profile=(1|true)(&|$)", scope.get("query_string", b"")) is not None
+
+class ProfilingMiddleware:
+    """
+    Profiles a request when an admin sends `X-Profile: 1` (or `?profile=1`), or at
+    random for PROFILE_SAMPLE_RATE of all requests. The profile id is returned in
+    the X-Profile-Id header and can be fetched from /api/v1/admin/profiles/{id}.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not await self._should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profiler = RequestProfiler(
+            name=f"{scope['method']} {scope['path']}",
+            interval=settings.PROFILE_INTERVAL_MS / 1000,
+        )
+
+        async def send_with_profile_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)["X-Profile-Id"] = profiler.id
+            await send(message)
+
+        token = _active_profiler.set(profiler)
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            profiler.stop()
+            _active_profiler.reset(token)
+            await concurrency.run_in_threadpool(profiler.save)
+
+    async def _should_profile(self, scope: Scope) -> bool:
+        if _profile_requested(scope):
+            authorization = dict(scope["headers"]).get(b"authorization", b"").decode("latin-1")
+            return await concurrency.run_in_threadpool(_is_admin, authorization)
+        rate = settings.PROFILE_SAMPLE_RATE
+        return rate > 0 and random.random() < rate
@@ -0,0 +1,159 @@
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.metrics import DB_QUERIES_PER_REQUEST, DB_TIME_PER_REQUEST, route_label
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+# Expanded IN lists / VALUES tuples: "(%(id_1)s, %(id_2)s)" or "(?, ?)"
+_PARAM_LIST = re.compile(r"\(\s*(?:%\(\w+\)s|\?|:\w+)(?:\s*,\s*(?:%\(\w+\)s|\?|:\w+))*\s*\)")
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised in enforce mode when a request issues more statements than allowed."""
+
+class QueryStats:
+    """SQL statements issued while handling a single request."""
+
+    def __init__(self, budget: Optional[int] = None):
+        self.budget = budget
+        self.count = 0
+        self.total_time = 0.0
+        self.statements: Counter = Counter()
+
+    def record(self, statement: str, duration: float) -> None:
+        self.count += 1
+        self.total_time += duration
+        self.statements[normalize_statement(statement)] += 1
+
+    def repeated(self, threshold: Optional[int] = None) -> List[Tuple[str, int]]:
+        """Statements issued at least `threshold` times - the usual N+1 signature."""
+        threshold = threshold or settings.SQL_REPEATED_STATEMENT_THRESHOLD
+        return [(s, n) for s, n in self.statements.most_common() if n >= threshold]
+
+    @property
+    def over_budget(self) -> bool:
+        return self.budget is not None and self.count > self.budget
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+def current_query_stats() -> Optional[QueryStats]:
+    return _current_stats.get()
+
+def normalize_statement(statement: str) -> str:
+    """Collapse whitespace and parameter lists so equivalent statements group together."""
+    return _PARAM_LIST.sub("(?)", _WHITESPACE.sub(" ", statement).strip())
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_stats.get() is not None and context is not None:
+        context._query_start_time = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    if stats is None:
+        return
+    start_time = getattr(context, "_query_start_time", None)
+    if start_time is None:
+        return
+    stats.record(statement, time.perf_counter() - start_time)
+    if stats.over_budget and settings.SQL_QUERY_BUDGET_ENFORCE:
+        raise QueryBudgetExceeded(
+            f"Query budget exceeded: {stats.count} statements, budget is {stats.budget}"
+        )
+
+def instrument_engine(engine: Engine) -> None:
+    """Attach the per-request statement counters to an engine."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+@contextmanager
+def assert_max_queries(max_queries: int) -> Iterator[QueryStats]:
+    """
+    Fail if the wrapped block issues more than `max_queries` statements.
+    Intended for tests that call services directly.
+    """
+    stats = QueryStats(budget=max_queries)
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+    if stats.over_budget:
+        raise QueryBudgetExceeded(
+            f"Expected at most {max_queries} statements, got {stats.count}: "
+            f"{list(stats.statements)}"
+        )
+
+class QueryBudget:
+    """
+    Dependency that overrides the default query budget for a route, e.g.
+    `dependencies=[Depends(QueryBudget(3))]`.
+    """
+
+    def __init__(self, max_queries: int):
+        self.max_queries = max_queries
+
+    def __call__(self) -> None:
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.budget = self.max_queries
+
+class QueryStatsMiddleware:
+    """
+    Counts SQL statements and DB time per request. Adds X-DB-* response headers in
+    debug mode and logs budget overruns and repeated statements otherwise.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats(budget=settings.SQL_QUERY_BUDGET or None)
+        token = _current_stats.set(stats)
+
+        async def send_with_stats(message: Message) -> None:
+            if message["type"] == "http.response.start" and settings.DEBUG:
+                headers = MutableHeaders(scope=message)
+                headers["X-DB-Query-Count"] = str(stats.count)
+                headers["X-DB-Time-Ms"] = f"{stats.total_time * 1000:.2f}"
+                headers["X-DB-Repeated-Statements"] = str(len(stats.repeated()))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_stats)
+        finally:
+            _current_stats.reset(token)
+            self._report(scope, stats)
+
+    def _report(self, scope: Scope, stats: QueryStats) -> None:
+        route = route_label(scope)
+        DB_QUERIES_PER_REQUEST.labels(route).observe(stats.count)
+        DB_TIME_PER_REQUEST.labels(route).observe(stats.total_time)
+
+        request = f"{scope['method']} {scope['path']}"
+        if stats.over_budget:
+            logger.warning(
+                "%s issued %d SQL statements (budget %d) in %.1f ms",
+                request, stats.count, stats.budget, stats.total_time * 1000,
+            )
+        for statement, times in stats.repeated():
+            logger.warning("Possible N+1 in %s: %dx %s", request, times, statement)
+        logger.debug(
+            "%s issued %d SQL statements in %.1f ms",
+            request, stats.count, stats.total_time * 1000,
+        )
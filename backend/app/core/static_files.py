@@ -0,0 +1,257 @@
+import mimetypes
+import os
+import re
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Optional, Sequence, Tuple
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import Receive, Scope, Send
+
+# Content-addressed uploads never change, so clients and CDNs may cache them forever
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Everything else may be cached but is revalidated (cheap 304s thanks to the ETag)
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+# glTF JSON compresses well; a `.br`/`.gz` file next to one is served to clients accepting it
+PRECOMPRESSED_EXTENSIONS = (".gltf",)
+PRECOMPRESSED_ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+mimetypes.add_type("model/gltf+json", ".gltf")
+mimetypes.add_type("model/gltf-binary", ".glb")
+
+# Only the upload itself (`<sha256>.<ext>`) is named after its content; thumbnails and
+# derivatives (`<sha256>_<name>...`) are regenerated in place when reprocessed
+_CONTENT_HASH_NAME = re.compile(r"^[0-9a-f]{64}(\.[0-9A-Za-z]+)?$")
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    (start, end) inclusive for a single `bytes=` range, None to serve the whole file
+    (no header, or several ranges, which may be ignored). Raises ValueError when
+    the range can't be satisfied.
+    """
+    if not header:
+        return None
+    match = _RANGE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError(header)
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError(header)
+    return start, end
+
+def _accepts(accept_encoding: str, encoding: str) -> bool:
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        if name.strip().lower() == encoding:
+            return params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+def is_content_addressed(path: str) -> bool:
+    """Whether the file is an upload named after its SHA-256, so its bytes never change."""
+    return bool(_CONTENT_HASH_NAME.match(os.path.basename(path)))
+
+class AssetFileResponse(Response):
+    """
+    A file (or a byte range of it) sent without loading it into memory. Uses the
+    ASGI zero-copy send extension when the server offers it; with
+    an accel_redirect path, hands the transfer to nginx (X-Accel-Redirect)
+    so it is sent with sendfile() outside the Python process.
+    """
+
+    chunk_size = 256 * 1024
+
+    def __init__(
+        self,
+        path: str,
+        size: int,
+        headers: dict,
+        byte_range: Optional[Tuple[int, int]] = None,
+        send_header_only: bool = False,
+        accel_redirect: Optional[str] = None,
+    ) -> None:
+        self.path = path
+        self.start, self.end = byte_range or (0, size - 1)
+        self.send_header_only = send_header_only
+        self.accel_redirect = accel_redirect
+        self.background = None
+        self.body = b""
+        self.status_code = 206 if byte_range else 200
+        self.init_headers(headers)
+        self.headers["accept-ranges"] = "bytes"
+        if byte_range:
+            self.headers["content-range"] = f"bytes {self.start}-{self.end}/{size}"
+        self.headers["content-length"] = str(max(self.end - self.start + 1, 0))
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if self.accel_redirect and not self.send_header_only:
+            # nginx serves the file (and the Range) itself; it recomputes the length
+            del self.headers["content-length"]
+            del self.headers["content-range"]
+            self.headers["x-accel-redirect"] = self.accel_redirect
+            self.status_code = 200
+            await send({"type": "http.response.start", "status": 200, "headers": self.raw_headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        remaining = self.end - self.start + 1
+        if self.send_header_only or remaining <= 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        if "http.response.zerocopysend" in scope.get("extensions", {}):
+            with open(self.path, "rb") as file:
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": file.fileno(),
+                    "offset": self.start,
+                    "count": remaining,
+                    "more_body": False,
+                })
+            return
+
+        async with await anyio.open_file(self.path, mode="rb") as file:
+            await file.seek(self.start)
+            while remaining > 0:
+                chunk = await file.read(min(self.chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+            if remaining > 0:
+                # File shrank underneath us; end the response rather than hang
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+class AssetFiles(StaticFiles):
+    """
+    StaticFiles for uploads with byte ranges (video seeking), strong validators
+    (ETag, Last-Modified, If-Range) and precompressed glTF variants. Uploads named
+    `<sha256>.<ext>` are content-addressed: their ETag is the name itself and they
+    get `cache_control`. Every other file (thumbnails, derivatives, HLS segments)
+    is revalidated, with an ETag from its mtime and size.
+    """
+
+    def __init__(
+        self,
+        *,
+        cache_control: str = REVALIDATE_CACHE_CONTROL,
+        hidden: Sequence[str] = (),
+        accel_redirect_prefix: str = "",
+        **kwargs,
+    ) -> None:
+        super().__init__(**kwargs)
+        self.cache_control = cache_control
+        # nginx internal location aliasing this directory; files are then sent by nginx
+        self.accel_redirect_prefix = accel_redirect_prefix.rstrip("/")
+        # Top-level directories never served (e.g. partial uploads)
+        self.hidden = set(hidden)
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        if path.replace("\\", "/").lstrip("/").split("/", 1)[0] in self.hidden:
+            raise HTTPException(status_code=404)
+        return await super().get_response(path, scope)
+
+    def _etag(self, full_path: str, stat_result: os.stat_result, encoding: Optional[str]) -> str:
+        if is_content_addressed(full_path):
+            tag = os.path.basename(full_path)
+        else:
+            tag = f"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"
+        return f'"{tag}-{encoding}"' if encoding else f'"{tag}"'
+
+    def _precompressed(self, full_path: str, request_headers: Headers):
+        """(path, stat, encoding) of a precompressed variant the client accepts, if one exists."""
+        if not full_path.endswith(PRECOMPRESSED_EXTENSIONS):
+            return None
+        accept_encoding = request_headers.get("accept-encoding", "")
+        for encoding, suffix in PRECOMPRESSED_ENCODINGS:
+            if _accepts(accept_encoding, encoding):
+                try:
+                    return full_path + suffix, os.stat(full_path + suffix), encoding
+                except OSError:
+                    continue
+        return None
+
+    def _is_not_modified(self, etag: str, mtime: float, request_headers: Headers) -> bool:
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match is not None:
+            candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+            return "*" in candidates or etag in candidates
+        if_modified_since = request_headers.get("if-modified-since")
+        if if_modified_since:
+            try:
+                return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def file_response(
+        self,
+        full_path,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        full_path = str(full_path)
+        request_headers = Headers(scope=scope)
+        media_type = mimetypes.guess_type(full_path)[0] or "application/octet-stream"
+
+        cache_control = self.cache_control if is_content_addressed(full_path) else REVALIDATE_CACHE_CONTROL
+        headers = {"cache-control": cache_control, "content-type": media_type}
+        encoding = None
+        served_path = full_path
+        # Behind nginx, gzip_static/brotli_static pick precompressed files instead
+        if full_path.endswith(PRECOMPRESSED_EXTENSIONS) and not self.accel_redirect_prefix:
+            headers["vary"] = "Accept-Encoding"
+            variant = self._precompressed(full_path, request_headers)
+            if variant:
+                served_path, stat_result, encoding = variant
+                headers["content-encoding"] = encoding
+
+        etag = self._etag(full_path, stat_result, encoding)
+        headers["etag"] = etag
+        headers["last-modified"] = formatdate(stat_result.st_mtime, usegmt=True)
+        if self._is_not_modified(etag, stat_result.st_mtime, request_headers):
+            return Response(status_code=304, headers={
+                k: v for k, v in headers.items() if k in ("cache-control", "etag", "last-modified", "vary")
+            })
+
+        size = stat_result.st_size
+        byte_range = None
+        if_range = request_headers.get("if-range")
+        # If-Range: only honour the Range if the client's copy is still current
+        if if_range is None or if_range == etag or if_range == headers["last-modified"]:
+            try:
+                byte_range = parse_range(request_headers.get("range"), size)
+            except ValueError:
+                return Response(status_code=416, headers={
+                    "content-range": f"bytes */{size}", "cache-control": cache_control,
+                })
+
+        accel_redirect = None
+        if self.accel_redirect_prefix:
+            relative = os.path.relpath(served_path, os.path.realpath(str(self.directory)))
+            accel_redirect = f"{self.accel_redirect_prefix}/{relative}"
+
+        return AssetFileResponse(
+            served_path,
+            size,
+            headers,
+            byte_range=byte_range,
+            send_header_only=scope["method"] == "HEAD",
+            accel_redirect=accel_redirect,
+        )
@@ -1,15 +1,22 @@
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 import os
 
+from app.core.body_limit import MULTIPART_OVERHEAD_BYTES, BodySizeLimitMiddleware
 from app.core.config import settings
-from app.core.database import engine
-from app.models import base
+from app.core.metrics import MetricsMiddleware, render_metrics
+from app.core.password_pool import password_pool
+from app.core.profiling import ProfilingMiddleware, profile_sync_handlers
+from app.core.query_stats import QueryStatsMiddleware
+from app.core.static_files import AssetFiles, IMMUTABLE_CACHE_CONTROL
+from app.models import base  # noqa: F401 - registers all models with the mapper
+from app.services import analytics_ingest, media_processing
+from app.services.file_upload import max_upload_size
 from app.api.v1.api import api_router
 
-# Create database tables
-base.Base.metadata.create_all(bind=engine)
+# Importing this module must stay side-effect free and cheap: the schema is
+# managed by alembic (`alembic upgrade head`), never created at startup.
+# Use `python scripts/startup_report.py` to check boot time against budget.
 
 app = FastAPI(
     title="AR Map Explorer API",
@@ -25,17 +32,66 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[
+        "X-DB-Query-Count", "X-DB-Time-Ms", "X-DB-Repeated-Statements", "X-Profile-Id"
+    ],
 )
 
+# Reject oversized artifact uploads before the multipart parser receives them
+app.add_middleware(
+    BodySizeLimitMiddleware,
+    limits={f"{settings.API_V1_STR}/artifacts": max_upload_size() + MULTIPART_OVERHEAD_BYTES},
+)
+
+# On-demand (admin) and sampled request profiling
+app.add_middleware(ProfilingMiddleware)
+
+# Per-request SQL statement counts, DB time and N+1 detection
+app.add_middleware(QueryStatsMiddleware)
+
+# Prometheus request metrics, exposed on /metrics
+app.add_middleware(MetricsMiddleware)
+
 # Create uploads directory
 uploads_dir = "uploads"
 os.makedirs(uploads_dir, exist_ok=True)
 
-# Mount static files for uploaded content
-app.mount("/uploads", StaticFiles(directory=uploads_dir), name="uploads")
+# Mount static files for uploaded content (with Range support for video seeking);
+# content-addressed uploads first, so they get immutable caching headers (their
+# thumbnails and derivatives are revalidated)
+assets_dir = os.path.join(uploads_dir, "assets")
+os.makedirs(assets_dir, exist_ok=True)
+accel_prefix = settings.ASSET_ACCEL_REDIRECT_PREFIX.rstrip("/")
+app.mount(
+    "/uploads/assets",
+    AssetFiles(
+        directory=assets_dir,
+        cache_control=IMMUTABLE_CACHE_CONTROL,
+        accel_redirect_prefix=accel_prefix and f"{accel_prefix}/assets",
+    ),
+    name="assets",
+)
+# Partial uploads under uploads/tmp are never served
+app.mount(
+    "/uploads",
+    AssetFiles(directory=uploads_dir, hidden=("tmp",), accel_redirect_prefix=accel_prefix),
+    name="uploads",
+)
 
 # Include API router
 app.include_router(api_router, prefix=settings.API_V1_STR)
+profile_sync_handlers(app.routes)
+
+@app.on_event("startup")
+def start_background_jobs():
+    media_processing.start_recovery()
+    analytics_ingest.start()
+
+@app.on_event("shutdown")
+def shutdown_worker_pools():
+    password_pool.shutdown()
+    media_processing.shutdown()
+    analytics_ingest.shutdown()
 
 @app.get("/")
 async def root():
@@ -44,3 +100,8 @@ async def root():
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    body, content_type = render_metrics()
+    return Response(content=body, headers={"Content-Type": content_type})
@@ -1,5 +1,5 @@
 import enum
-from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, Enum, JSON
+from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, Enum, JSON, LargeBinary, Sequence, UniqueConstraint
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.core.database import Base
@@ -15,8 +15,11 @@ class EventType(str, enum.Enum):
 
 class AnalyticsEvent(Base):
     __tablename__ = "analytics_events"
+    # Range partitions by created_at, managed by app.services.analytics_partitions;
+    # the partition key has to be part of the primary key
+    __table_args__ = {"postgresql_partition_by": "RANGE (created_at)"}
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, Sequence("analytics_events_id_seq"), primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
     artifact_id = Column(Integer, ForeignKey("artifacts.id"))
     
@@ -32,8 +35,85 @@ class AnalyticsEvent(Base):
     user_latitude = Column(Float)
     user_longitude = Column(Float)
     
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # When the event happened (client clock, clamped) and when it was written; clients
+    # buffer events offline, so these can be hours apart. Rollups pick up new events
+    # by received_at, then recompute the created_at buckets they fall into.
+    created_at = Column(DateTime(timezone=True), primary_key=True, server_default=func.now(), index=True)
+    received_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
     
     # Relationships
     user = relationship("User", back_populates="analytics_events")
     artifact = relationship("Artifact", back_populates="analytics_events")
+
+class AnalyticsFlushedBatch(Base):
+    """
+    Batches from the Redis event buffer already written, so one replayed after its
+    flusher died between the insert and the Redis cleanup is skipped, not written
+    twice. Kept for REDIS_BATCH_MARKER_RETENTION (see app.services.analytics_ingest).
+    """
+    __tablename__ = "analytics_flushed_batches"
+
+    batch_id = Column(String, primary_key=True)
+    flushed_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+
+class RollupGranularity(str, enum.Enum):
+    HOUR = "hour"
+    DAY = "day"
+
+class AnalyticsRollup(Base):
+    """
+    Aggregates of one artifact's events of one type in one UTC hour or day,
+    maintained by app.services.analytics_rollups. Histograms count events per
+    bucket of DWELL_HISTOGRAM_EDGES / DISTANCE_HISTOGRAM_EDGES.
+    """
+    __tablename__ = "analytics_rollups"
+    __table_args__ = (
+        UniqueConstraint("artifact_id", "granularity", "bucket_start", "event_type", name="uq_analytics_rollups_bucket"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    artifact_id = Column(Integer, ForeignKey("artifacts.id"), nullable=False, index=True)
+    granularity = Column(Enum(RollupGranularity), nullable=False)
+    bucket_start = Column(DateTime(timezone=True), nullable=False, index=True)
+    event_type = Column(Enum(EventType), nullable=False)
+
+    event_count = Column(Integer, nullable=False, default=0)
+    dwell_count = Column(Integer, nullable=False, default=0)  # Events that reported a dwell time
+    dwell_sum = Column(Float, nullable=False, default=0)
+    dwell_histogram = Column(JSON)
+    distance_count = Column(Integer, nullable=False, default=0)
+    distance_sum = Column(Float, nullable=False, default=0)
+    distance_histogram = Column(JSON)
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class AnalyticsRollupState(Base):
+    """How far (by received_at) a rollup job has processed events."""
+    __tablename__ = "analytics_rollup_state"
+
+    name = Column(String, primary_key=True)
+    watermark = Column(DateTime(timezone=True))
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class SketchScope(str, enum.Enum):
+    ARTIFACT = "artifact"
+    CREATOR = "creator"  # All of a creator's artifacts
+    ALL = "all"  # scope_id 0
+
+class VisitorSketch(Base):
+    """
+    HyperLogLog sketch of the distinct visitors (users, or sessions when anonymous)
+    of an artifact, a creator or everything on one UTC day. Updated as events are
+    written; see app.services.unique_visitors.
+    """
+    __tablename__ = "visitor_sketches"
+    __table_args__ = (
+        UniqueConstraint("scope", "scope_id", "bucket_start", name="uq_visitor_sketches_bucket"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    scope = Column(Enum(SketchScope), nullable=False)
+    scope_id = Column(Integer, nullable=False)
+    bucket_start = Column(DateTime(timezone=True), nullable=False)
+    registers = Column(LargeBinary, nullable=False)  # zlib-compressed
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
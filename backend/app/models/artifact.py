@@ -32,6 +32,12 @@ class ArtifactStatus(str, enum.Enum):
     REPORTED = "reported"
     HIDDEN = "hidden"
 
+class ProcessingStatus(str, enum.Enum):
+    PENDING = "pending"
+    PROCESSING = "processing"
+    READY = "ready"
+    FAILED = "failed"
+
 class Artifact(Base):
     __tablename__ = "artifacts"
 
@@ -64,12 +70,19 @@ class Artifact(Base):
     asset_url = Column(String)  # Main asset (model, image, etc.)
     thumbnail_url = Column(String)
     preview_url = Column(String)
+    variants = Column(JSON)  # Copied from the asset: sized/encoded derivatives
     
     # Asset metadata
     file_size_bytes = Column(Integer)
     triangle_count = Column(Integer)  # For 3D models
     texture_resolution = Column(Integer)  # Max texture size
     
+    # Background media processing (thumbnails, derivatives); NULL = nothing to process
+    processing_status = Column(Enum(ProcessingStatus))
+    processing_attempts = Column(Integer, default=0)
+    processing_error = Column(String)
+    processing_heartbeat_at = Column(DateTime(timezone=True))  # Refreshed while a worker processes it
+    
     # Menu-specific data (for menu artifacts)
     menu_data = Column(JSON)  # JSON schema for menu items
     pdf_fallback_url = Column(String)
@@ -0,0 +1,31 @@
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Enum, JSON
+from sqlalchemy.sql import func
+from app.core.database import Base
+from app.models.artifact import AssetType
+
+class Asset(Base):
+    """
+    An uploaded file stored once under its SHA-256. Artifacts reference it through
+    asset_url/thumbnail_url; ref_count tracks how many artifacts do.
+    """
+    __tablename__ = "assets"
+
+    id = Column(Integer, primary_key=True, index=True)
+    sha256 = Column(String(64), unique=True, index=True, nullable=False)
+    asset_type = Column(Enum(AssetType), nullable=False)
+    mime_type = Column(String)
+    size_bytes = Column(BigInteger, nullable=False)
+
+    # Immutable URLs: the content behind them never changes
+    url = Column(String, nullable=False)
+    thumbnail_url = Column(String)
+    preview_url = Column(String)  # Quick-start playback (HLS master playlist for videos)
+    variants = Column(JSON)  # Derivatives rendered from the content, see schemas.AssetVariant
+    # 3D model statistics, filled in by media processing
+    triangle_count = Column(Integer)
+    texture_resolution = Column(Integer)
+
+    ref_count = Column(Integer, default=0, nullable=False)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
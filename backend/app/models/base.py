@@ -4,4 +4,9 @@ from app.core.database import Base
 from app.models.user import User
 from app.models.artifact import Artifact, ArtifactType, AnchorMode
 from app.models.report import Report
-from app.models.analytics import AnalyticsEvent
+from app.models.analytics import (
+    AnalyticsEvent, AnalyticsFlushedBatch, AnalyticsRollup, AnalyticsRollupState, VisitorSketch,
+)
+from app.models.import_job import ImportJob
+from app.models.asset import Asset
+from app.models.upload_session import UploadSession
@@ -0,0 +1,38 @@
+import enum
+from sqlalchemy import Boolean, Column, Integer, String, DateTime, ForeignKey, Enum, JSON
+from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
+from app.core.database import Base
+
+class ImportFormat(str, enum.Enum):
+    CSV = "csv"
+    GEOJSON = "geojson"
+
+class ImportStatus(str, enum.Enum):
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+class ImportJob(Base):
+    __tablename__ = "import_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    source_name = Column(String, nullable=False)
+    format = Column(Enum(ImportFormat), nullable=False)
+    creator_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    publish = Column(Boolean, default=False)
+    status = Column(Enum(ImportStatus), default=ImportStatus.RUNNING)
+    source_sha256 = Column(String)  # Of the source file; a resume must supply the same file
+    
+    # Checkpoint: source records consumed so far, updated in the same
+    # transaction as each loaded batch so a resumed import never duplicates rows
+    position = Column(Integer, default=0)
+    imported_count = Column(Integer, default=0)
+    failed_count = Column(Integer, default=0)
+    errors = Column(JSON)  # First validation errors: [{"record": n, "error": "..."}]
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    
+    # Relationships
+    creator = relationship("User")
@@ -0,0 +1,37 @@
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, ForeignKey, Enum
+from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
+from app.core.database import Base
+from app.models.artifact import AssetType
+
+class UploadSession(Base):
+    """
+    A resumable upload: chunks are appended to a file on disk at upload_offset until
+    it reaches upload_length, then the file is finalized into a content-addressed asset.
+    Direct uploads instead go straight to storage_key and are finalized once stored.
+    """
+    __tablename__ = "upload_sessions"
+
+    # Random UUID: the session URL is the only handle a client needs to resume
+    id = Column(String(36), primary_key=True)
+    creator_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    asset_type = Column(Enum(AssetType), nullable=False)
+    filename = Column(String, nullable=False)
+    mime_type = Column(String)  # Detected from the first chunk
+
+    upload_length = Column(BigInteger, nullable=False)
+    upload_offset = Column(BigInteger, default=0, nullable=False)
+    # Direct uploads: the object the client PUTs to with a presigned URL (no chunks)
+    storage_key = Column(String, unique=True, index=True)
+
+    # Set when finalized; the client then creates the artifact with asset_sha256
+    asset_sha256 = Column(String(64))
+    completed_at = Column(DateTime(timezone=True))
+
+    # Pushed back on every chunk; expired sessions are removed by scripts/gc_assets.py
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    # Relationships
+    creator = relationship("User")
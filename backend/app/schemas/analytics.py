@@ -0,0 +1,86 @@
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel, Field
+from datetime import datetime
+from app.models.analytics import EventType, RollupGranularity
+from app.services.unique_visitors import VisitorPeriod
+
+class AnalyticsEventCreate(BaseModel):
+    event_type: EventType
+    artifact_id: Optional[int] = None
+    session_id: Optional[str] = Field(None, max_length=64)
+    dwell_time_seconds: Optional[float] = Field(None, ge=0, le=86400)
+    distance_meters: Optional[float] = Field(None, ge=0, le=100000)
+    user_latitude: Optional[float] = Field(None, ge=-90, le=90)
+    user_longitude: Optional[float] = Field(None, ge=-180, le=180)
+    metadata: Optional[Dict[str, Any]] = None
+    # When the event happened; defaults to when it was received
+    occurred_at: Optional[datetime] = None
+
+class RejectedEvent(BaseModel):
+    index: int  # Position in the array (line number - 1 for NDJSON)
+    error: str
+
+class AnalyticsIngestResult(BaseModel):
+    accepted: int
+    rejected: List[RejectedEvent] = []
+
+class RollupStats(BaseModel):
+    event_counts: Dict[str, int]  # By event type
+    dwell_count: int
+    dwell_seconds_total: float
+    average_dwell_seconds: Optional[float] = None
+    dwell_histogram: List[int]  # Events per bucket of dwell_histogram_edges
+    distance_count: int
+    average_distance_meters: Optional[float] = None
+    distance_histogram: List[int]
+
+class RollupBucket(RollupStats):
+    bucket_start: datetime
+
+class ArtifactEventTotal(BaseModel):
+    artifact_id: int
+    title: Optional[str] = None
+    event_count: int
+
+class AnalyticsSummary(BaseModel):
+    granularity: RollupGranularity
+    start: datetime
+    end: datetime
+    # Events written after this aren't counted yet
+    rolled_up_until: Optional[datetime] = None
+    dwell_histogram_edges: List[float]  # Lower edges; the last bucket is open-ended
+    distance_histogram_edges: List[float]
+    totals: RollupStats
+    buckets: List[RollupBucket]
+    top_artifacts: List[ArtifactEventTotal] = []
+
+class UniqueVisitorPeriod(BaseModel):
+    period_start: datetime
+    unique_visitors: int
+
+class UniqueVisitors(BaseModel):
+    period: VisitorPeriod
+    start: datetime
+    end: datetime
+    # Relative standard error of every estimate; 95% are within twice this
+    standard_error: float
+    unique_visitors: int  # Over the whole range
+    periods: List[UniqueVisitorPeriod]
+
+class Heatmap(BaseModel):
+    start: datetime
+    end: datetime
+    # Grid: `columns` x `rows` cells from the south-west corner; cell i spans
+    # column i % columns and row i // columns
+    min_latitude: float
+    min_longitude: float
+    cell_size_meters: float
+    cell_latitude_degrees: float
+    cell_longitude_degrees: float
+    columns: int
+    rows: int
+    total_events: int
+    max_count: int
+    # Non-empty cells only, as parallel arrays
+    cells: List[int]
+    counts: List[int]
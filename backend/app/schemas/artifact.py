@@ -1,7 +1,8 @@
 from typing import Optional, List, Dict, Any
 from pydantic import BaseModel, Field, validator
 from datetime import datetime
-from app.models.artifact import ArtifactType, AnchorMode, AssetType, ArtifactStatus
+from app.models.artifact import ArtifactType, AnchorMode, AssetType, ArtifactStatus, ProcessingStatus
+from app.schemas.asset import AssetVariant
 
 class ArtifactBase(BaseModel):
     title: str = Field(..., min_length=1, max_length=200)
@@ -61,9 +62,12 @@ class ArtifactInDBBase(ArtifactBase):
     asset_url: Optional[str] = None
     thumbnail_url: Optional[str] = None
     preview_url: Optional[str] = None
+    variants: Optional[List[AssetVariant]] = None
     file_size_bytes: Optional[int] = None
     triangle_count: Optional[int] = None
     texture_resolution: Optional[int] = None
+    processing_status: Optional[ProcessingStatus] = None
+    processing_error: Optional[str] = None
     menu_data: Optional[Dict[str, Any]] = None
     pdf_fallback_url: Optional[str] = None
     availability_start: Optional[datetime] = None
@@ -86,6 +90,8 @@ class ArtifactWithDistance(Artifact):
     distance_meters: Optional[float] = None
     is_in_range: bool = False
     is_locked: bool = False
+    # The variant to download for this distance and device (the original when there are none)
+    selected_variant: Optional[AssetVariant] = None
 
 class ArtifactSummary(BaseModel):
     id: int
@@ -102,3 +108,23 @@ class ArtifactsNearResponse(BaseModel):
     artifacts: List[ArtifactWithDistance]
     total_count: int
     has_more: bool
+
+class PrefetchEntry(BaseModel):
+    artifact_id: int
+    asset_type: AssetType
+    url: str
+    variant: str  # Name of the selected variant, "original" for the upload itself
+    size_bytes: Optional[int] = None
+    sha256: Optional[str] = None  # Of the asset the variant was derived from
+    thumbnail_url: Optional[str] = None
+    distance_meters: float
+    bearing_degrees: float
+    is_in_range: bool
+
+class PrefetchManifest(BaseModel):
+    # Most likely to be viewed next first; download in this order
+    entries: List[PrefetchEntry]
+    total_bytes: int
+    budget_bytes: int
+    # Candidates left out because they didn't fit in the budget
+    skipped_count: int
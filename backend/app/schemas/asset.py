@@ -0,0 +1,33 @@
+from typing import List, Optional
+from pydantic import BaseModel
+from datetime import datetime
+from app.models.artifact import AssetType
+
+class AssetVariant(BaseModel):
+    """One derivative of an asset, e.g. a 320px WebP of an image."""
+    name: str
+    format: str
+    url: str
+    width: Optional[int] = None
+    height: Optional[int] = None
+    size_bytes: Optional[int] = None
+    triangle_count: Optional[int] = None
+    texture_resolution: Optional[int] = None
+    bitrate: Optional[int] = None  # bits/s, for video renditions
+
+class Asset(BaseModel):
+    sha256: str
+    asset_type: AssetType
+    mime_type: Optional[str] = None
+    size_bytes: int
+    url: str
+    thumbnail_url: Optional[str] = None
+    preview_url: Optional[str] = None
+    variants: Optional[List[AssetVariant]] = None
+    triangle_count: Optional[int] = None
+    texture_resolution: Optional[int] = None
+    ref_count: int
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,21 @@
+from typing import Optional, List, Dict, Any
+from pydantic import BaseModel
+from datetime import datetime
+from app.models.import_job import ImportFormat, ImportStatus
+
+class ImportJob(BaseModel):
+    id: int
+    source_name: str
+    format: ImportFormat
+    creator_id: int
+    publish: bool
+    status: ImportStatus
+    position: int
+    imported_count: int
+    failed_count: int
+    errors: Optional[List[Dict[str, Any]]] = None
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
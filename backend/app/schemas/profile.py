@@ -0,0 +1,7 @@
+from pydantic import BaseModel
+from datetime import datetime
+
+class ProfileInfo(BaseModel):
+    id: str
+    size_bytes: int
+    created_at: datetime
@@ -0,0 +1,31 @@
+from typing import Dict, Optional
+from pydantic import BaseModel, Field
+from datetime import datetime
+from app.models.artifact import AssetType
+
+class UploadSessionCreate(BaseModel):
+    filename: str = Field(..., min_length=1, max_length=255)
+    asset_type: AssetType
+    upload_length: int = Field(..., gt=0, description="Total size of the file in bytes")
+
+class UploadSession(BaseModel):
+    id: str
+    asset_type: AssetType
+    filename: str
+    mime_type: Optional[str] = None
+    upload_length: int
+    upload_offset: int
+    asset_sha256: Optional[str] = None
+    completed_at: Optional[datetime] = None
+    expires_at: datetime
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class DirectUploadSession(UploadSession):
+    # Send the file as the body of a single request to upload_url, with upload_headers
+    upload_url: str
+    upload_method: str = "PUT"
+    upload_headers: Dict[str, str] = {}
+    upload_url_expires_at: datetime
@@ -0,0 +1,398 @@
+import json
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from pydantic import ValidationError
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import engine
+from app.core.metrics import (
+    ANALYTICS_EVENTS_BUFFERED, ANALYTICS_EVENTS_FLUSHED, ANALYTICS_EVENTS_RECEIVED, ANALYTICS_FLUSH_DURATION,
+)
+from app.core.optional import optional_import
+from app.models.analytics import AnalyticsFlushedBatch, EventType
+from app.models.artifact import Artifact
+from app.schemas.analytics import AnalyticsEventCreate
+from app.services.analytics_partitions import ensure_upcoming_partitions, insert_events
+from app.services.unique_visitors import update_sketches
+
+# Seconds a throttled client should wait before resending
+RETRY_AFTER_SECONDS = 2
+MAX_METADATA_BYTES = 2048
+
+REDIS_QUEUE_KEY = "analytics:events"
+# The batch being inserted and its id; left behind by a flusher that died mid-insert,
+# and written by the next one unless the id shows it was committed (AnalyticsFlushedBatch)
+REDIS_FLUSHING_KEY = "analytics:events:flushing"
+REDIS_FLUSHING_ID_KEY = "analytics:events:flushing:id"
+# How long committed batch ids are remembered; a leftover batch is replayed by the
+# next flush of any worker, so this only has to outlast a full outage
+REDIS_BATCH_MARKER_RETENTION = timedelta(days=7)
+REDIS_BATCH_MARKER_PRUNE_SECONDS = 3600
+REDIS_FLUSH_LOCK_KEY = "analytics:events:flush-lock"
+REDIS_FLUSH_LOCK_MS = 30_000
+REDIS_POLL_SECONDS = 0.2
+
+# Append only if the queue stays within its limit (ARGV[1]), all-or-nothing
+_REDIS_PUSH = """
+if redis.call('LLEN', KEYS[1]) + #ARGV - 1 > tonumber(ARGV[1]) then
+  return 0
+end
+redis.call('RPUSH', KEYS[1], unpack(ARGV, 2))
+return 1
+"""
+# Move up to ARGV[1] events from the queue to the flushing list, as batch ARGV[2]
+_REDIS_CLAIM = """
+local items = redis.call('LRANGE', KEYS[1], 0, tonumber(ARGV[1]) - 1)
+if #items > 0 then
+  redis.call('LTRIM', KEYS[1], #items, -1)
+  redis.call('RPUSH', KEYS[2], unpack(items))
+  redis.call('SET', KEYS[3], ARGV[2])
+end
+return items
+"""
+_REDIS_UNLOCK = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+  return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+class BufferFullError(Exception):
+    """More events are waiting to be written than the buffer may hold."""
+
+def _validation_message(error: ValidationError) -> str:
+    first = error.errors()[0]
+    location = ".".join(str(part) for part in first["loc"])
+    return f"{location}: {first['msg']}" if location else first["msg"]
+
+def prepare_events(
+    db: Session, items: List[Any], user_id: Optional[int], first_index: int = 0
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Validate a batch of raw events. Returns the rows to insert and the rejected
+    events with their index; artifact references are checked in one query.
+    """
+    now = datetime.now(timezone.utc)
+    oldest = now - timedelta(hours=settings.ANALYTICS_MAX_EVENT_AGE_HOURS)
+    rows, indexes, rejected = [], [], []
+    for offset, item in enumerate(items):
+        index = first_index + offset
+        try:
+            event = AnalyticsEventCreate.model_validate(item)
+        except ValidationError as e:
+            rejected.append({"index": index, "error": _validation_message(e)})
+            continue
+        occurred_at = event.occurred_at or now
+        if occurred_at.tzinfo is None:
+            occurred_at = occurred_at.replace(tzinfo=timezone.utc)
+        if occurred_at < oldest:
+            rejected.append({"index": index, "error": f"Event older than {settings.ANALYTICS_MAX_EVENT_AGE_HOURS} hours"})
+            continue
+        if event.metadata is not None and len(json.dumps(event.metadata)) > MAX_METADATA_BYTES:
+            rejected.append({"index": index, "error": f"metadata larger than {MAX_METADATA_BYTES} bytes"})
+            continue
+        rows.append({
+            "user_id": user_id,
+            "artifact_id": event.artifact_id,
+            "event_type": event.event_type,
+            "session_id": event.session_id,
+            "dwell_time_seconds": event.dwell_time_seconds,
+            "distance_meters": event.distance_meters,
+            "event_metadata": event.metadata,
+            "user_latitude": event.user_latitude,
+            "user_longitude": event.user_longitude,
+            # Client clocks run ahead too
+            "created_at": min(occurred_at, now),
+            # received_at is left to the database: when the row is written, which is
+            # what the rollup job's watermark relies on
+        })
+        indexes.append(index)
+
+    artifact_ids = {row["artifact_id"] for row in rows if row["artifact_id"] is not None}
+    if artifact_ids:
+        known = set(db.scalars(select(Artifact.id).where(Artifact.id.in_(artifact_ids))))
+        if len(known) < len(artifact_ids):
+            kept = []
+            for row, index in zip(rows, indexes):
+                if row["artifact_id"] is None or row["artifact_id"] in known:
+                    kept.append(row)
+                else:
+                    rejected.append({"index": index, "error": "Unknown artifact"})
+            rows = kept
+            rejected.sort(key=lambda r: r["index"])
+    return rows, rejected
+
+def insert_rows(rows: List[Dict[str, Any]], batch_id: Optional[str] = None) -> bool:
+    """
+    Write a batch with one multi-row INSERT (batched by SQLAlchemy's insertmanyvalues)
+    and add its visitors to the unique-visitor sketches, in one transaction. A batch
+    with an id is written at most once: a replay returns False without writing.
+    """
+    with ANALYTICS_FLUSH_DURATION.time():
+        with engine.begin() as connection:
+            if batch_id is not None:
+                flushed = connection.execute(
+                    select(AnalyticsFlushedBatch.batch_id).where(AnalyticsFlushedBatch.batch_id == batch_id)
+                ).first()
+                if flushed:
+                    return False
+                connection.execute(insert(AnalyticsFlushedBatch).values(batch_id=batch_id))
+            insert_events(connection, rows)
+            update_sketches(connection, rows)
+    ANALYTICS_EVENTS_FLUSHED.inc(len(rows))
+    return True
+
+def prepare_partitions() -> None:
+    """Create the partitions the coming events go to before a flush needs them (flusher startup)."""
+    try:
+        with engine.begin() as connection:
+            ensure_upcoming_partitions(connection)
+    except Exception as e:
+        print(f"Creating analytics partitions failed: {e}")
+
+class MemoryEventBuffer:
+    """
+    Per-process buffer drained by a background thread every ANALYTICS_FLUSH_BATCH_SIZE
+    events or ANALYTICS_FLUSH_INTERVAL_SECONDS. A crashed worker loses what it hadn't
+    written yet: the last flush interval's events, never more than
+    ANALYTICS_BUFFER_MAX_EVENTS (only reached while the database is failing).
+    """
+
+    def __init__(self) -> None:
+        self._rows: deque = deque()
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = False
+
+    def add(self, rows: List[Dict[str, Any]]) -> None:
+        with self._condition:
+            if len(self._rows) + len(rows) > settings.ANALYTICS_BUFFER_MAX_EVENTS:
+                raise BufferFullError()
+            self._rows.extend(rows)
+            ANALYTICS_EVENTS_BUFFERED.inc(len(rows))
+            self._start()
+            if len(self._rows) >= settings.ANALYTICS_FLUSH_BATCH_SIZE:
+                self._condition.notify()
+
+    def start(self) -> None:
+        """Start the flusher thread (otherwise started by the first add)."""
+        with self._condition:
+            self._start()
+
+    def _start(self) -> None:
+        if self._thread is None and not self._stopped:
+            self._thread = threading.Thread(target=self._run, name="analytics-flush", daemon=True)
+            self._thread.start()
+
+    def _take(self) -> List[Dict[str, Any]]:
+        with self._condition:
+            count = min(len(self._rows), settings.ANALYTICS_FLUSH_BATCH_SIZE)
+            return [self._rows.popleft() for _ in range(count)]
+
+    def flush(self) -> int:
+        """Write everything buffered so far. Returns the number of events written."""
+        written = 0
+        while True:
+            batch = self._take()
+            if not batch:
+                return written
+            try:
+                insert_rows(batch)
+            except Exception:
+                # Keep them (in order) for the next attempt
+                with self._condition:
+                    self._rows.extendleft(reversed(batch))
+                raise
+            ANALYTICS_EVENTS_BUFFERED.dec(len(batch))
+            written += len(batch)
+
+    def _run(self) -> None:
+        prepare_partitions()
+        while True:
+            with self._condition:
+                self._condition.wait_for(
+                    lambda: self._stopped or len(self._rows) >= settings.ANALYTICS_FLUSH_BATCH_SIZE,
+                    timeout=settings.ANALYTICS_FLUSH_INTERVAL_SECONDS,
+                )
+                if self._stopped:
+                    return
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Analytics flush failed, {len(self._rows)} events buffered: {e}")
+                time.sleep(settings.ANALYTICS_FLUSH_INTERVAL_SECONDS)
+
+    def stop(self) -> None:
+        """Stop the flusher thread and write what is left."""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+        self.flush()
+
+def _to_json(row: Dict[str, Any]) -> str:
+    return json.dumps({
+        **row,
+        "event_type": row["event_type"].name,
+        "created_at": row["created_at"].isoformat(),
+    })
+
+def _from_json(data: bytes) -> Dict[str, Any]:
+    row = json.loads(data)
+    row["event_type"] = EventType[row["event_type"]]
+    row["created_at"] = datetime.fromisoformat(row["created_at"])
+    return row
+
+class RedisEventBuffer:
+    """
+    Buffer shared by all workers in a Redis list (REDIS_URL), so a crashed worker
+    loses nothing it accepted. Every worker runs a flusher from startup; a lock lets
+    one at a time claim batches. A batch interrupted mid-insert is written again by
+    the next flush, and a batch interrupted after its insert committed is recognised
+    by its id and dropped, so replays don't inflate rollup counts.
+    """
+
+    def __init__(self) -> None:
+        redis = optional_import("redis")
+        if redis is None:
+            raise RuntimeError("ANALYTICS_BUFFER_BACKEND=redis requires the redis package")
+        self.client = redis.Redis.from_url(settings.REDIS_URL)
+        self._push = self.client.register_script(_REDIS_PUSH)
+        self._claim = self.client.register_script(_REDIS_CLAIM)
+        self._unlock = self.client.register_script(_REDIS_UNLOCK)
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self._start_lock = threading.Lock()
+        self._pruned_at: Optional[float] = None
+
+    def add(self, rows: List[Dict[str, Any]]) -> None:
+        if not self._push(keys=[REDIS_QUEUE_KEY], args=[settings.ANALYTICS_BUFFER_MAX_EVENTS, *map(_to_json, rows)]):
+            raise BufferFullError()
+        self.start()
+
+    def start(self) -> None:
+        """Start the flusher thread, which also writes what other (crashed) workers left queued."""
+        with self._start_lock:
+            if self._thread is None and not self._stopped.is_set():
+                self._thread = threading.Thread(target=self._run, name="analytics-flush", daemon=True)
+                self._thread.start()
+
+    def flush(self) -> int:
+        """Write every queued event, unless another worker is flushing. Returns the number written."""
+        token = uuid.uuid4().hex
+        if not self.client.set(REDIS_FLUSH_LOCK_KEY, token, nx=True, px=REDIS_FLUSH_LOCK_MS):
+            return 0
+        written = 0
+        try:
+            # A batch left behind by a flusher that died
+            batch = self.client.lrange(REDIS_FLUSHING_KEY, 0, -1)
+            batch_id = (self.client.get(REDIS_FLUSHING_ID_KEY) or uuid.uuid4().hex.encode()).decode()
+            while batch or self.client.llen(REDIS_QUEUE_KEY):
+                if not batch:
+                    batch_id = uuid.uuid4().hex
+                    batch = self._claim(
+                        keys=[REDIS_QUEUE_KEY, REDIS_FLUSHING_KEY, REDIS_FLUSHING_ID_KEY],
+                        args=[settings.ANALYTICS_FLUSH_BATCH_SIZE, batch_id],
+                    )
+                if insert_rows([_from_json(item) for item in batch], batch_id):
+                    written += len(batch)
+                self.client.delete(REDIS_FLUSHING_KEY, REDIS_FLUSHING_ID_KEY)
+                self.client.pexpire(REDIS_FLUSH_LOCK_KEY, REDIS_FLUSH_LOCK_MS)
+                batch = []
+            self._prune_batch_markers()
+        finally:
+            self._unlock(keys=[REDIS_FLUSH_LOCK_KEY], args=[token])
+        return written
+
+    def _prune_batch_markers(self) -> None:
+        """Forget committed batch ids past REDIS_BATCH_MARKER_RETENTION, now and then."""
+        if self._pruned_at is not None and time.monotonic() - self._pruned_at < REDIS_BATCH_MARKER_PRUNE_SECONDS:
+            return
+        with engine.begin() as connection:
+            connection.execute(delete(AnalyticsFlushedBatch).where(
+                AnalyticsFlushedBatch.flushed_at < datetime.now(timezone.utc) - REDIS_BATCH_MARKER_RETENTION
+            ))
+        self._pruned_at = time.monotonic()
+
+    def _run(self) -> None:
+        prepare_partitions()
+        last_flush = time.monotonic()
+        while not self._stopped.wait(REDIS_POLL_SECONDS):
+            try:
+                due = time.monotonic() - last_flush >= settings.ANALYTICS_FLUSH_INTERVAL_SECONDS
+                if due or self.client.llen(REDIS_QUEUE_KEY) >= settings.ANALYTICS_FLUSH_BATCH_SIZE:
+                    self.flush()
+                    last_flush = time.monotonic()
+            except Exception as e:
+                print(f"Analytics flush failed: {e}")
+                self._stopped.wait(settings.ANALYTICS_FLUSH_INTERVAL_SECONDS)
+
+    def stop(self) -> None:
+        """Stop the flusher thread and write what is queued (unless another worker is flushing)."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+        self.flush()
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+def get_event_buffer():
+    """This process's buffer for ANALYTICS_BUFFER_BACKEND ("memory" or "redis")."""
+    global _buffer
+    with _buffer_lock:
+        if _buffer is None:
+            _buffer = RedisEventBuffer() if settings.ANALYTICS_BUFFER_BACKEND == "redis" else MemoryEventBuffer()
+        return _buffer
+
+def ingest_events(
+    db: Session, items: List[Any], user_id: Optional[int], first_index: int = 0
+) -> Tuple[int, List[Dict[str, Any]]]:
+    """
+    Validate and buffer a batch of events. Returns (accepted, rejected). Raises a 503
+    when the buffer is full, in which case none of the batch was accepted.
+    """
+    rows, rejected = prepare_events(db, items, user_id, first_index)
+    ANALYTICS_EVENTS_RECEIVED.labels("rejected").inc(len(rejected))
+    if rows:
+        try:
+            if settings.ANALYTICS_BUFFER_BACKEND == "inline":
+                insert_rows(rows)
+            else:
+                get_event_buffer().add(rows)
+        except BufferFullError:
+            ANALYTICS_EVENTS_RECEIVED.labels("throttled").inc(len(rows))
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Analytics buffer full, please retry shortly",
+                headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+            )
+        ANALYTICS_EVENTS_RECEIVED.labels("accepted").inc(len(rows))
+    return len(rows), rejected
+
+def flush_events() -> int:
+    """Write buffered events now (scripts, tests). Returns the number written."""
+    if settings.ANALYTICS_BUFFER_BACKEND == "inline":
+        return 0
+    return get_event_buffer().flush()
+
+def start() -> None:
+    """Start this process's flusher; call once the app has started."""
+    if settings.ANALYTICS_BUFFER_BACKEND != "inline":
+        get_event_buffer().start()
+
+def shutdown() -> None:
+    global _buffer
+    with _buffer_lock:
+        if _buffer is not None:
+            _buffer.stop()
+            _buffer = None
@@ -0,0 +1,360 @@
+import json
+import os
+import shutil
+from datetime import datetime, timedelta, timezone
+from itertools import groupby
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from sqlalchemy import (
+    Column, Index, Integer, MetaData, Table, func, inspect, insert, select, text, union_all, update,
+)
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import FromClause
+
+from app.core.config import settings
+from app.core.optional import optional_import
+from app.models.analytics import AnalyticsEvent, EventType
+
+# analytics_events is split by created_at into one partition per
+# ANALYTICS_PARTITION_PERIOD (day, week or month), named analytics_events_pYYYYMMDD
+# after the period's first day (UTC). On PostgreSQL they are native range
+# partitions of analytics_events, so writes and reads go through the parent and
+# queries filtered on created_at only scan the matching partitions. On SQLite they
+# are plain tables: insert_events() routes rows to them and events_table() unions
+# the ones a query needs (with analytics_events itself, which keeps older rows).
+# Event ids are unique across partitions: PostgreSQL's come from one sequence, and
+# on SQLite insert_events() hands them out from the analytics_events_ids counter.
+#
+# Partitions older than ANALYTICS_RETENTION_DAYS are archived to compressed NumPy
+# column files (ANALYTICS_ARCHIVE_DIR/<partition>/part-NNNNN.npz) and dropped;
+# iter_archive() reads them back for the rollup jobs.
+
+PARTITION_PREFIX = "analytics_events_p"
+ARCHIVE_CHUNK_ROWS = 1_000_000
+EVENT_TYPE_NAMES = [event_type.name for event_type in EventType]
+
+Bind = Union[Session, Connection, Engine]
+
+_table = AnalyticsEvent.__table__
+_sqlite_metadata = MetaData()
+_created: set = set()
+
+# SQLite's stand-in for analytics_events_id_seq: one row holding the last id handed out
+_sqlite_ids = Table(
+    "analytics_events_ids", _sqlite_metadata,
+    Column("id", Integer, primary_key=True),
+    Column("last_id", Integer, nullable=False),
+)
+
+def _utc(value: datetime) -> datetime:
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+def period_start(moment: datetime) -> datetime:
+    """First instant of the partition period containing `moment`."""
+    day = _utc(moment).replace(hour=0, minute=0, second=0, microsecond=0)
+    if settings.ANALYTICS_PARTITION_PERIOD == "month":
+        return day.replace(day=1)
+    if settings.ANALYTICS_PARTITION_PERIOD == "week":
+        return day - timedelta(days=day.weekday())
+    return day
+
+def next_period(start: datetime) -> datetime:
+    if settings.ANALYTICS_PARTITION_PERIOD == "month":
+        return (start + timedelta(days=32)).replace(day=1)
+    if settings.ANALYTICS_PARTITION_PERIOD == "week":
+        return start + timedelta(days=7)
+    return start + timedelta(days=1)
+
+def partition_name(start: datetime) -> str:
+    return f"{PARTITION_PREFIX}{start:%Y%m%d}"
+
+def _partition_start(name: str) -> Optional[datetime]:
+    try:
+        return datetime.strptime(name[len(PARTITION_PREFIX):], "%Y%m%d").replace(tzinfo=timezone.utc)
+    except ValueError:
+        return None
+
+def _connection(bind: Bind) -> Union[Connection, Engine]:
+    return bind.connection() if isinstance(bind, Session) else bind
+
+def _is_postgresql(bind: Bind) -> bool:
+    return _connection(bind).dialect.name == "postgresql"
+
+def _sqlite_table(name: str) -> Table:
+    """
+    A SQLite period table with analytics_events' columns and no foreign keys. Its ids
+    come from _reserve_ids(), not its own rowids, so they don't repeat across tables.
+    """
+    if name in _sqlite_metadata.tables:
+        return _sqlite_metadata.tables[name]
+    return Table(
+        name, _sqlite_metadata,
+        *(
+            Column(
+                column.name, column.type, primary_key=column.name == "id", nullable=column.nullable,
+                server_default=func.now() if column.server_default is not None else None,
+            )
+            for column in _table.columns
+        ),
+        Index(f"ix_{name}_created_at", "created_at"),
+        Index(f"ix_{name}_received_at", "received_at"),
+    )
+
+def list_partitions(bind: Bind) -> List[Tuple[datetime, str]]:
+    """(period start, table name) of every partition, oldest first."""
+    connection = _connection(bind)
+    if _is_postgresql(connection):
+        names = connection.execute(text(
+            "SELECT child.relname FROM pg_inherits"
+            " JOIN pg_class child ON child.oid = pg_inherits.inhrelid"
+            " JOIN pg_class parent ON parent.oid = pg_inherits.inhparent"
+            " WHERE parent.relname = :parent"
+        ), {"parent": _table.name}).scalars().all()
+    else:
+        names = [name for name in inspect(connection).get_table_names() if name.startswith(PARTITION_PREFIX)]
+    partitions = [(_partition_start(name), name) for name in names]
+    return sorted((start, name) for start, name in partitions if start is not None)
+
+def ensure_partitions(connection: Connection, start: datetime, end: datetime) -> None:
+    """Create the partitions covering [start, end] that don't exist yet."""
+    period = period_start(start)
+    while period <= _utc(end):
+        name = partition_name(period)
+        if name not in _created:
+            if _is_postgresql(connection):
+                connection.execute(text(
+                    f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {_table.name}"
+                    f" FOR VALUES FROM ('{period.isoformat()}') TO ('{next_period(period).isoformat()}')"
+                ))
+            else:
+                _sqlite_table(name).create(connection, checkfirst=True)
+            _created.add(name)
+        period = next_period(period)
+
+def ensure_upcoming_partitions(connection: Connection, ahead: int = 1) -> datetime:
+    """
+    Create the current period's partition and the next `ahead` ones, so writes don't
+    have to (creating a PostgreSQL partition locks out every query on the table).
+    Returns the end of the last one.
+    """
+    now = datetime.now(timezone.utc)
+    last = period_start(now)
+    for _ in range(ahead):
+        last = next_period(last)
+    ensure_partitions(connection, now, last)
+    return next_period(last)
+
+def _reserve_ids(connection: Connection, count: int) -> int:
+    """First of `count` consecutive event ids from the counter the SQLite period tables share."""
+    if _sqlite_ids.name not in _created:
+        _sqlite_ids.create(connection, checkfirst=True)
+        _created.add(_sqlite_ids.name)
+    if connection.scalar(select(_sqlite_ids.c.last_id)) is None:
+        # Start after every id already stored, in analytics_events or any period table
+        tables = [_table] + [_sqlite_table(name) for _, name in list_partitions(connection)]
+        last_id = max(connection.scalar(select(func.max(table.c.id))) or 0 for table in tables)
+        connection.execute(insert(_sqlite_ids).prefix_with("OR IGNORE"), {"id": 1, "last_id": last_id})
+    last_id = connection.scalar(
+        update(_sqlite_ids).values(last_id=_sqlite_ids.c.last_id + count).returning(_sqlite_ids.c.last_id)
+    )
+    return last_id - count + 1
+
+def insert_events(connection: Connection, rows: List[Dict[str, Any]]) -> None:
+    """Insert event rows (multi-row INSERTs), creating the partitions they need."""
+    if not rows:
+        return
+    if _is_postgresql(connection):
+        created = [row["created_at"] for row in rows]
+        ensure_partitions(connection, min(created), max(created))
+        connection.execute(insert(_table), rows)
+        return
+    first_id = _reserve_ids(connection, len(rows))
+    rows = [dict(row, id=first_id + offset) for offset, row in enumerate(rows)]
+    by_period = sorted(rows, key=lambda row: period_start(row["created_at"]))
+    for period, period_rows in groupby(by_period, key=lambda row: period_start(row["created_at"])):
+        ensure_partitions(connection, period, period)
+        connection.execute(insert(_sqlite_table(partition_name(period))), list(period_rows))
+
+def events_table(bind: Bind, start: Optional[datetime] = None, end: Optional[datetime] = None) -> FromClause:
+    """
+    What to select events from when querying created_at within [start, end): the
+    partitioned table on PostgreSQL, the union of the period tables involved on SQLite.
+    """
+    if _is_postgresql(bind):
+        return _table
+    tables = [_table]
+    for period, name in list_partitions(bind):
+        if (start is None or next_period(period) > _utc(start)) and (end is None or period < _utc(end)):
+            tables.append(_sqlite_table(name))
+    if len(tables) == 1:
+        return _table
+    columns = [column.name for column in _table.columns]
+    return union_all(*(select(*(table.c[name] for name in columns)) for table in tables)).subquery(_table.name)
+
+def delete_events(connection: Connection, condition) -> None:
+    """Delete matching events; `condition(table)` builds the WHERE clause for a table."""
+    tables = [_table]
+    if not _is_postgresql(connection):
+        tables += [_sqlite_table(name) for _, name in list_partitions(connection)]
+    for table in tables:
+        connection.execute(table.delete().where(condition(table)))
+
+def _columns(rows: List[Any]) -> Dict[str, Any]:
+    """Event rows as NumPy columns: nulls are -1 (ids), NaN (floats), NaT or ''."""
+    np = optional_import("numpy")
+
+    def ids(name):
+        return np.array([-1 if row[name] is None else row[name] for row in rows], dtype=np.int64)
+
+    def floats(name):
+        return np.array([np.nan if row[name] is None else row[name] for row in rows], dtype=np.float64)
+
+    def times(name):
+        return np.array(
+            [np.datetime64("NaT") if row[name] is None else np.datetime64(_utc(row[name]).replace(tzinfo=None), "us")
+             for row in rows],
+            dtype="datetime64[us]",
+        )
+
+    return {
+        "id": ids("id"),
+        "user_id": ids("user_id"),
+        "artifact_id": ids("artifact_id"),
+        "event_type": np.array([EVENT_TYPE_NAMES.index(row["event_type"].name) for row in rows], dtype=np.uint8),
+        "event_type_names": np.array(EVENT_TYPE_NAMES),
+        "session_id": np.array([row["session_id"] or "" for row in rows], dtype=str),
+        "dwell_time_seconds": floats("dwell_time_seconds"),
+        "distance_meters": floats("distance_meters"),
+        "event_metadata": np.array(
+            ["" if row["event_metadata"] is None else json.dumps(row["event_metadata"]) for row in rows], dtype=str
+        ),
+        "user_latitude": floats("user_latitude"),
+        "user_longitude": floats("user_longitude"),
+        "created_at": times("created_at"),
+        "received_at": times("received_at"),
+    }
+
+def archive_partition(db: Session, start: datetime, name: str, archive_dir: str) -> int:
+    """Write a partition's events to archive_dir/<name>/. Returns the number archived."""
+    np = optional_import("numpy")
+    connection = db.connection()
+    if _is_postgresql(connection):
+        # Filtering the parent on the partition's range reads only that partition
+        query = select(_table).where(_table.c.created_at >= start, _table.c.created_at < next_period(start))
+    else:
+        query = select(_sqlite_table(name))
+
+    target = os.path.join(archive_dir, name)
+    partial = f"{target}.partial"
+    shutil.rmtree(partial, ignore_errors=True)
+    os.makedirs(partial)
+    archived = 0
+    result = connection.execute(query.execution_options(yield_per=ARCHIVE_CHUNK_ROWS)).mappings()
+    for number, chunk in enumerate(result.partitions()):
+        np.savez_compressed(os.path.join(partial, f"part-{number:05d}.npz"), **_columns(chunk))
+        archived += len(chunk)
+    # Only a complete archive gets the partition's name
+    shutil.rmtree(target, ignore_errors=True)
+    os.replace(partial, target)
+    return archived
+
+def _drop_partition(db: Session, name: str) -> None:
+    # Dropping a whole partition is a catalog change, not a DELETE of its rows
+    db.connection().execute(text(f"DROP TABLE {name}"))
+    if name in _sqlite_metadata.tables:
+        _sqlite_metadata.remove(_sqlite_metadata.tables[name])
+    _created.discard(name)
+
+def expire_partitions(
+    db: Session,
+    rolled_up_until: Optional[datetime],
+    retention_days: Optional[int] = None,
+    archive_dir: Optional[str] = None,
+    dry_run: bool = False,
+) -> List[Tuple[str, int]]:
+    """
+    Archive and drop the partitions whose whole period is older than retention_days,
+    once the rollups have processed every event they can still receive. Returns
+    (name, events archived) per partition.
+    """
+    retention_days = settings.ANALYTICS_RETENTION_DAYS if retention_days is None else retention_days
+    archive_dir = archive_dir or settings.ANALYTICS_ARCHIVE_DIR
+    cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days)
+    late_events = timedelta(hours=settings.ANALYTICS_MAX_EVENT_AGE_HOURS)
+    expired = []
+    for start, name in list_partitions(db):
+        end = next_period(start)
+        if end > cutoff:
+            break
+        if rolled_up_until is None or end + late_events > _utc(rolled_up_until):
+            continue
+        if dry_run:
+            expired.append((name, 0))
+            continue
+        expected = db.scalar(select(func.count()).select_from(text(name)))
+        archived = archive_partition(db, start, name, archive_dir)
+        if archived != expected:
+            raise RuntimeError(f"Archived {archived} of {expected} events from {name}; not dropping it")
+        _drop_partition(db, name)
+        db.commit()
+        expired.append((name, archived))
+    return expired
+
+def iter_archive(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    archive_dir: Optional[str] = None,
+) -> Iterator[Dict[str, Any]]:
+    """Archived events created within [start, end), as dicts of NumPy columns (one per chunk file)."""
+    np = optional_import("numpy")
+    archive_dir = archive_dir or settings.ANALYTICS_ARCHIVE_DIR
+    if not os.path.isdir(archive_dir):
+        return
+    for name in sorted(os.listdir(archive_dir)):
+        period = _partition_start(name)
+        if period is None or (end is not None and period >= _utc(end)):
+            continue
+        if start is not None and next_period(period) <= _utc(start):
+            continue
+        directory = os.path.join(archive_dir, name)
+        for part in sorted(os.listdir(directory)):
+            with np.load(os.path.join(directory, part), allow_pickle=False) as data:
+                columns = {key: data[key] for key in data.files}
+            keep = np.ones(len(columns["id"]), dtype=bool)
+            if start is not None:
+                keep &= columns["created_at"] >= np.datetime64(_utc(start).replace(tzinfo=None), "us")
+            if end is not None:
+                keep &= columns["created_at"] < np.datetime64(_utc(end).replace(tzinfo=None), "us")
+            yield {key: value if key == "event_type_names" else value[keep] for key, value in columns.items()}
+
+def archived_rows(columns: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """An archive chunk's events as row dicts, like the ones insert_events() takes."""
+    np = optional_import("numpy")
+    names = [str(name) for name in columns["event_type_names"]]
+    for i in range(len(columns["id"])):
+        def value(key):
+            item = columns[key][i]
+            if isinstance(item, np.floating):
+                return None if np.isnan(item) else float(item)
+            if isinstance(item, np.integer):
+                return None if item < 0 else int(item)
+            if isinstance(item, np.datetime64):
+                return None if np.isnat(item) else item.astype(datetime).replace(tzinfo=timezone.utc)
+            return str(item) or None
+
+        metadata = value("event_metadata")
+        yield {
+            "id": value("id"),
+            "user_id": value("user_id"),
+            "artifact_id": value("artifact_id"),
+            "event_type": EventType[names[columns["event_type"][i]]],
+            "session_id": value("session_id"),
+            "dwell_time_seconds": value("dwell_time_seconds"),
+            "distance_meters": value("distance_meters"),
+            "event_metadata": json.loads(metadata) if metadata else None,
+            "user_latitude": value("user_latitude"),
+            "user_longitude": value("user_longitude"),
+            "created_at": value("created_at"),
+            "received_at": value("received_at"),
+        }
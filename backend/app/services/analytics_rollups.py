@@ -0,0 +1,333 @@
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import and_, case, delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.optional import optional_import
+from app.models.analytics import (
+    AnalyticsRollup, AnalyticsRollupState, EventType, RollupGranularity,
+)
+from app.models.artifact import Artifact
+from app.services.analytics_partitions import events_table, iter_archive
+
+# Rollups are recomputed, not incremented: every run finds the (artifact, hour)
+# buckets that received events since the last run - late events included, since
+# they are found by received_at but bucketed by created_at - and rebuilds those
+# hours from the raw events, then the days containing them from the hours. That
+# makes runs idempotent, so overlapping windows and retries never double count.
+
+ROLLUP_STATE_NAME = "rollups"
+
+# Lower bucket edges; the last bucket is open-ended
+DWELL_HISTOGRAM_EDGES = [0, 5, 15, 30, 60, 120, 300, 600]  # Seconds
+DISTANCE_HISTOGRAM_EDGES = [0, 5, 10, 25, 50, 100, 250, 500, 1000]  # Meters
+
+GRANULARITY_STEP = {RollupGranularity.HOUR: timedelta(hours=1), RollupGranularity.DAY: timedelta(days=1)}
+MAX_SUMMARY_BUCKETS = 2000
+
+def _as_utc(value: Any) -> datetime:
+    # PostgreSQL returns naive UTC timestamps for the truncated buckets, SQLite strings
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+def _hour_of(db: Session, column):
+    if db.get_bind().dialect.name == "postgresql":
+        return func.date_trunc("hour", func.timezone("UTC", column))
+    return func.strftime("%Y-%m-%d %H:00:00", column)
+
+def _histogram_columns(column, edges: List[float], prefix: str) -> List[Any]:
+    columns = []
+    for i, low in enumerate(edges):
+        condition = column >= low if i == len(edges) - 1 else and_(column >= low, column < edges[i + 1])
+        columns.append(func.sum(case((condition, 1), else_=0)).label(f"{prefix}{i}"))
+    return columns
+
+def _rollup_hour(db: Session, hour: datetime, artifact_ids: Set[int]) -> None:
+    """Rebuild these artifacts' hourly rollups for `hour` from the raw events."""
+    e = events_table(db, hour, hour + timedelta(hours=1)).c
+    rows = db.execute(
+        select(
+            e.artifact_id, e.event_type, func.count().label("event_count"),
+            func.count(e.dwell_time_seconds).label("dwell_count"),
+            func.coalesce(func.sum(e.dwell_time_seconds), 0).label("dwell_sum"),
+            func.count(e.distance_meters).label("distance_count"),
+            func.coalesce(func.sum(e.distance_meters), 0).label("distance_sum"),
+            *_histogram_columns(e.dwell_time_seconds, DWELL_HISTOGRAM_EDGES, "dwell"),
+            *_histogram_columns(e.distance_meters, DISTANCE_HISTOGRAM_EDGES, "distance"),
+        )
+        .where(e.artifact_id.in_(list(artifact_ids)), e.created_at >= hour, e.created_at < hour + timedelta(hours=1))
+        .group_by(e.artifact_id, e.event_type)
+    ).mappings().all()
+    _replace_hour(db, hour, artifact_ids, [
+        {
+            "artifact_id": row["artifact_id"],
+            "event_type": row["event_type"],
+            "event_count": row["event_count"],
+            "dwell_count": row["dwell_count"],
+            "dwell_sum": row["dwell_sum"],
+            "dwell_histogram": [row[f"dwell{i}"] or 0 for i in range(len(DWELL_HISTOGRAM_EDGES))],
+            "distance_count": row["distance_count"],
+            "distance_sum": row["distance_sum"],
+            "distance_histogram": [row[f"distance{i}"] or 0 for i in range(len(DISTANCE_HISTOGRAM_EDGES))],
+        }
+        for row in rows
+    ])
+
+def _replace_hour(db: Session, hour: datetime, artifact_ids: Set[int], rows: List[Dict[str, Any]]) -> None:
+    db.execute(delete(AnalyticsRollup).where(
+        AnalyticsRollup.granularity == RollupGranularity.HOUR,
+        AnalyticsRollup.bucket_start == hour,
+        AnalyticsRollup.artifact_id.in_(list(artifact_ids)),
+    ))
+    if rows:
+        db.execute(insert(AnalyticsRollup), [
+            {"granularity": RollupGranularity.HOUR, "bucket_start": hour, **row} for row in rows
+        ])
+
+def _add(totals: Dict[str, Any], rollup: AnalyticsRollup) -> None:
+    totals["event_count"] += rollup.event_count
+    totals["dwell_count"] += rollup.dwell_count
+    totals["dwell_sum"] += rollup.dwell_sum
+    totals["distance_count"] += rollup.distance_count
+    totals["distance_sum"] += rollup.distance_sum
+    for key in ("dwell_histogram", "distance_histogram"):
+        for i, count in enumerate(getattr(rollup, key) or []):
+            totals[key][i] += count
+
+def _empty_totals() -> Dict[str, Any]:
+    return {
+        "event_count": 0, "dwell_count": 0, "dwell_sum": 0.0, "distance_count": 0, "distance_sum": 0.0,
+        "dwell_histogram": [0] * len(DWELL_HISTOGRAM_EDGES),
+        "distance_histogram": [0] * len(DISTANCE_HISTOGRAM_EDGES),
+    }
+
+def _rollup_day(db: Session, day: datetime, artifact_ids: Set[int]) -> None:
+    """Rebuild these artifacts' daily rollups for `day` from its hourly rollups."""
+    totals: Dict[Tuple[int, EventType], Dict[str, Any]] = defaultdict(_empty_totals)
+    for rollup in db.scalars(select(AnalyticsRollup).where(
+        AnalyticsRollup.granularity == RollupGranularity.HOUR,
+        AnalyticsRollup.bucket_start >= day,
+        AnalyticsRollup.bucket_start < day + timedelta(days=1),
+        AnalyticsRollup.artifact_id.in_(list(artifact_ids)),
+    )):
+        _add(totals[(rollup.artifact_id, rollup.event_type)], rollup)
+
+    db.execute(delete(AnalyticsRollup).where(
+        AnalyticsRollup.granularity == RollupGranularity.DAY,
+        AnalyticsRollup.bucket_start == day,
+        AnalyticsRollup.artifact_id.in_(list(artifact_ids)),
+    ))
+    if totals:
+        db.execute(insert(AnalyticsRollup), [
+            {"artifact_id": artifact_id, "granularity": RollupGranularity.DAY, "bucket_start": day,
+             "event_type": event_type, **values}
+            for (artifact_id, event_type), values in totals.items()
+        ])
+
+def update_rollups(db: Session, rebuild: bool = False) -> Tuple[int, int]:
+    """
+    Bring the rollups up to date with the events written since the last run (every
+    bucket that still has events with `rebuild`). Returns the number of hourly and
+    daily artifact buckets rebuilt.
+    """
+    state = db.scalars(
+        select(AnalyticsRollupState).where(AnalyticsRollupState.name == ROLLUP_STATE_NAME).with_for_update()
+    ).first()
+    if state is None:
+        state = AnalyticsRollupState(name=ROLLUP_STATE_NAME)
+        db.add(state)
+    # received_at comes from the database's clock; the overlap also covers skew
+    upper = datetime.now(timezone.utc)
+
+    if state.watermark is not None and not rebuild:
+        since = state.watermark - timedelta(minutes=settings.ANALYTICS_ROLLUP_OVERLAP_MINUTES)
+        # Events written since then were created at most ANALYTICS_MAX_EVENT_AGE_HOURS
+        # earlier, which limits the partitions to scan
+        created_since = since - timedelta(hours=settings.ANALYTICS_MAX_EVENT_AGE_HOURS)
+        e = events_table(db, created_since).c
+        query = select(e.artifact_id, _hour_of(db, e.created_at)).where(
+            e.received_at > since, e.created_at >= created_since
+        )
+    else:
+        e = events_table(db).c
+        query = select(e.artifact_id, _hour_of(db, e.created_at))
+    query = query.where(e.artifact_id.isnot(None), e.received_at <= upper).distinct()
+
+    hours: Dict[datetime, Set[int]] = defaultdict(set)
+    for artifact_id, bucket in db.execute(query):
+        hours[_as_utc(bucket)].add(artifact_id)
+
+    days: Dict[datetime, Set[int]] = defaultdict(set)
+    for bucket, artifact_ids in sorted(hours.items()):
+        _rollup_hour(db, bucket, artifact_ids)
+        days[bucket.replace(hour=0)].update(artifact_ids)
+    for bucket, artifact_ids in sorted(days.items()):
+        _rollup_day(db, bucket, artifact_ids)
+
+    state.watermark = upper
+    db.commit()
+    return sum(len(ids) for ids in hours.values()), sum(len(ids) for ids in days.values())
+
+def _histogram_counts(np, groups, values, valid, edges: List[float], size: int) -> List[Any]:
+    bins = np.searchsorted(edges, values, side="right") - 1
+    return [np.bincount(groups[valid & (bins == i)], minlength=size) for i in range(len(edges))]
+
+def rollup_archive(db: Session, start: Optional[datetime] = None, end: Optional[datetime] = None) -> Tuple[int, int]:
+    """
+    Rebuild the rollups of the hours within [start, end) that have archived events,
+    aggregating the archive files with NumPy. Returns the number of hourly and daily
+    artifact buckets rebuilt.
+    """
+    np = optional_import("numpy")
+    totals: Dict[Tuple[int, datetime, int], Dict[str, Any]] = defaultdict(_empty_totals)
+    event_types: Dict[int, EventType] = {}
+    for columns in iter_archive(start, end):
+        keep = columns["artifact_id"] >= 0
+        if not keep.any():
+            continue
+        names = [str(name) for name in columns["event_type_names"]]
+        keys = np.stack([
+            columns["artifact_id"][keep],
+            columns["created_at"][keep].astype("datetime64[h]").astype(np.int64),
+            columns["event_type"][keep].astype(np.int64),
+        ], axis=1)
+        groups, index = np.unique(keys, axis=0, return_inverse=True)
+        index = index.reshape(-1)
+        size = len(groups)
+        dwell, distance = columns["dwell_time_seconds"][keep], columns["distance_meters"][keep]
+        has_dwell, has_distance = ~np.isnan(dwell), ~np.isnan(distance)
+        counts = np.bincount(index, minlength=size)
+        dwell_counts = np.bincount(index, weights=has_dwell, minlength=size)
+        dwell_sums = np.bincount(index, weights=np.nan_to_num(dwell), minlength=size)
+        distance_counts = np.bincount(index, weights=has_distance, minlength=size)
+        distance_sums = np.bincount(index, weights=np.nan_to_num(distance), minlength=size)
+        dwell_histogram = _histogram_counts(np, index, dwell, has_dwell, DWELL_HISTOGRAM_EDGES, size)
+        distance_histogram = _histogram_counts(np, index, distance, has_distance, DISTANCE_HISTOGRAM_EDGES, size)
+        for g, (artifact_id, hour, event_type) in enumerate(groups.tolist()):
+            event_types[event_type] = EventType[names[event_type]]
+            bucket = totals[(artifact_id, datetime.fromtimestamp(hour * 3600, timezone.utc), event_type)]
+            bucket["event_count"] += int(counts[g])
+            bucket["dwell_count"] += int(dwell_counts[g])
+            bucket["dwell_sum"] += float(dwell_sums[g])
+            bucket["distance_count"] += int(distance_counts[g])
+            bucket["distance_sum"] += float(distance_sums[g])
+            for i, histogram in enumerate(dwell_histogram):
+                bucket["dwell_histogram"][i] += int(histogram[g])
+            for i, histogram in enumerate(distance_histogram):
+                bucket["distance_histogram"][i] += int(histogram[g])
+
+    # Archived events may refer to artifacts deleted since
+    known = set(db.scalars(select(Artifact.id).where(Artifact.id.in_({key[0] for key in totals})))) if totals else set()
+    hours: Dict[datetime, List[Dict[str, Any]]] = defaultdict(list)
+    for (artifact_id, hour, event_type), values in totals.items():
+        if artifact_id not in known:
+            continue
+        hours[hour].append({"artifact_id": artifact_id, "event_type": event_types[event_type], **values})
+    days: Dict[datetime, Set[int]] = defaultdict(set)
+    for hour, rows in sorted(hours.items()):
+        artifact_ids = {row["artifact_id"] for row in rows}
+        _replace_hour(db, hour, artifact_ids, rows)
+        days[hour.replace(hour=0)].update(artifact_ids)
+    for day, artifact_ids in sorted(days.items()):
+        _rollup_day(db, day, artifact_ids)
+    db.commit()
+    return (
+        sum(len({row["artifact_id"] for row in rows}) for rows in hours.values()),
+        sum(len(ids) for ids in days.values()),
+    )
+
+def rolled_up_until(db: Session) -> Optional[datetime]:
+    """Events written before this are included in the rollups."""
+    watermark = db.scalar(
+        select(AnalyticsRollupState.watermark).where(AnalyticsRollupState.name == ROLLUP_STATE_NAME)
+    )
+    return _as_utc(watermark) if watermark else None
+
+def _stats(totals: Dict[str, Any], event_counts: Dict[str, int]) -> Dict[str, Any]:
+    return {
+        "event_counts": event_counts,
+        "dwell_count": totals["dwell_count"],
+        "dwell_seconds_total": totals["dwell_sum"],
+        "average_dwell_seconds": totals["dwell_sum"] / totals["dwell_count"] if totals["dwell_count"] else None,
+        "dwell_histogram": totals["dwell_histogram"],
+        "distance_count": totals["distance_count"],
+        "average_distance_meters": (
+            totals["distance_sum"] / totals["distance_count"] if totals["distance_count"] else None
+        ),
+        "distance_histogram": totals["distance_histogram"],
+    }
+
+def _summarize(rollups: Iterable[AnalyticsRollup]) -> Tuple[Dict[str, Any], List[Dict[str, Any]], Dict[int, int]]:
+    totals, counts = _empty_totals(), defaultdict(int)
+    by_bucket: Dict[datetime, Dict[str, Any]] = defaultdict(_empty_totals)
+    bucket_counts: Dict[datetime, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    per_artifact: Dict[int, int] = defaultdict(int)
+    for rollup in rollups:
+        bucket = _as_utc(rollup.bucket_start)
+        _add(totals, rollup)
+        _add(by_bucket[bucket], rollup)
+        counts[rollup.event_type.value] += rollup.event_count
+        bucket_counts[bucket][rollup.event_type.value] += rollup.event_count
+        per_artifact[rollup.artifact_id] += rollup.event_count
+    buckets = [
+        {"bucket_start": bucket, **_stats(values, dict(bucket_counts[bucket]))}
+        for bucket, values in sorted(by_bucket.items())
+    ]
+    return _stats(totals, dict(counts)), buckets, per_artifact
+
+def get_summary(
+    db: Session,
+    granularity: RollupGranularity,
+    start: datetime,
+    end: datetime,
+    artifact_id: Optional[int] = None,
+    creator_id: Optional[int] = None,
+    top: int = 0,
+) -> Dict[str, Any]:
+    """
+    Totals and per-bucket series over [start, end) for one artifact, a creator's
+    artifacts or (neither given) all of them. Reads only the rollups, so the cost
+    depends on the range and number of artifacts, not on the number of events.
+    """
+    step = GRANULARITY_STEP[granularity]
+    if end <= start:
+        raise HTTPException(status_code=400, detail="end must be after start")
+    if (end - start) / step > MAX_SUMMARY_BUCKETS:
+        raise HTTPException(
+            status_code=400, detail=f"At most {MAX_SUMMARY_BUCKETS} {granularity.value} buckets per summary"
+        )
+
+    query = select(AnalyticsRollup).where(
+        AnalyticsRollup.granularity == granularity,
+        AnalyticsRollup.bucket_start >= start,
+        AnalyticsRollup.bucket_start < end,
+    )
+    if artifact_id is not None:
+        query = query.where(AnalyticsRollup.artifact_id == artifact_id)
+    if creator_id is not None:
+        query = query.join(Artifact, Artifact.id == AnalyticsRollup.artifact_id).where(Artifact.creator_id == creator_id)
+    totals, buckets, per_artifact = _summarize(db.scalars(query))
+
+    top_artifacts = []
+    if top and per_artifact:
+        ranked = sorted(per_artifact.items(), key=lambda item: item[1], reverse=True)[:top]
+        titles = dict(db.execute(select(Artifact.id, Artifact.title).where(Artifact.id.in_([a for a, _ in ranked]))).all())
+        top_artifacts = [
+            {"artifact_id": a, "title": titles.get(a), "event_count": count} for a, count in ranked
+        ]
+    return {
+        "granularity": granularity,
+        "start": start,
+        "end": end,
+        "rolled_up_until": rolled_up_until(db),
+        "dwell_histogram_edges": DWELL_HISTOGRAM_EDGES,
+        "distance_histogram_edges": DISTANCE_HISTOGRAM_EDGES,
+        "totals": totals,
+        "buckets": buckets,
+        "top_artifacts": top_artifacts,
+    }
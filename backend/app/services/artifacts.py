@@ -1,11 +1,65 @@
+import math
 from typing import List, Optional
 from sqlalchemy.orm import Session
-from sqlalchemy import text, func
+from sqlalchemy import case, text, func, or_
 # from geoalchemy2 import Geography  # Disabled for now
 from geopy.distance import geodesic
 
+from app.core.config import settings
+from app.core.metrics import ARTIFACTS_NEAR_RETURNED, ARTIFACTS_NEAR_SCANNED
 from app.models.artifact import Artifact, ArtifactStatus, ArtifactType
-from app.schemas.artifact import ArtifactWithDistance
+from app.schemas.artifact import ArtifactWithDistance, PrefetchEntry, PrefetchManifest
+from app.services.assets import sha256_from_url
+from app.services.variant_selection import ClientProfile, select_variant
+
+METERS_PER_DEGREE = 111000  # 1 degree of latitude ≈ 111km
+
+# Prefetch ranking: an artifact directly behind the user costs this many times more
+# than one straight ahead; artifacts already in range rank by a fraction of their distance
+PREFETCH_BEHIND_WEIGHT = 3.0
+PREFETCH_IN_RANGE_WEIGHT = 0.1
+
+def bounding_box_filters(latitude: float, longitude: float, radius_meters: float) -> list:
+    """
+    Lat/lng range filters for a box around a point (works without PostGIS).
+    Longitude degrees shrink with cos(latitude); boxes crossing the antimeridian
+    are split in two.
+    """
+    lat_range = radius_meters / METERS_PER_DEGREE
+    cos_lat = max(math.cos(math.radians(latitude)), 1e-6)
+    lng_range = min(radius_meters / (METERS_PER_DEGREE * cos_lat), 180)
+    
+    filters = [Artifact.latitude.between(latitude - lat_range, latitude + lat_range)]
+    west, east = longitude - lng_range, longitude + lng_range
+    if west < -180:
+        filters.append(or_(
+            Artifact.longitude.between(west + 360, 180),
+            Artifact.longitude.between(-180, east)
+        ))
+    elif east > 180:
+        filters.append(or_(
+            Artifact.longitude.between(west, 180),
+            Artifact.longitude.between(-180, east - 360)
+        ))
+    else:
+        filters.append(Artifact.longitude.between(west, east))
+    return filters
+
+def approximate_distance_order(latitude: float, longitude: float):
+    """
+    SQL expression ordering artifacts by distance from a point: squared degree
+    offsets with longitude scaled by cos(latitude), wrapped across the antimeridian.
+    Good enough to rank nearby candidates before a LIMIT.
+    """
+    cos_lat = math.cos(math.radians(latitude))
+    delta_lng = Artifact.longitude - longitude
+    delta_lng = case(
+        (delta_lng > 180, delta_lng - 360),
+        (delta_lng < -180, delta_lng + 360),
+        else_=delta_lng,
+    )
+    delta_lat = Artifact.latitude - latitude
+    return delta_lat * delta_lat + delta_lng * delta_lng * (cos_lat * cos_lat)
 
 def calculate_distance_and_status(
     artifact: Artifact, 
@@ -29,6 +83,89 @@ def calculate_distance_and_status(
         "is_locked": is_locked
     }
 
+def initial_bearing(from_lat: float, from_lng: float, to_lat: float, to_lng: float) -> float:
+    """Compass bearing in degrees (0 = north, clockwise) from one point towards another."""
+    phi1, phi2 = math.radians(from_lat), math.radians(to_lat)
+    delta_lng = math.radians(to_lng - from_lng)
+    x = math.sin(delta_lng) * math.cos(phi2)
+    y = math.cos(phi1) * math.sin(phi2) - math.sin(phi1) * math.cos(phi2) * math.cos(delta_lng)
+    return math.degrees(math.atan2(x, y)) % 360
+
+def prefetch_cost(distance_meters: float, max_view_distance: float, bearing: float, heading: Optional[float]) -> float:
+    """
+    How far (in meters, weighted by direction) the user is from seeing an artifact:
+    the distance left to walk into its view range, plus a little of the distance
+    itself so in-range artifacts order nearest first, scaled up the further it is
+    from the direction the user is facing.
+    """
+    cost = max(distance_meters - max_view_distance, 0) + PREFETCH_IN_RANGE_WEIGHT * distance_meters
+    if heading is not None:
+        turn = math.radians(bearing - heading)
+        cost *= 1 + (PREFETCH_BEHIND_WEIGHT - 1) * (1 - math.cos(turn)) / 2
+    return cost
+
+def get_prefetch_manifest(
+    db: Session,
+    latitude: float,
+    longitude: float,
+    heading: Optional[float],
+    budget_bytes: int,
+    radius_meters: int = 1000,
+    profile: Optional[ClientProfile] = None,
+) -> PrefetchManifest:
+    """
+    Assets of the artifacts around the user, most likely to be viewed next first,
+    filled greedily up to `budget_bytes` (one that doesn't fit is skipped, smaller
+    ones after it may still be included; one of unknown size never fits). Variants
+    are chosen for the distance the artifact comes into view at, since that is
+    where it will first be seen.
+    """
+    profile = profile or ClientProfile()
+    # Nearest first, so dense areas only drop the farthest candidates
+    artifacts = db.query(Artifact).filter(
+        Artifact.status == ArtifactStatus.PUBLISHED,
+        Artifact.asset_url.isnot(None),
+        *bounding_box_filters(latitude, longitude, radius_meters)
+    ).order_by(
+        approximate_distance_order(latitude, longitude), Artifact.id
+    ).limit(settings.PREFETCH_MAX_CANDIDATES).all()
+
+    ranked = []
+    for artifact in artifacts:
+        distance_info = calculate_distance_and_status(artifact, latitude, longitude)
+        if distance_info["distance_meters"] > radius_meters:
+            continue
+        bearing = initial_bearing(latitude, longitude, artifact.latitude, artifact.longitude)
+        cost = prefetch_cost(distance_info["distance_meters"], artifact.max_view_distance, bearing, heading)
+        ranked.append((cost, artifact, distance_info, bearing))
+    ranked.sort(key=lambda item: (item[0], item[1].id))
+
+    entries, total_bytes, skipped = [], 0, 0
+    for _, artifact, distance_info, bearing in ranked:
+        viewing_distance = min(distance_info["distance_meters"], artifact.max_view_distance)
+        variant = select_variant(artifact, viewing_distance, profile)
+        size = variant.get("size_bytes")
+        if size is None or total_bytes + size > budget_bytes:
+            skipped += 1
+            continue
+        total_bytes += size
+        entries.append(PrefetchEntry(
+            artifact_id=artifact.id,
+            asset_type=artifact.asset_type,
+            url=variant["url"],
+            variant=variant["name"],
+            size_bytes=size,
+            sha256=sha256_from_url(artifact.asset_url),
+            thumbnail_url=artifact.thumbnail_url,
+            distance_meters=distance_info["distance_meters"],
+            bearing_degrees=bearing,
+            is_in_range=distance_info["is_in_range"],
+        ))
+
+    return PrefetchManifest(
+        entries=entries, total_bytes=total_bytes, budget_bytes=budget_bytes, skipped_count=skipped
+    )
+
 def get_artifacts_near(
     db: Session,
     latitude: float,
@@ -36,11 +173,14 @@ def get_artifacts_near(
     radius_meters: int = 1000,
     artifact_types: Optional[List[ArtifactType]] = None,
     skip: int = 0,
-    limit: int = 50
+    limit: int = 50,
+    profile: Optional[ClientProfile] = None,
 ) -> List[ArtifactWithDistance]:
     """
-    Get artifacts near a location with distance calculations.
+    Get artifacts near a location with distance calculations and the asset
+    variant suited to each distance.
     """
+    profile = profile or ClientProfile()
     # Base query for published artifacts
     query = db.query(Artifact).filter(
         Artifact.status == ArtifactStatus.PUBLISHED
@@ -51,27 +191,27 @@ def get_artifacts_near(
         query = query.filter(Artifact.artifact_type.in_(artifact_types))
     
     # Simple radius filtering using lat/lng (less efficient but works without PostGIS)
-    # This is a rough approximation - 1 degree ≈ 111km
-    lat_range = radius_meters / 111000  # Convert to degrees
-    lng_range = radius_meters / (111000 * abs(latitude))  # Adjust for longitude
-    
-    query = query.filter(
-        Artifact.latitude.between(latitude - lat_range, latitude + lat_range),
-        Artifact.longitude.between(longitude - lng_range, longitude + lng_range)
-    )
+    query = query.filter(*bounding_box_filters(latitude, longitude, radius_meters))
     
     artifacts = query.offset(skip).limit(limit).all()
     
-    # Calculate distance and status for each artifact
+    # Calculate distance and status for each artifact; the box's corners are
+    # outside the radius
     artifacts_with_distance = []
     for artifact in artifacts:
         distance_info = calculate_distance_and_status(artifact, latitude, longitude)
+        if distance_info["distance_meters"] > radius_meters:
+            continue
         
         artifact_dict = artifact.__dict__.copy()
         artifact_dict.update(distance_info)
+        artifact_dict["selected_variant"] = select_variant(artifact, distance_info["distance_meters"], profile)
         
         artifacts_with_distance.append(ArtifactWithDistance(**artifact_dict))
     
+    ARTIFACTS_NEAR_SCANNED.observe(len(artifacts))
+    ARTIFACTS_NEAR_RETURNED.observe(len(artifacts_with_distance))
+    
     return artifacts_with_distance
 
 def get_clustered_artifacts(
@@ -92,13 +232,9 @@ def get_clustered_artifacts(
     # PostGIS clustering functions or a proper clustering algorithm
     
     # Get artifacts in area using simple lat/lng filtering
-    lat_range = radius_meters / 111000
-    lng_range = radius_meters / (111000 * abs(latitude))
-    
     artifacts = db.query(Artifact).filter(
         Artifact.status == ArtifactStatus.PUBLISHED,
-        Artifact.latitude.between(latitude - lat_range, latitude + lat_range),
-        Artifact.longitude.between(longitude - lng_range, longitude + lng_range)
+        *bounding_box_filters(latitude, longitude, radius_meters)
     ).all()
     
     # Simple grid-based clustering
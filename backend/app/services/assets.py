@@ -0,0 +1,201 @@
+import glob
+import gzip
+import os
+import re
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import event, inspect, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.optional import optional_import
+from app.core.static_files import PRECOMPRESSED_ENCODINGS
+from app.models.artifact import Artifact, AssetType
+from app.models.asset import Asset
+from app.services.storage import LocalStorage, get_storage
+
+# Content-addressed layout: uploads/assets/<first two hex digits>/<sha256><ext>
+ASSET_ROOT = "uploads/assets"
+THUMBNAIL_ROOT = f"{ASSET_ROOT}/thumbnails"
+DERIVATIVE_ROOT = f"{ASSET_ROOT}/derivatives"
+TMP_DIR = "uploads/tmp"
+
+SHA256_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+# Matches local ("/uploads/...") and remote storage ("https://cdn.example/uploads/...") URLs
+_URL_SHA256 = re.compile(r"(?:^|/)uploads/assets/(?:thumbnails/)?[0-9a-f]{2}/([0-9a-f]{64})")
+
+def asset_path(sha256: str, extension: str) -> str:
+    return f"{ASSET_ROOT}/{sha256[:2]}/{sha256}{extension.lower()}"
+
+def thumbnail_path(sha256: str) -> str:
+    return f"{THUMBNAIL_ROOT}/{sha256[:2]}/{sha256}_thumb.jpg"
+
+def derivative_path(sha256: str, name: str, extension: str) -> str:
+    return f"{DERIVATIVE_ROOT}/{sha256[:2]}/{sha256}_{name}{extension}"
+
+def url_for(path: str) -> str:
+    return get_storage().url(path)
+
+_PRECOMPRESSED_SUFFIXES = tuple(suffix for _, suffix in PRECOMPRESSED_ENCODINGS)
+
+def find_stored(sha256: str) -> Optional[str]:
+    """Path of the stored file with this content, whatever extension it was first uploaded with."""
+    matches = [
+        path for path in glob.glob(f"{ASSET_ROOT}/{sha256[:2]}/{sha256}*")
+        if not path.endswith(_PRECOMPRESSED_SUFFIXES) and not path.endswith(".part")
+    ]
+    return matches[0] if matches else None
+
+def is_stored(asset: Asset) -> bool:
+    """Whether the asset's upload exists in the storage backend."""
+    storage = get_storage()
+    return storage.size(storage.key_for_url(asset.url)) is not None
+
+def write_precompressed(path: str) -> None:
+    """Write `.gz` (and, with the brotli module, `.br`) copies next to a file for AssetFiles to serve."""
+    with open(path, "rb") as f:
+        data = f.read()
+    brotli = optional_import("brotli")
+    encoded = {".gz": lambda: gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        encoded[".br"] = lambda: brotli.compress(data, quality=11)
+    for suffix, compress in encoded.items():
+        if not os.path.exists(path + suffix):
+            temp_path = f"{path}{suffix}.part"
+            with open(temp_path, "wb") as f:
+                f.write(compress())
+            os.replace(temp_path, path + suffix)
+
+def sha256_from_url(url: Optional[str]) -> Optional[str]:
+    match = _URL_SHA256.search(url or "")
+    return match.group(1) if match else None
+
+def asset_files(sha256: str) -> List[str]:
+    """Local files of an asset: the upload, its precompressed copies, thumbnail and derivatives."""
+    stored = find_stored(sha256)
+    paths = [stored + suffix for suffix in ("",) + _PRECOMPRESSED_SUFFIXES] if stored else []
+    paths.append(thumbnail_path(sha256))
+    for path in glob.glob(derivative_path(sha256, "*", "")):
+        if os.path.isdir(path):
+            # HLS renditions: playlists and segments
+            paths.extend(os.path.join(root, name) for root, _, files in os.walk(path) for name in files)
+        else:
+            paths.append(path)
+    return [path for path in paths if os.path.isfile(path)]
+
+def publish_asset_files(sha256: str) -> None:
+    """Copy what processing generated locally to a remote storage backend (the upload is already there)."""
+    storage = get_storage()
+    if storage.is_local:
+        return
+    stored = find_stored(sha256)
+    for path in asset_files(sha256):
+        if path != stored:
+            storage.put_file(path, path)
+
+def referenced_hashes(*urls: Optional[str]) -> Set[str]:
+    """Assets an artifact references; its thumbnail counts as a reference to the same asset."""
+    return {sha for sha in map(sha256_from_url, urls) if sha}
+
+def get_asset(db: Session, sha256: str) -> Optional[Asset]:
+    return db.query(Asset).filter(Asset.sha256 == sha256).first()
+
+def register_asset(db: Session, upload_result: Dict[str, Any], asset_type: AssetType) -> Asset:
+    """Get or create the Asset row for a stored upload (flushed, so references can count it)."""
+    asset = get_asset(db, upload_result["sha256"])
+    if asset is not None:
+        if asset.thumbnail_url is None and upload_result.get("thumbnail_url"):
+            asset.thumbnail_url = upload_result["thumbnail_url"]
+        return asset
+
+    asset = Asset(
+        sha256=upload_result["sha256"],
+        asset_type=asset_type,
+        mime_type=upload_result.get("mime_type"),
+        size_bytes=upload_result["file_size_bytes"],
+        url=upload_result["asset_url"],
+        thumbnail_url=upload_result.get("thumbnail_url"),
+        ref_count=0,
+    )
+    try:
+        with db.begin_nested():
+            db.add(asset)
+    except IntegrityError:
+        # The same content was registered concurrently
+        return get_asset(db, upload_result["sha256"])
+    return asset
+
+def _adjust_ref_counts(connection, hashes: Iterable[str], delta: int) -> None:
+    hashes = list(hashes)
+    if hashes:
+        connection.execute(
+            update(Asset.__table__)
+            .where(Asset.__table__.c.sha256.in_(hashes))
+            .values(ref_count=Asset.__table__.c.ref_count + delta)
+        )
+
+@event.listens_for(Artifact, "after_insert")
+def _artifact_inserted(mapper, connection, target: Artifact) -> None:
+    _adjust_ref_counts(connection, referenced_hashes(target.asset_url, target.thumbnail_url), 1)
+
+@event.listens_for(Artifact, "after_delete")
+def _artifact_deleted(mapper, connection, target: Artifact) -> None:
+    _adjust_ref_counts(connection, referenced_hashes(target.asset_url, target.thumbnail_url), -1)
+
+@event.listens_for(Artifact, "after_update")
+def _artifact_updated(mapper, connection, target: Artifact) -> None:
+    state = inspect(target)
+    histories = [state.attrs.asset_url.history, state.attrs.thumbnail_url.history]
+    if not any(history.has_changes() for history in histories):
+        return
+    before = referenced_hashes(*[url for h in histories for url in (h.deleted or h.unchanged)])
+    after = referenced_hashes(*[url for h in histories for url in (h.added or h.unchanged)])
+    _adjust_ref_counts(connection, before - after, -1)
+    _adjust_ref_counts(connection, after - before, 1)
+
+def recount_references(db: Session) -> int:
+    """
+    Recompute every ref_count from the artifacts table, catching references made
+    outside the ORM (e.g. bulk imports). Returns how many counts were corrected.
+    """
+    counts: Counter = Counter()
+    rows = db.execute(
+        select(Artifact.asset_url, Artifact.thumbnail_url).execution_options(yield_per=5000)
+    )
+    for asset_url, thumbnail_url in rows:
+        counts.update(referenced_hashes(asset_url, thumbnail_url))
+
+    corrected = 0
+    for asset in db.query(Asset).yield_per(1000):
+        if asset.ref_count != counts.get(asset.sha256, 0):
+            asset.ref_count = counts.get(asset.sha256, 0)
+            corrected += 1
+    db.commit()
+    return corrected
+
+def collect_garbage(db: Session, grace: timedelta) -> Tuple[int, int]:
+    """
+    Delete unreferenced assets older than `grace` (which leaves time for a
+    hash-first client to create the artifact). Returns (assets, bytes) removed.
+    """
+    cutoff = datetime.now(timezone.utc) - grace
+    removed, freed = 0, 0
+    # The local working copies, and with a remote backend the stored objects too
+    backends = [LocalStorage()]
+    if not get_storage().is_local:
+        backends.append(get_storage())
+    for asset in db.query(Asset).filter(Asset.ref_count <= 0, Asset.created_at < cutoff).all():
+        prefixes = (
+            f"{ASSET_ROOT}/{asset.sha256[:2]}/{asset.sha256}",  # The upload and its precompressed copies
+            thumbnail_path(asset.sha256),
+            derivative_path(asset.sha256, "", ""),
+        )
+        for backend in backends:
+            for prefix in prefixes:
+                freed += backend.delete_prefix(prefix)
+        db.delete(asset)
+        removed += 1
+    db.commit()
+    return removed, freed
@@ -0,0 +1,357 @@
+import csv
+import hashlib
+import io
+import json
+from datetime import datetime, timezone
+from enum import Enum
+from itertools import islice
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple
+
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy import insert, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app.core.database import engine
+from app.models.artifact import Artifact, ArtifactStatus
+from app.models.import_job import ImportFormat, ImportJob, ImportStatus
+from app.schemas.artifact import ArtifactCreate
+
+IMPORT_BATCH_SIZE = 1000
+MAX_RECORDED_ERRORS = 100
+READ_CHUNK_SIZE = 64 * 1024
+
+# Columns written for every imported artifact, in COPY order
+IMPORT_COLUMNS = [
+    "title", "description", "creator_id", "artifact_type", "asset_type", "category",
+    "tags", "latitude", "longitude", "address", "min_view_distance", "max_view_distance",
+    "anchor_mode", "scale_factor", "asset_url", "thumbnail_url", "menu_data",
+    "availability_start", "availability_end", "is_open_now", "status", "is_featured",
+    "report_count", "published_at",
+]
+
+def _clean(value: Optional[str]) -> Optional[str]:
+    if value is None:
+        return None
+    value = value.strip()
+    return value or None
+
+def _parse_tags(value: Optional[str]) -> List[str]:
+    value = _clean(value)
+    if not value:
+        return []
+    if value.startswith("["):
+        return json.loads(value)
+    return [tag.strip() for tag in value.split(";") if tag.strip()]
+
+def record_from_properties(properties: Dict[str, Any], latitude: Any, longitude: Any) -> Dict[str, Any]:
+    """Shape flat CSV/GeoJSON properties like ArtifactCreate's nested input."""
+    distance_settings = {}
+    for field in ("min_view_distance", "max_view_distance"):
+        if properties.get(field) not in (None, ""):
+            distance_settings[field] = properties[field]
+
+    record = {
+        "title": properties.get("title"),
+        "description": properties.get("description"),
+        "artifact_type": properties.get("artifact_type"),
+        "asset_type": properties.get("asset_type"),
+        "category": properties.get("category"),
+        "tags": properties.get("tags") if isinstance(properties.get("tags"), list)
+        else _parse_tags(properties.get("tags")),
+        "location": {
+            "latitude": latitude,
+            "longitude": longitude,
+            "address": properties.get("address"),
+        },
+        "distance_settings": distance_settings,
+        "anchor_mode": properties.get("anchor_mode"),
+        "scale_factor": properties.get("scale_factor"),
+        "menu_data": properties.get("menu_data"),
+        "availability_start": properties.get("availability_start"),
+        "availability_end": properties.get("availability_end"),
+        # Imports point at assets that are already hosted
+        "asset_url": properties.get("asset_url"),
+        "thumbnail_url": properties.get("thumbnail_url"),
+    }
+    if isinstance(record["menu_data"], str):
+        record["menu_data"] = json.loads(record["menu_data"]) if _clean(record["menu_data"]) else None
+    return {k: v for k, v in record.items() if v not in (None, "")}
+
+def iter_csv_rows(stream: BinaryIO) -> Iterator[Dict[str, Any]]:
+    """Stream the rows of a CSV file with one column per field."""
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    yield from csv.DictReader(text)
+
+def csv_record(row: Dict[str, Any]) -> Dict[str, Any]:
+    properties = {key.strip(): _clean(value) for key, value in row.items() if key}
+    return record_from_properties(properties, properties.get("latitude"), properties.get("longitude"))
+
+def _iter_json_array(stream: BinaryIO, key: str) -> Iterator[Any]:
+    """
+    Incrementally decode the items of the top-level `key` array of a JSON document,
+    holding at most one item plus one read chunk in memory.
+    """
+    decoder = json.JSONDecoder()
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig")
+    buffer = ""
+    eof = False
+
+    def fill() -> bool:
+        nonlocal buffer, eof
+        chunk = text.read(READ_CHUNK_SIZE)
+        eof = not chunk
+        buffer += chunk
+        return not eof
+
+    marker = f'"{key}"'
+    while marker not in buffer:
+        if not fill():
+            return
+    buffer = buffer[buffer.index(marker) + len(marker):]
+    while "[" not in buffer:
+        if not fill():
+            return
+    buffer = buffer[buffer.index("[") + 1:]
+
+    while True:
+        buffer = buffer.lstrip(" \t\r\n,")
+        if not buffer:
+            if not fill():
+                raise ValueError(f"Unterminated '{key}' array")
+            continue
+        if buffer[0] == "]":
+            return
+        try:
+            item, end = decoder.raw_decode(buffer)
+        except json.JSONDecodeError:
+            if not fill():
+                raise
+            continue
+        buffer = buffer[end:]
+        yield item
+
+def iter_geojson_features(stream: BinaryIO) -> Iterator[Any]:
+    """Stream the features of a GeoJSON FeatureCollection."""
+    return _iter_json_array(stream, "features")
+
+def geojson_record(feature: Any) -> Dict[str, Any]:
+    if not isinstance(feature, dict):
+        raise ValueError("Feature must be an object")
+    geometry = feature.get("geometry") or {}
+    properties = feature.get("properties") or {}
+    if not isinstance(geometry, dict) or not isinstance(properties, dict):
+        raise ValueError("Feature geometry and properties must be objects")
+    coordinates = geometry.get("coordinates") or [None, None]
+    if geometry.get("type") != "Point" or not isinstance(coordinates, list) or len(coordinates) < 2:
+        # Let validation report it against the record
+        coordinates = [None, None]
+    return record_from_properties(properties, coordinates[1], coordinates[0])
+
+# Readers only split the source into raw items (CSV rows, GeoJSON features);
+# turning an item into a record happens in validate_batch, so a malformed item is
+# reported as that record's error instead of aborting the import
+RECORD_READERS = {
+    ImportFormat.CSV: iter_csv_rows,
+    ImportFormat.GEOJSON: iter_geojson_features,
+}
+RECORD_PARSERS = {
+    ImportFormat.CSV: csv_record,
+    ImportFormat.GEOJSON: geojson_record,
+}
+
+def format_from_filename(filename: Optional[str]) -> Optional[ImportFormat]:
+    extension = (filename or "").lower().rsplit(".", 1)[-1]
+    if extension == "csv":
+        return ImportFormat.CSV
+    if extension in ("geojson", "json"):
+        return ImportFormat.GEOJSON
+    return None
+
+def _artifact_row(record: Dict[str, Any], job: ImportJob, now: datetime) -> Dict[str, Any]:
+    artifact_in = ArtifactCreate(**record)
+    status = ArtifactStatus.PUBLISHED if job.publish else ArtifactStatus.DRAFT
+    return {
+        "title": artifact_in.title,
+        "description": artifact_in.description,
+        "creator_id": job.creator_id,
+        "artifact_type": artifact_in.artifact_type,
+        "asset_type": artifact_in.asset_type,
+        "category": artifact_in.category,
+        "tags": artifact_in.tags,
+        "latitude": artifact_in.location.latitude,
+        "longitude": artifact_in.location.longitude,
+        "address": artifact_in.location.address,
+        "min_view_distance": artifact_in.distance_settings.min_view_distance,
+        "max_view_distance": artifact_in.distance_settings.max_view_distance,
+        "anchor_mode": artifact_in.anchor_mode,
+        "scale_factor": artifact_in.scale_factor,
+        "asset_url": record.get("asset_url"),
+        "thumbnail_url": record.get("thumbnail_url"),
+        "menu_data": artifact_in.menu_data,
+        "availability_start": artifact_in.availability_start,
+        "availability_end": artifact_in.availability_end,
+        "is_open_now": True,
+        "status": status,
+        "is_featured": False,
+        "report_count": 0,
+        "published_at": now if job.publish else None,
+    }
+
+def validate_batch(
+    items: List[Any], job: ImportJob, first_index: int
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Parse raw source items and validate them with the ArtifactCreate rules; returns (rows, errors)."""
+    parse = RECORD_PARSERS[job.format]
+    now = datetime.now(timezone.utc)
+    rows, errors = [], []
+    for offset, item in enumerate(items):
+        try:
+            rows.append(_artifact_row(parse(item), job, now))
+        except (ValidationError, ValueError, TypeError) as e:
+            errors.append({"record": first_index + offset, "error": str(e)})
+    return rows, errors
+
+def _copy_value(value: Any) -> Any:
+    if value is None:
+        return None
+    if isinstance(value, Enum):
+        # SQLAlchemy Enum columns store member names
+        return value.name
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+def _copy_rows(connection: Connection, rows: List[Dict[str, Any]]) -> None:
+    """Load rows with PostgreSQL COPY, the fastest path into the table."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([_copy_value(row[column]) for column in IMPORT_COLUMNS])
+    buffer.seek(0)
+    cursor = connection.connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {Artifact.__tablename__} ({', '.join(IMPORT_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+            buffer,
+        )
+    finally:
+        cursor.close()
+
+def load_rows(connection: Connection, rows: List[Dict[str, Any]]) -> None:
+    if not rows:
+        return
+    if connection.dialect.name == "postgresql":
+        _copy_rows(connection, rows)
+    else:
+        connection.execute(insert(Artifact.__table__), rows)
+
+def create_import_job(
+    db: Session, source_name: str, format: ImportFormat, creator_id: int, publish: bool = False
+) -> ImportJob:
+    job = ImportJob(
+        source_name=source_name,
+        format=format,
+        creator_id=creator_id,
+        publish=publish,
+        status=ImportStatus.RUNNING,
+        position=0,
+        imported_count=0,
+        failed_count=0,
+        errors=[],
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+def source_fingerprint(stream: BinaryIO) -> str:
+    """SHA-256 of a seekable source, read in chunks; leaves the stream at its start."""
+    stream.seek(0)
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: stream.read(READ_CHUNK_SIZE), b""):
+        digest.update(chunk)
+    stream.seek(0)
+    return digest.hexdigest()
+
+class ImportConflict(Exception):
+    """Another run of the same job advanced its checkpoint."""
+
+def run_import(
+    job: ImportJob,
+    stream: BinaryIO,
+    batch_size: int = IMPORT_BATCH_SIZE,
+    progress: Optional[Callable[[ImportJob], None]] = None,
+) -> ImportJob:
+    """
+    Validate and load a CSV/GeoJSON stream in batches. Each batch and the job's
+    checkpoint are committed together, so an interrupted job resumes exactly
+    where it stopped when re-run with the same source (checked by its SHA-256).
+    A checkpoint only advances from the position this run started at, so if
+    another run of the job got there first this one rolls back and stops.
+    """
+    fingerprint = source_fingerprint(stream)
+    if job.source_sha256 is None:
+        with engine.begin() as connection:
+            connection.execute(
+                update(ImportJob.__table__).where(ImportJob.id == job.id).values(source_sha256=fingerprint)
+            )
+        job.source_sha256 = fingerprint
+    elif job.source_sha256 != fingerprint:
+        raise HTTPException(status_code=400, detail="File differs from the one this import job started with")
+
+    records = RECORD_READERS[job.format](stream)
+    # Resume: skip records already handled by a previous run
+    for _ in islice(records, job.position):
+        pass
+
+    errors = list(job.errors or [])
+    conflict = False
+    try:
+        while True:
+            batch = list(islice(records, batch_size))
+            if not batch:
+                break
+            rows, batch_errors = validate_batch(batch, job, job.position)
+            errors.extend(batch_errors[:MAX_RECORDED_ERRORS - len(errors)])
+
+            with engine.begin() as connection:
+                load_rows(connection, rows)
+                checkpoint = connection.execute(
+                    update(ImportJob.__table__)
+                    .where(ImportJob.id == job.id, ImportJob.position == job.position)
+                    .values(
+                        position=job.position + len(batch),
+                        imported_count=job.imported_count + len(rows),
+                        failed_count=job.failed_count + len(batch_errors),
+                        errors=errors,
+                    )
+                )
+                if checkpoint.rowcount != 1:
+                    raise ImportConflict()
+            job.position += len(batch)
+            job.imported_count += len(rows)
+            job.failed_count += len(batch_errors)
+            job.errors = errors
+            if progress:
+                progress(job)
+        job.status = ImportStatus.COMPLETED
+    except ImportConflict:
+        # The other run owns the job (and its status) now
+        conflict = True
+        raise HTTPException(status_code=409, detail="Import job is being run by another process")
+    except Exception:
+        job.status = ImportStatus.FAILED
+        raise
+    finally:
+        if not conflict:
+            with engine.begin() as connection:
+                connection.execute(
+                    update(ImportJob.__table__).where(ImportJob.id == job.id).values(status=job.status)
+                )
+    return job
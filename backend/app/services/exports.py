@@ -0,0 +1,171 @@
+import enum
+import json
+import zlib
+from datetime import date, datetime
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import and_, or_, select
+
+from app.core.database import SessionLocal, engine
+from app.models.analytics import EventType
+from app.models.artifact import Artifact, ArtifactStatus
+from app.services.analytics_partitions import events_table
+
+# Rows fetched per server-side cursor round trip, and per emitted chunk
+EXPORT_CHUNK_ROWS = 1000
+
+class ExportFormat(str, enum.Enum):
+    GEOJSON = "geojson"
+    NDJSON = "ndjson"
+
+MEDIA_TYPES = {
+    ExportFormat.GEOJSON: "application/geo+json",
+    ExportFormat.NDJSON: "application/x-ndjson",
+}
+
+BoundingBox = Tuple[float, float, float, float]  # min_lng, min_lat, max_lng, max_lat
+
+def parse_bbox(value: Optional[str]) -> Optional[BoundingBox]:
+    """Parse a GeoJSON-order "min_lng,min_lat,max_lng,max_lat" string."""
+    if not value:
+        return None
+    parts = [float(p) for p in value.split(",")]
+    if len(parts) != 4:
+        raise ValueError("bbox must be min_lng,min_lat,max_lng,max_lat")
+    return parts[0], parts[1], parts[2], parts[3]
+
+def bbox_filter(lat_column, lng_column, bbox: BoundingBox):
+    min_lng, min_lat, max_lng, max_lat = bbox
+    lat_filter = lat_column.between(min_lat, max_lat)
+    if min_lng <= max_lng:
+        return and_(lat_filter, lng_column.between(min_lng, max_lng))
+    # Box crosses the antimeridian
+    return and_(lat_filter, or_(lng_column >= min_lng, lng_column <= max_lng))
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, default=_json_default, separators=(",", ":"))
+
+def _stream_rows(statement) -> Iterator[Any]:
+    """
+    Iterate a SELECT through a server-side cursor, EXPORT_CHUNK_ROWS at a time.
+    Opens its own session so it lives exactly as long as the response stream.
+    """
+    db = SessionLocal()
+    try:
+        result = db.execute(statement.execution_options(yield_per=EXPORT_CHUNK_ROWS))
+        for partition in result.partitions():
+            yield from partition
+    finally:
+        db.close()
+
+def _encode(features: Iterable[dict], export_format: ExportFormat) -> Iterator[bytes]:
+    """Serialize features chunk by chunk as a FeatureCollection or NDJSON lines."""
+    if export_format == ExportFormat.GEOJSON:
+        yield b'{"type":"FeatureCollection","features":['
+    separator = "," if export_format == ExportFormat.GEOJSON else "\n"
+    chunk: List[str] = []
+    first = True
+    for feature in features:
+        chunk.append(_dumps(feature))
+        if len(chunk) >= EXPORT_CHUNK_ROWS:
+            yield ((separator if not first else "") + separator.join(chunk)).encode()
+            first = False
+            chunk = []
+    if chunk:
+        yield ((separator if not first else "") + separator.join(chunk)).encode()
+        first = False
+    if export_format == ExportFormat.GEOJSON:
+        yield b"]}"
+    elif not first:
+        yield b"\n"
+
+def gzip_stream(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31: gzip container
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+def _point(longitude: Optional[float], latitude: Optional[float]) -> Optional[dict]:
+    if longitude is None or latitude is None:
+        return None
+    return {"type": "Point", "coordinates": [longitude, latitude]}
+
+def export_artifacts(
+    export_format: ExportFormat,
+    bbox: Optional[BoundingBox] = None,
+    status: Optional[ArtifactStatus] = None,
+    creator_id: Optional[int] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+) -> Iterator[bytes]:
+    """Stream artifacts as GeoJSON Point features with every column as a property."""
+    table = Artifact.__table__
+    statement = select(table).order_by(table.c.id)
+    if bbox:
+        statement = statement.where(bbox_filter(table.c.latitude, table.c.longitude, bbox))
+    if status:
+        statement = statement.where(table.c.status == status)
+    if creator_id:
+        statement = statement.where(table.c.creator_id == creator_id)
+    if created_after:
+        statement = statement.where(table.c.created_at >= created_after)
+    if created_before:
+        statement = statement.where(table.c.created_at < created_before)
+
+    features = (
+        {
+            "type": "Feature",
+            "id": row.id,
+            "geometry": _point(row.longitude, row.latitude),
+            "properties": dict(row._mapping),
+        }
+        for row in _stream_rows(statement)
+    )
+    return _encode(features, export_format)
+
+def export_analytics_events(
+    export_format: ExportFormat,
+    bbox: Optional[BoundingBox] = None,
+    creator_id: Optional[int] = None,
+    artifact_id: Optional[int] = None,
+    event_type: Optional[EventType] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+) -> Iterator[bytes]:
+    """Stream analytics events; the geometry is where the user was, when recorded."""
+    table = events_table(engine, created_after, created_before)
+    statement = select(table).order_by(table.c.id)
+    if bbox:
+        statement = statement.where(bbox_filter(table.c.user_latitude, table.c.user_longitude, bbox))
+    if creator_id:
+        statement = statement.where(table.c.artifact_id.in_(
+            select(Artifact.id).where(Artifact.creator_id == creator_id)
+        ))
+    if artifact_id:
+        statement = statement.where(table.c.artifact_id == artifact_id)
+    if event_type:
+        statement = statement.where(table.c.event_type == event_type)
+    if created_after:
+        statement = statement.where(table.c.created_at >= created_after)
+    if created_before:
+        statement = statement.where(table.c.created_at < created_before)
+
+    features = (
+        {
+            "type": "Feature",
+            "id": row.id,
+            "geometry": _point(row.user_longitude, row.user_latitude),
+            "properties": dict(row._mapping),
+        }
+        for row in _stream_rows(statement)
+    )
+    return _encode(features, export_format)
@@ -1,107 +1,130 @@
+import hashlib
 import os
 import uuid
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Set, Tuple
+
+import aiofiles
+import aiofiles.os
 from fastapi import UploadFile, HTTPException
 from app.core.config import settings
+from app.core.metrics import UPLOAD_BYTES, UPLOAD_DURATION
+from app.core.optional import optional_import
+from app.core.profiling import run_in_threadpool
 from app.models.artifact import AssetType
+from app.services.assets import TMP_DIR, asset_path, find_stored, thumbnail_path, url_for
+from app.services.storage import get_storage
+from app.services.model_processing import load_scene, render_model_thumbnail
+from app.services.video_processing import extract_poster, ffmpeg_binary, probe_video
+
+# Heavy optional libraries (Pillow, python-magic) are imported lazily on first
+# use so that importing this module doesn't slow down worker startup.
+_warned_no_magic = False
 
-# Optional imports for advanced features
-try:
-    from PIL import Image
-    HAS_PIL = True
-except ImportError:
-    HAS_PIL = False
-
-try:
-    import trimesh
-    HAS_TRIMESH = True
-except ImportError:
-    HAS_TRIMESH = False
-
-# Optional magic import - fallback if not available
-try:
-    import magic
-    HAS_MAGIC = True
-except ImportError:
-    HAS_MAGIC = False
-    print("Warning: python-magic not available, using filename-based type detection")
+def _get_magic():
+    """Return the python-magic module, or None to fall back to filename detection."""
+    global _warned_no_magic
+    magic = optional_import("magic")
+    if magic is None and not _warned_no_magic:
+        _warned_no_magic = True
+        print("Warning: python-magic not available, using filename-based type detection")
+    return magic
 
 ALLOWED_IMAGE_TYPES = {"image/jpeg", "image/png", "image/webp"}
 ALLOWED_VIDEO_TYPES = {"video/mp4", "video/quicktime", "video/x-msvideo"}
 ALLOWED_MODEL_TYPES = {"model/gltf+json", "model/gltf-binary", "application/octet-stream"}
 ALLOWED_PDF_TYPES = {"application/pdf"}
 
+# Uploads are copied in chunks of this size; no more than one chunk per upload is held in memory
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+# Bytes needed for magic number detection
+MAGIC_HEADER_SIZE = 2048
+
+MIME_BY_EXTENSION = {
+    'jpg': 'image/jpeg', 'jpeg': 'image/jpeg',
+    'png': 'image/png', 'webp': 'image/webp',
+    'mp4': 'video/mp4', 'mov': 'video/quicktime',
+    'avi': 'video/x-msvideo',
+    'gltf': 'model/gltf+json', 'glb': 'model/gltf-binary',
+    'pdf': 'application/pdf'
+}
+
+def detect_mime_type(header: bytes, filename: Optional[str]) -> str:
+    """Detect a MIME type from the first bytes of a file, or its filename without python-magic."""
+    magic = _get_magic()
+    if magic is not None:
+        return magic.from_buffer(header, mime=True)
+    if not filename:
+        return "application/octet-stream"
+    ext = filename.lower().split('.')[-1]
+    return MIME_BY_EXTENSION.get(ext, "application/octet-stream")
+
 def get_file_type(file: UploadFile) -> str:
     """Get the actual MIME type of the uploaded file."""
-    if HAS_MAGIC:
-        # Read first 2048 bytes for magic number detection
-        file.file.seek(0)
-        header = file.file.read(2048)
-        file.file.seek(0)
-        return magic.from_buffer(header, mime=True)
-    else:
-        # Fallback to filename-based detection
-        if not file.filename:
-            return "application/octet-stream"
-        
-        ext = file.filename.lower().split('.')[-1]
-        mime_map = {
-            'jpg': 'image/jpeg', 'jpeg': 'image/jpeg',
-            'png': 'image/png', 'webp': 'image/webp',
-            'mp4': 'video/mp4', 'mov': 'video/quicktime',
-            'avi': 'video/x-msvideo',
-            'gltf': 'model/gltf+json', 'glb': 'model/gltf-binary',
-            'pdf': 'application/pdf'
-        }
-        return mime_map.get(ext, "application/octet-stream")
+    file.file.seek(0)
+    header = file.file.read(MAGIC_HEADER_SIZE)
+    file.file.seek(0)
+    return detect_mime_type(header, file.filename)
 
-def validate_file(file: UploadFile, asset_type: AssetType) -> Dict[str, Any]:
-    """Validate uploaded file based on asset type and constraints."""
-    
-    # Check file size
-    file.file.seek(0, 2)  # Seek to end
-    file_size = file.file.tell()
-    file.file.seek(0)  # Reset to beginning
-    
-    max_size = 0
+def upload_limits(asset_type: AssetType) -> Optional[Tuple[int, Set[str]]]:
+    """Maximum size in bytes and accepted MIME types for an asset type."""
     if asset_type == AssetType.IMAGE:
-        max_size = settings.MAX_IMAGE_SIZE_MB * 1024 * 1024
-        allowed_types = ALLOWED_IMAGE_TYPES
+        return settings.MAX_IMAGE_SIZE_MB * 1024 * 1024, ALLOWED_IMAGE_TYPES
     elif asset_type == AssetType.VIDEO:
-        max_size = settings.MAX_FILE_SIZE_MB * 1024 * 1024
-        allowed_types = ALLOWED_VIDEO_TYPES
+        return settings.MAX_FILE_SIZE_MB * 1024 * 1024, ALLOWED_VIDEO_TYPES
     elif asset_type == AssetType.MODEL_3D:
-        max_size = settings.MAX_MODEL_SIZE_MB * 1024 * 1024
-        allowed_types = ALLOWED_MODEL_TYPES
+        return settings.MAX_MODEL_SIZE_MB * 1024 * 1024, ALLOWED_MODEL_TYPES
     elif asset_type == AssetType.PDF:
-        max_size = settings.MAX_FILE_SIZE_MB * 1024 * 1024
-        allowed_types = ALLOWED_PDF_TYPES
-    else:
+        return settings.MAX_FILE_SIZE_MB * 1024 * 1024, ALLOWED_PDF_TYPES
+    return None
+
+def max_upload_size() -> int:
+    """The largest upload any asset type accepts."""
+    return max(upload_limits(asset_type)[0] for asset_type in AssetType if upload_limits(asset_type))
+
+def check_file_type(detected_type: str, asset_type: AssetType, filename: Optional[str]) -> Optional[str]:
+    """Return an error message if the detected type isn't accepted for the asset type."""
+    allowed_types = upload_limits(asset_type)[1]
+    # Special handling for GLTF files (often detected as application/octet-stream)
+    if asset_type == AssetType.MODEL_3D and filename and filename.lower().endswith(('.gltf', '.glb')):
+        return None
+    if detected_type not in allowed_types:
+        return f"Invalid file type. Expected: {allowed_types}"
+    return None
+
+def _too_large(max_size: int) -> str:
+    return f"File too large. Maximum size is {max_size // (1024*1024)}MB"
+
+def validate_file(file: UploadFile, asset_type: AssetType) -> Dict[str, Any]:
+    """
+    Validate uploaded file based on asset type and constraints.
+    Only looks at the size, the first bytes and (for images) the header; the
+    content itself is checked again while handle_file_upload streams it.
+    """
+    limits = upload_limits(asset_type)
+    if limits is None:
         return {"valid": False, "error": "Unsupported asset type"}
+    max_size, _ = limits
+    
+    # Check file size (known from the multipart parser, otherwise seek to the end)
+    file_size = file.size
+    if file_size is None:
+        file.file.seek(0, 2)
+        file_size = file.file.tell()
+        file.file.seek(0)
     
     if file_size > max_size:
-        return {
-            "valid": False, 
-            "error": f"File too large. Maximum size is {max_size // (1024*1024)}MB"
-        }
+        return {"valid": False, "error": _too_large(max_size)}
     
     # Check MIME type
-    detected_type = get_file_type(file)
-    
-    # Special handling for GLTF files (often detected as application/octet-stream)
-    if asset_type == AssetType.MODEL_3D:
-        if file.filename and (file.filename.endswith('.gltf') or file.filename.endswith('.glb')):
-            # Accept GLTF files even if detected as octet-stream
-            pass
-        elif detected_type not in allowed_types:
-            return {"valid": False, "error": f"Invalid file type. Expected: {allowed_types}"}
-    else:
-        if detected_type not in allowed_types:
-            return {"valid": False, "error": f"Invalid file type. Expected: {allowed_types}"}
+    type_error = check_file_type(get_file_type(file), asset_type, file.filename)
+    if type_error:
+        return {"valid": False, "error": type_error}
     
     # Additional validation for specific types
-    if asset_type == AssetType.IMAGE and HAS_PIL:
+    Image = optional_import("PIL.Image")
+    if asset_type == AssetType.IMAGE and Image is not None:
         try:
+            # Image.open only parses the header; pixels are never decoded here
             file.file.seek(0)
             with Image.open(file.file) as img:
                 width, height = img.size
@@ -116,35 +139,25 @@ def validate_file(file: UploadFile, asset_type: AssetType) -> Dict[str, Any]:
     
     elif asset_type == AssetType.MODEL_3D:
         # Validate 3D model (simplified - in production you'd want more thorough validation)
-        try:
-            file.file.seek(0)
-            file_content = file.file.read()
-            file.file.seek(0)
-            
-            # This is a basic check - in production you'd want to:
-            # 1. Actually load and validate the GLTF/GLB
-            # 2. Check triangle count
-            # 3. Validate textures
-            # 4. Check for malicious content
-            
-            if len(file_content) == 0:
-                return {"valid": False, "error": "Empty model file"}
-                
-        except Exception as e:
-            return {"valid": False, "error": f"Invalid 3D model: {str(e)}"}
+        # This is a basic check - in production you'd want to:
+        # 1. Actually load and validate the GLTF/GLB
+        # 2. Check triangle count
+        # 3. Validate textures
+        # 4. Check for malicious content
+        if file_size == 0:
+            return {"valid": False, "error": "Empty model file"}
     
     return {"valid": True}
 
-def generate_thumbnail(file_path: str, asset_type: AssetType) -> str:
+def generate_thumbnail(file_path: str, asset_type: AssetType, thumbnail_path: Optional[str] = None) -> str:
     """Generate thumbnail for the uploaded asset."""
-    thumbnail_dir = "uploads/thumbnails"
-    os.makedirs(thumbnail_dir, exist_ok=True)
-    
-    file_id = str(uuid.uuid4())
-    thumbnail_path = f"{thumbnail_dir}/{file_id}_thumb.jpg"
+    if thumbnail_path is None:
+        thumbnail_path = f"uploads/thumbnails/{uuid.uuid4()}_thumb.jpg"
+    os.makedirs(os.path.dirname(thumbnail_path), exist_ok=True)
     
+    Image = optional_import("PIL.Image")
     try:
-        if asset_type == AssetType.IMAGE and HAS_PIL:
+        if asset_type == AssetType.IMAGE and Image is not None:
             with Image.open(file_path) as img:
                 # Convert to RGB if necessary
                 if img.mode in ('RGBA', 'P'):
@@ -155,61 +168,179 @@ def generate_thumbnail(file_path: str, asset_type: AssetType) -> str:
                 img.save(thumbnail_path, 'JPEG', quality=85)
                 
         elif asset_type == AssetType.MODEL_3D:
-            # For 3D models, you'd typically render a preview
-            # This is a placeholder - implement actual 3D thumbnail generation
-            # using a headless renderer like Blender or three.js
-            
-            # Create a placeholder thumbnail
-            if HAS_PIL:
+            scene = load_scene(file_path)
+            if scene is not None:
+                render_model_thumbnail(scene, thumbnail_path)
+            elif Image is not None:
+                # No trimesh: fall back to a placeholder
                 placeholder = Image.new('RGB', (400, 400), color='lightgray')
                 placeholder.save(thumbnail_path, 'JPEG')
             
+        elif asset_type == AssetType.VIDEO:
+            if ffmpeg_binary() is None:
+                return None
+            extract_poster(file_path, thumbnail_path, probe_video(file_path)["duration"])
+            
         elif asset_type == AssetType.PDF:
             # For PDFs, render first page as thumbnail
             # This requires additional libraries like pdf2image
             # Placeholder for now
-            if HAS_PIL:
+            if Image is not None:
                 placeholder = Image.new('RGB', (400, 400), color='white')
                 placeholder.save(thumbnail_path, 'JPEG')
             
-        return f"/uploads/thumbnails/{file_id}_thumb.jpg"
+        return f"/{thumbnail_path}"
         
     except Exception as e:
         print(f"Failed to generate thumbnail: {e}")
         return None
 
-def handle_file_upload(file: UploadFile, asset_type: AssetType) -> Dict[str, Any]:
-    """Handle file upload and return file URLs."""
-    
-    # Create uploads directory structure
-    upload_dir = f"uploads/{asset_type.value}"
-    os.makedirs(upload_dir, exist_ok=True)
+class _UploadDigest:
+    """Size, SHA-256 and detected type of an upload, checked chunk by chunk as it is copied."""
+
+    def __init__(self, asset_type: AssetType, filename: Optional[str]):
+        self.asset_type = asset_type
+        self.filename = filename
+        self.max_size, _ = upload_limits(asset_type)
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+        self.detected_type = None
+
+    def update(self, chunk: bytes) -> None:
+        """Raises HTTPException once the type is rejected or the size limit exceeded."""
+        if self.detected_type is None:
+            self.detected_type = detect_mime_type(chunk[:MAGIC_HEADER_SIZE], self.filename)
+            type_error = check_file_type(self.detected_type, self.asset_type, self.filename)
+            if type_error:
+                raise HTTPException(status_code=400, detail=type_error)
+        self.size += len(chunk)
+        if self.size > self.max_size:
+            raise HTTPException(status_code=413, detail=_too_large(self.max_size))
+        self.sha256.update(chunk)
+
+    def result(self) -> Dict[str, Any]:
+        return {"size": self.size, "sha256": self.sha256.hexdigest(), "mime_type": self.detected_type}
+
+async def stream_to_file(file: UploadFile, path: str, asset_type: AssetType) -> Dict[str, Any]:
+    """
+    Copy an upload to `path` in UPLOAD_CHUNK_SIZE chunks, computing its size and
+    SHA-256 and detecting its type from the first chunk as it goes. Stops once the
+    asset type's size limit is exceeded or the type is rejected, removing the
+    partial file. The multipart parser has already received the whole upload by
+    then; BodySizeLimitMiddleware rejects oversized requests before that.
+    """
+    digest = _UploadDigest(asset_type, file.filename)
+    partial_path = f"{path}.part"
     
-    # Generate unique filename
-    file_extension = os.path.splitext(file.filename)[1] if file.filename else ""
-    file_id = str(uuid.uuid4())
-    filename = f"{file_id}{file_extension}"
-    file_path = f"{upload_dir}/{filename}"
+    await file.seek(0)
+    try:
+        async with aiofiles.open(partial_path, "wb") as buffer:
+            while True:
+                chunk = await file.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                await buffer.write(chunk)
+        await aiofiles.os.replace(partial_path, path)
+    except BaseException:
+        if await aiofiles.os.path.exists(partial_path):
+            await aiofiles.os.remove(partial_path)
+        raise
     
-    # Save file
+    return digest.result()
+
+def copy_file(source_path: str, path: str, asset_type: AssetType, filename: Optional[str]) -> Dict[str, Any]:
+    """stream_to_file for a file already on disk (blocking, so run it in the threadpool)."""
+    digest = _UploadDigest(asset_type, filename)
+    partial_path = f"{path}.part"
     try:
-        with open(file_path, "wb") as buffer:
-            content = file.file.read()
-            buffer.write(content)
-            
-        file_size_bytes = len(content)
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to save file: {str(e)}")
+        with open(source_path, "rb") as source, open(partial_path, "wb") as buffer:
+            while chunk := source.read(UPLOAD_CHUNK_SIZE):
+                digest.update(chunk)
+                buffer.write(chunk)
+        os.replace(partial_path, path)
+    except BaseException:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        raise
+    return digest.result()
+
+async def _store(temp_path: str, stored: Dict[str, Any], filename: Optional[str], asset_type: AssetType) -> Dict[str, Any]:
+    """Move a copied upload to its content-addressed path (or drop it as a duplicate)."""
+    file_size_bytes = stored["size"]
+    UPLOAD_BYTES.labels(asset_type.value).inc(file_size_bytes)
+    file_extension = os.path.splitext(filename)[1] if filename else ""
     
-    # Generate thumbnail
-    thumbnail_url = generate_thumbnail(file_path, asset_type)
+    if asset_type == AssetType.MODEL_3D and file_size_bytes == 0:
+        os.remove(temp_path)
+        raise HTTPException(status_code=400, detail="Empty model file")
+    
+    sha256 = stored["sha256"]
+    file_path = find_stored(sha256)
+    deduplicated = file_path is not None
+    if deduplicated:
+        os.remove(temp_path)
+    else:
+        file_path = asset_path(sha256, file_extension)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        os.replace(temp_path, file_path)
+        # With a remote backend the local file stays as processing's working copy
+        storage = get_storage()
+        if not storage.is_local:
+            try:
+                await run_in_threadpool(storage.put_file, file_path, file_path)
+            except Exception as e:
+                os.remove(file_path)
+                raise HTTPException(status_code=502, detail=f"Failed to store file: {str(e)}")
+    
+    # Thumbnails are generated by background media processing; a duplicate
+    # upload already has one
+    thumbnail_url = None
+    if os.path.exists(thumbnail_path(sha256)):
+        thumbnail_url = url_for(thumbnail_path(sha256))
     
     # Return file information
     return {
         "success": True,
-        "asset_url": f"/uploads/{asset_type.value}/{filename}",
+        "asset_url": url_for(file_path),
         "thumbnail_url": thumbnail_url,
         "file_size_bytes": file_size_bytes,
-        "original_filename": file.filename
+        "sha256": sha256,
+        "mime_type": stored["mime_type"],
+        "deduplicated": deduplicated,
+        "original_filename": filename
     }
+
+async def handle_file_upload(file: UploadFile, asset_type: AssetType) -> Dict[str, Any]:
+    """
+    Handle file upload and return file URLs. Files are stored once per content
+    hash, so re-uploading an existing file reuses it and its thumbnail.
+    """
+    
+    os.makedirs(TMP_DIR, exist_ok=True)
+    temp_path = f"{TMP_DIR}/{uuid.uuid4()}"
+    
+    # Save file
+    try:
+        with UPLOAD_DURATION.labels(asset_type.value).time():
+            stored = await stream_to_file(file, temp_path, asset_type)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to save file: {str(e)}")
+    
+    return await _store(temp_path, stored, file.filename, asset_type)
+
+async def handle_local_file(path: str, filename: str, asset_type: AssetType) -> Dict[str, Any]:
+    """handle_file_upload for a file on disk (e.g. an assembled resumable upload), which is left in place."""
+    os.makedirs(TMP_DIR, exist_ok=True)
+    temp_path = f"{TMP_DIR}/{uuid.uuid4()}"
+    try:
+        with UPLOAD_DURATION.labels(asset_type.value).time():
+            stored = await run_in_threadpool(copy_file, path, temp_path, asset_type, filename)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to save file: {str(e)}")
+    
+    return await _store(temp_path, stored, filename, asset_type)
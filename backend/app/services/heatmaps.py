@@ -0,0 +1,156 @@
+import math
+from itertools import chain
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.auth_cache import TTLCache
+from app.core.config import settings
+from app.core.metrics import record_cache_lookup
+from app.core.optional import optional_import
+from app.models.analytics import EventType
+from app.models.artifact import Artifact
+from app.services.analytics_partitions import events_table
+from app.services.artifacts import METERS_PER_DEGREE
+from app.services.exports import BoundingBox, bbox_filter
+
+# Where users stood: event locations binned into a grid of square cells (edges in
+# degrees, sized in meters at the grid's center latitude). Events stream from the
+# database in batches and are binned with NumPy, so memory depends on the grid, not
+# on the number of events. Windows are widened to whole hours and cached per
+# process: briefly while late events can still arrive, for a day afterwards.
+
+HEATMAP_BATCH_SIZE = 50_000
+DEFAULT_CELL_SIZE_M = 5.0
+DEFAULT_RESOLUTION = 128  # Cells along a bbox's longer side
+CLOSED_WINDOW_CACHE_SECONDS = 24 * 3600
+
+_cache = TTLCache(maxsize=256, ttl=CLOSED_WINDOW_CACHE_SECONDS)
+
+def artifact_bbox(artifact: Artifact, radius_meters: float) -> BoundingBox:
+    """A box of ±radius_meters around the artifact (min_lng > max_lng across the antimeridian)."""
+    lat_range = radius_meters / METERS_PER_DEGREE
+    cos_lat = max(math.cos(math.radians(artifact.latitude)), 1e-6)
+    lng_range = min(radius_meters / (METERS_PER_DEGREE * cos_lat), 180)
+    west, east = artifact.longitude - lng_range, artifact.longitude + lng_range
+    if west < -180:
+        west += 360
+    if east > 180:
+        east -= 360
+    return west, max(artifact.latitude - lat_range, -90), east, min(artifact.latitude + lat_range, 90)
+
+def _spans(bbox: BoundingBox) -> Tuple[float, float]:
+    min_lng, min_lat, max_lng, max_lat = bbox
+    lng_span = max_lng - min_lng if min_lng <= max_lng else max_lng - min_lng + 360
+    return lng_span, max_lat - min_lat
+
+def make_grid(bbox: BoundingBox, cell_size_meters: Optional[float] = None, resolution: Optional[int] = None) -> Dict[str, Any]:
+    """Grid over the box with cells of cell_size_meters, or `resolution` cells along its longer side."""
+    min_lng, min_lat, max_lng, max_lat = bbox
+    lng_span, lat_span = _spans(bbox)
+    if lat_span <= 0 or lng_span <= 0:
+        raise HTTPException(status_code=400, detail="bbox must not be empty")
+    cos_lat = max(math.cos(math.radians((min_lat + max_lat) / 2)), 1e-6)
+    if cell_size_meters is None:
+        longer_side = max(lng_span * cos_lat, lat_span) * METERS_PER_DEGREE
+        cell_size_meters = longer_side / (resolution or DEFAULT_RESOLUTION)
+    cell_lat = cell_size_meters / METERS_PER_DEGREE
+    cell_lng = cell_size_meters / (METERS_PER_DEGREE * cos_lat)
+    columns = max(1, math.ceil(lng_span / cell_lng - 1e-9))
+    rows = max(1, math.ceil(lat_span / cell_lat - 1e-9))
+    if columns * rows > settings.ANALYTICS_HEATMAP_MAX_CELLS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"{columns}x{rows} cells; at most {settings.ANALYTICS_HEATMAP_MAX_CELLS}, use larger cells",
+        )
+    return {
+        "min_latitude": min_lat,
+        "min_longitude": min_lng,
+        "cell_size_meters": cell_size_meters,
+        "cell_latitude_degrees": cell_lat,
+        "cell_longitude_degrees": cell_lng,
+        "columns": columns,
+        "rows": rows,
+    }
+
+def _bin(db: Session, query, grid: Dict[str, Any]) -> Any:
+    """Per-cell counts, row-major from the south-west corner."""
+    np = optional_import("numpy")
+    columns, rows = grid["columns"], grid["rows"]
+    counts = np.zeros(columns * rows, dtype=np.int64)
+    # Core rows flattened by fromiter: np.array() over Row objects is several times slower
+    for batch in db.connection().execute(query.execution_options(yield_per=HEATMAP_BATCH_SIZE)).partitions():
+        points = np.fromiter(chain.from_iterable(batch), dtype=np.float64, count=2 * len(batch)).reshape(-1, 2)
+        # The modulo keeps boxes across the antimeridian contiguous
+        column = np.floor(((points[:, 1] - grid["min_longitude"]) % 360) / grid["cell_longitude_degrees"])
+        row = np.floor((points[:, 0] - grid["min_latitude"]) / grid["cell_latitude_degrees"])
+        inside = (column >= 0) & (column < columns) & (row >= 0) & (row < rows)
+        cells = row[inside].astype(np.int64) * columns + column[inside].astype(np.int64)
+        counts += np.bincount(cells, minlength=columns * rows)
+    return counts
+
+def _hour_window(start: datetime, end: datetime) -> Tuple[datetime, datetime]:
+    start, end = (t.replace(tzinfo=timezone.utc) if t.tzinfo is None else t.astimezone(timezone.utc) for t in (start, end))
+    floor = start.replace(minute=0, second=0, microsecond=0)
+    ceiling = end.replace(minute=0, second=0, microsecond=0)
+    if ceiling < end:
+        ceiling += timedelta(hours=1)
+    return floor, ceiling
+
+def get_heatmap(
+    db: Session,
+    bbox: BoundingBox,
+    start: datetime,
+    end: datetime,
+    cell_size_meters: Optional[float] = None,
+    resolution: Optional[int] = None,
+    event_type: Optional[EventType] = None,
+    artifact_id: Optional[int] = None,
+    creator_id: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Counts of events located in each grid cell over the box, for one artifact's
+    events, a creator's artifacts' or all. Only non-empty cells are returned, as
+    parallel arrays of row-major cell indexes and counts.
+    """
+    start, end = _hour_window(start, end)
+    if end <= start:
+        raise HTTPException(status_code=400, detail="end must be after start")
+    grid = make_grid(bbox, cell_size_meters, resolution)
+    key = (tuple(bbox), grid["cell_size_meters"], event_type, artifact_id, creator_id, start, end)
+    cached = _cache.get(key)
+    record_cache_lookup("heatmap", cached is not None)
+    if cached is not None:
+        return cached
+
+    e = events_table(db, start, end).c
+    query = select(e.user_latitude, e.user_longitude).where(
+        e.created_at >= start, e.created_at < end,
+        e.user_latitude.isnot(None), e.user_longitude.isnot(None),
+        bbox_filter(e.user_latitude, e.user_longitude, bbox),
+    )
+    if event_type is not None:
+        query = query.where(e.event_type == event_type)
+    if artifact_id is not None:
+        query = query.where(e.artifact_id == artifact_id)
+    if creator_id is not None:
+        query = query.join(Artifact, Artifact.id == e.artifact_id).where(Artifact.creator_id == creator_id)
+    counts = _bin(db, query, grid)
+
+    cells = counts.nonzero()[0]
+    heatmap = {
+        "start": start,
+        "end": end,
+        **grid,
+        "total_events": int(counts.sum()),
+        "max_count": int(counts.max()),
+        "cells": cells.tolist(),
+        "counts": counts[cells].tolist(),
+    }
+    late_events_until = end + timedelta(hours=settings.ANALYTICS_MAX_EVENT_AGE_HOURS)
+    closed = late_events_until < datetime.now(timezone.utc)
+    _cache.set(key, heatmap, CLOSED_WINDOW_CACHE_SECONDS if closed else settings.ANALYTICS_HEATMAP_CACHE_SECONDS)
+    return heatmap
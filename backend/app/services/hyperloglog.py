@@ -0,0 +1,61 @@
+import hashlib
+import math
+import zlib
+from typing import Iterable, Optional
+
+from app.core.optional import optional_import
+
+# HyperLogLog with 2^PRECISION one-byte registers (4 KB, a few dozen bytes
+# compressed while sparse) over 64-bit hashes. Estimates have a relative standard
+# error of 1.04 / sqrt(2^PRECISION) = 1.6%: within ±3.3% 95% of the time, at any
+# cardinality. Merging two sketches (register-wise max) gives exactly the sketch
+# of the union, so days merge into weeks and artifacts into creators.
+
+PRECISION = 12
+REGISTER_COUNT = 1 << PRECISION
+STANDARD_ERROR = 1.04 / math.sqrt(REGISTER_COUNT)
+_RANK_BITS = 64 - PRECISION
+_ALPHA = 0.7213 / (1 + 1.079 / REGISTER_COUNT)
+
+def hash_value(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+
+class HyperLogLog:
+    def __init__(self, registers=None):
+        np = optional_import("numpy")
+        self.registers = np.zeros(REGISTER_COUNT, dtype=np.uint8) if registers is None else registers
+
+    def add(self, values: Iterable[str]) -> None:
+        np = optional_import("numpy")
+        indexes, ranks = [], []
+        for value in values:
+            hashed = hash_value(value)
+            indexes.append(hashed >> _RANK_BITS)
+            # Position of the first 1 bit in the remaining bits
+            ranks.append(_RANK_BITS - (hashed & ((1 << _RANK_BITS) - 1)).bit_length() + 1)
+        if indexes:
+            np.maximum.at(self.registers, np.array(indexes), np.array(ranks, dtype=np.uint8))
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        np = optional_import("numpy")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def count(self) -> int:
+        np = optional_import("numpy")
+        estimate = _ALPHA * REGISTER_COUNT ** 2 / float(np.ldexp(1.0, -self.registers.astype(np.int32)).sum())
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * REGISTER_COUNT and zeros:
+            # Linear counting is more accurate for small cardinalities
+            estimate = REGISTER_COUNT * math.log(REGISTER_COUNT / zeros)
+        return round(estimate)
+
+    def to_bytes(self) -> bytes:
+        return zlib.compress(self.registers.tobytes())
+
+    @classmethod
+    def from_bytes(cls, data: Optional[bytes]) -> "HyperLogLog":
+        if not data:
+            return cls()
+        np = optional_import("numpy")
+        return cls(np.frombuffer(zlib.decompress(data), dtype=np.uint8).copy())
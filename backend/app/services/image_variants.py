@@ -0,0 +1,70 @@
+import os
+import uuid
+from typing import Any, Dict, List
+
+from app.core.config import settings
+from app.core.optional import optional_import
+from app.services.assets import derivative_path, url_for
+
+# Longest edge in pixels per use; clients pick the smallest rung that covers
+# their display size times the screen density
+IMAGE_VARIANT_LADDER = {
+    "marker": 96,
+    "list": 320,
+    "preview": 1024,
+    "ar_texture": 2048,
+}
+# (Pillow format, file extension, save options)
+IMAGE_VARIANT_FORMATS = {
+    "webp": ("WEBP", ".webp", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", ".jpg", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+def _save_atomic(image, path: str, pillow_format: str, options: Dict[str, Any]) -> int:
+    # Derivative names are deterministic, so concurrent workers may write the same file
+    temp_path = f"{path}.{uuid.uuid4().hex}.part"
+    image.save(temp_path, pillow_format, **options)
+    os.replace(temp_path, path)
+    return os.path.getsize(path)
+
+def generate_image_variants(file_path: str, sha256: str) -> List[Dict[str, Any]]:
+    """
+    Render the image ladder in WebP and JPEG, never upscaling. Each rung is
+    resized from the previous, larger one, so the source is decoded only once.
+    """
+    Image = optional_import("PIL.Image")
+    ImageOps = optional_import("PIL.ImageOps")
+    if Image is None:
+        return []
+
+    os.makedirs(os.path.dirname(derivative_path(sha256, "", "")), exist_ok=True)
+    variants = []
+    with Image.open(file_path) as source:
+        current = ImageOps.exif_transpose(source)
+        if current.mode not in ("RGB", "RGBA"):
+            current = current.convert("RGBA" if "transparency" in current.info else "RGB")
+
+        ladder = sorted(IMAGE_VARIANT_LADDER.items(), key=lambda rung: rung[1], reverse=True)
+        for name, max_edge in ladder:
+            max_edge = min(max_edge, settings.MAX_TEXTURE_SIZE)
+            if max(current.size) > max_edge:
+                current = current.copy()
+                current.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+
+            for format_name, (pillow_format, extension, options) in IMAGE_VARIANT_FORMATS.items():
+                image = current
+                if pillow_format == "JPEG" and image.mode != "RGB":
+                    image = image.convert("RGB")
+                path = derivative_path(sha256, name, extension)
+                size_bytes = _save_atomic(image, path, pillow_format, options)
+                variants.append({
+                    "name": name,
+                    "format": format_name,
+                    "width": image.width,
+                    "height": image.height,
+                    "url": url_for(path),
+                    "size_bytes": size_bytes,
+                })
+
+    # Smallest first, the order clients scan in
+    return sorted(variants, key=lambda v: (v["width"], v["format"]))
@@ -0,0 +1,376 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Iterator, List, Optional
+
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.metrics import MEDIA_PROCESSING_JOBS, THUMBNAIL_DURATION
+from app.core.optional import optional_import
+from app.core.profiling import run_in_threadpool
+from app.models.artifact import Artifact, AssetType, ProcessingStatus
+from app.models.asset import Asset
+from app.services.assets import (
+    publish_asset_files, sha256_from_url, thumbnail_path, url_for, write_precompressed,
+)
+from app.services.file_upload import generate_thumbnail
+from app.services.image_variants import generate_image_variants
+from app.services.model_processing import (
+    ModelParseError, generate_model_variants, inspect_model, load_scene, render_model_thumbnail,
+)
+from app.services.storage import get_storage
+from app.services.video_processing import VideoProbeError, ffmpeg_binary, probe_video, transcode_hls
+
+class MediaValidationError(ValueError):
+    """The file itself is unusable; retrying won't help."""
+
+def local_path(url: str) -> str:
+    """Local working copy of a stored file, fetched first if it's only in remote storage."""
+    storage = get_storage()
+    path = storage.key_for_url(url)
+    if not storage.is_local and not os.path.exists(path):
+        storage.download(path, path)
+    return path
+
+def _verify_image(path: str) -> None:
+    Image = optional_import("PIL.Image")
+    if Image is None:
+        return
+    try:
+        with Image.open(path) as img:
+            # Full decode: truncated or corrupt pixel data only shows up here
+            img.load()
+            if max(img.size) > settings.MAX_TEXTURE_SIZE:
+                raise MediaValidationError(
+                    f"Image too large. Maximum dimension is {settings.MAX_TEXTURE_SIZE}px"
+                )
+    except MediaValidationError:
+        raise
+    except Exception as e:
+        raise MediaValidationError(f"Invalid image file: {e}")
+
+def _process_model(db: Session, artifact: Artifact, path: str, sha256: Optional[str]) -> None:
+    """Record triangle/texture stats, enforce MAX_TRIANGLES, then build LODs and the preview."""
+    try:
+        stats = inspect_model(path)
+        if (stats.get("triangle_count") or 0) > settings.MAX_TRIANGLES:
+            raise MediaValidationError(
+                f"Model too complex: {stats['triangle_count']:,} triangles, "
+                f"maximum is {settings.MAX_TRIANGLES:,}"
+            )
+        artifact.triangle_count = stats.get("triangle_count")
+        artifact.texture_resolution = stats.get("texture_resolution")
+        if not sha256:
+            return
+        if path.endswith(".gltf"):
+            write_precompressed(path)
+
+        if artifact.variants is None:
+            asset = db.query(Asset).filter(Asset.sha256 == sha256).first()
+            if asset is not None and asset.variants is not None:
+                artifact.variants = asset.variants
+            else:
+                scene = load_scene(path)
+                artifact.variants = generate_model_variants(scene, sha256) if scene is not None else []
+                if scene is not None and not artifact.thumbnail_url:
+                    # Reuse the loaded scene rather than loading it again for the thumbnail
+                    with THUMBNAIL_DURATION.labels(artifact.asset_type.value).time():
+                        render_model_thumbnail(scene, thumbnail_path(sha256))
+                    artifact.thumbnail_url = url_for(thumbnail_path(sha256))
+                    db.execute(
+                        update(Asset).where(Asset.sha256 == sha256, Asset.thumbnail_url.is_(None))
+                        .values(thumbnail_url=artifact.thumbnail_url)
+                    )
+    except ModelParseError as e:
+        raise MediaValidationError(str(e))
+
+    db.execute(
+        update(Asset).where(Asset.sha256 == sha256).values(
+            variants=artifact.variants,
+            triangle_count=artifact.triangle_count,
+            texture_resolution=artifact.texture_resolution,
+        )
+    )
+
+def _process_video(db: Session, artifact: Artifact, path: str, sha256: Optional[str]) -> None:
+    """Check the video decodes and build the HLS ladder; preview_url is its master playlist."""
+    if ffmpeg_binary() is None:
+        # Nothing can be derived; the upload is served as is
+        return
+    try:
+        source = probe_video(path)
+    except VideoProbeError as e:
+        raise MediaValidationError(f"Invalid video file: {e}")
+    if artifact.variants is not None or not sha256:
+        return
+
+    asset = db.query(Asset).filter(Asset.sha256 == sha256).first()
+    if asset is not None and asset.variants is not None:
+        artifact.variants, artifact.preview_url = asset.variants, asset.preview_url
+        return
+    artifact.variants = transcode_hls(path, sha256, source) if settings.VIDEO_HLS_ENABLED else []
+    artifact.preview_url = artifact.variants[0]["url"] if artifact.variants else None
+    db.execute(
+        update(Asset).where(Asset.sha256 == sha256)
+        .values(variants=artifact.variants, preview_url=artifact.preview_url)
+    )
+
+def _process(db: Session, artifact: Artifact) -> None:
+    """The work kept off the upload request: full validation, thumbnail and derivatives."""
+    path = local_path(artifact.asset_url)
+    sha256 = sha256_from_url(artifact.asset_url)
+    if artifact.asset_type == AssetType.IMAGE:
+        _verify_image(path)
+        if not artifact.variants and sha256:
+            asset = db.query(Asset).filter(Asset.sha256 == sha256).first()
+            variants = asset.variants if asset and asset.variants else generate_image_variants(path, sha256)
+            artifact.variants = variants
+            db.execute(update(Asset).where(Asset.sha256 == sha256).values(variants=variants))
+    elif artifact.asset_type == AssetType.MODEL_3D:
+        _process_model(db, artifact, path, sha256)
+    elif artifact.asset_type == AssetType.VIDEO:
+        _process_video(db, artifact, path, sha256)
+
+    # Video posters need ffmpeg; without it videos simply have no thumbnail
+    if not artifact.thumbnail_url and (artifact.asset_type != AssetType.VIDEO or ffmpeg_binary()):
+        with THUMBNAIL_DURATION.labels(artifact.asset_type.value).time():
+            thumbnail_url = generate_thumbnail(path, artifact.asset_type, thumbnail_path(sha256) if sha256 else None)
+        if thumbnail_url is None:
+            raise RuntimeError("Thumbnail generation failed")
+        artifact.thumbnail_url = thumbnail_url
+        if sha256:
+            db.execute(
+                update(Asset).where(Asset.sha256 == sha256, Asset.thumbnail_url.is_(None))
+                .values(thumbnail_url=thumbnail_url)
+            )
+
+    if sha256:
+        publish_asset_files(sha256)
+
+def _stale_before() -> datetime:
+    return datetime.now(timezone.utc) - timedelta(seconds=settings.MEDIA_PROCESSING_STALE_SECONDS)
+
+def is_stalled(artifact: Artifact) -> bool:
+    """Whether a PROCESSING artifact's worker stopped heartbeating (it died with its process)."""
+    heartbeat = artifact.processing_heartbeat_at
+    if heartbeat is None:
+        return True
+    if heartbeat.tzinfo is None:
+        heartbeat = heartbeat.replace(tzinfo=timezone.utc)
+    return heartbeat < _stale_before()
+
+def _claim(db: Session, artifact_id: int) -> bool:
+    """
+    Mark a PENDING (or stalled PROCESSING) artifact as PROCESSING. Compare-and-set, so a
+    job queued twice (e.g. requeued by recover_stalled_jobs) is only run once.
+    """
+    claimed = db.execute(
+        update(Artifact)
+        .where(
+            Artifact.id == artifact_id,
+            Artifact.asset_url.is_not(None),
+            or_(
+                Artifact.processing_status == ProcessingStatus.PENDING,
+                (Artifact.processing_status == ProcessingStatus.PROCESSING) & or_(
+                    Artifact.processing_heartbeat_at.is_(None),
+                    Artifact.processing_heartbeat_at < _stale_before(),
+                ),
+            ),
+        )
+        .values(
+            processing_status=ProcessingStatus.PROCESSING,
+            processing_attempts=func.coalesce(Artifact.processing_attempts, 0) + 1,
+            processing_heartbeat_at=datetime.now(timezone.utc),
+        )
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.commit()
+    return claimed == 1
+
+@contextmanager
+def _heartbeat(artifact_id: int) -> Iterator[None]:
+    """Refresh the artifact's heartbeat from a side thread while the job runs."""
+    stopped = threading.Event()
+
+    def beat() -> None:
+        while not stopped.wait(settings.MEDIA_PROCESSING_HEARTBEAT_SECONDS):
+            db = SessionLocal()
+            try:
+                db.execute(
+                    update(Artifact)
+                    .where(Artifact.id == artifact_id, Artifact.processing_status == ProcessingStatus.PROCESSING)
+                    .values(processing_heartbeat_at=datetime.now(timezone.utc))
+                )
+                db.commit()
+            except Exception as e:
+                print(f"Media processing heartbeat for artifact {artifact_id} failed: {e}")
+            finally:
+                db.close()
+
+    thread = threading.Thread(target=beat, name=f"media-heartbeat-{artifact_id}", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stopped.set()
+        thread.join()
+
+def process_artifact_media(artifact_id: int, final_attempt: bool = True) -> Optional[ProcessingStatus]:
+    """
+    Run one processing attempt for an artifact. Failures are recorded on the
+    artifact and re-raised; the artifact is only marked FAILED on the final
+    attempt or when the file is invalid, otherwise it stays PENDING for a retry.
+    Returns None without doing anything when the artifact isn't waiting for
+    processing (already done, or being processed by a live worker).
+    """
+    db = SessionLocal()
+    try:
+        if not _claim(db, artifact_id):
+            return None
+        artifact = db.get(Artifact, artifact_id)
+
+        try:
+            with _heartbeat(artifact_id):
+                _process(db, artifact)
+        except Exception as e:
+            db.rollback()
+            permanent = isinstance(e, MediaValidationError)
+            artifact.processing_status = (
+                ProcessingStatus.FAILED if final_attempt or permanent else ProcessingStatus.PENDING
+            )
+            artifact.processing_error = str(e)
+            db.commit()
+            MEDIA_PROCESSING_JOBS.labels(artifact.asset_type.value, "failed" if permanent else "error").inc()
+            raise
+
+        artifact.processing_status = ProcessingStatus.READY
+        artifact.processing_error = None
+        db.commit()
+        MEDIA_PROCESSING_JOBS.labels(artifact.asset_type.value, "ready").inc()
+        return artifact.processing_status
+    finally:
+        db.close()
+
+def run_with_retries(artifact_id: int) -> None:
+    """Process an artifact, retrying transient failures with exponential backoff."""
+    max_retries = settings.MEDIA_PROCESSING_MAX_RETRIES
+    for attempt in range(max_retries + 1):
+        try:
+            process_artifact_media(artifact_id, final_attempt=attempt == max_retries)
+            return
+        except MediaValidationError:
+            return
+        except Exception as e:
+            if attempt == max_retries:
+                print(f"Media processing for artifact {artifact_id} failed: {e}")
+                return
+            time.sleep(settings.MEDIA_PROCESSING_RETRY_DELAY_SECONDS * 2 ** attempt)
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.MEDIA_PROCESSING_WORKERS, thread_name_prefix="media"
+            )
+        return _executor
+
+def enqueue_media_processing(artifact_id: int) -> None:
+    """Queue an artifact's media for processing; call after the artifact is committed."""
+    backend = settings.MEDIA_PROCESSING_BACKEND
+    if backend == "celery":
+        from app.worker import process_artifact_media_task
+        process_artifact_media_task.delay(artifact_id)
+    elif backend == "inline":
+        run_with_retries(artifact_id)
+    else:
+        _get_executor().submit(run_with_retries, artifact_id)
+
+def recover_stalled_jobs(db: Session, pending_idle_seconds: float = 0) -> List[int]:
+    """
+    Requeue jobs lost with the process that held them: PENDING artifacts untouched for
+    `pending_idle_seconds` and PROCESSING ones whose heartbeat went stale. Jobs still
+    queued elsewhere are harmless duplicates, the claim lets only one of them run.
+    """
+    pending_before = datetime.now(timezone.utc) - timedelta(seconds=pending_idle_seconds)
+    artifact_ids = db.execute(
+        select(Artifact.id)
+        .where(
+            Artifact.asset_url.is_not(None),
+            or_(
+                (Artifact.processing_status == ProcessingStatus.PENDING)
+                & (func.coalesce(Artifact.updated_at, Artifact.created_at) <= pending_before),
+                (Artifact.processing_status == ProcessingStatus.PROCESSING) & or_(
+                    Artifact.processing_heartbeat_at.is_(None),
+                    Artifact.processing_heartbeat_at < _stale_before(),
+                ),
+            ),
+        )
+        .order_by(Artifact.id)
+    ).scalars().all()
+    for artifact_id in artifact_ids:
+        enqueue_media_processing(artifact_id)
+    return list(artifact_ids)
+
+_recovery_thread: Optional[threading.Thread] = None
+_recovery_stopped = threading.Event()
+
+def _run_recovery() -> None:
+    # Right after startup every PENDING job is an orphan of the previous process;
+    # later, only those left idle long enough not to be sitting in a queue
+    pending_idle_seconds = 0.0
+    while True:
+        db = SessionLocal()
+        try:
+            requeued = recover_stalled_jobs(db, pending_idle_seconds)
+            if requeued:
+                print(f"Requeued media processing for {len(requeued)} artifacts")
+        except Exception as e:
+            print(f"Media processing recovery failed: {e}")
+        finally:
+            db.close()
+        pending_idle_seconds = settings.MEDIA_PROCESSING_STALE_SECONDS
+        if _recovery_stopped.wait(settings.MEDIA_PROCESSING_RECOVERY_INTERVAL_SECONDS):
+            return
+
+def start_recovery() -> None:
+    """Requeue lost jobs now and then periodically; call once the app has started."""
+    global _recovery_thread
+    # Inline processing would run the whole backlog on the caller's thread
+    if settings.MEDIA_PROCESSING_BACKEND == "inline" or _recovery_thread is not None:
+        return
+    _recovery_stopped.clear()
+    _recovery_thread = threading.Thread(target=_run_recovery, name="media-recovery", daemon=True)
+    _recovery_thread.start()
+
+def shutdown() -> None:
+    global _executor, _recovery_thread
+    _recovery_stopped.set()
+    _recovery_thread = None
+    with _executor_lock:
+        if _executor is not None:
+            # Cancelled jobs stay PENDING (or PROCESSING until stale) and are requeued
+            # by the next process's start_recovery()
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+async def wait_for_processing(
+    db: Session, artifact: Artifact, timeout: float, poll_interval: float = 0.25
+) -> None:
+    """Wait until the artifact's media is ready or failed, or `timeout` seconds pass."""
+    deadline = time.monotonic() + timeout
+    while artifact.processing_status in (ProcessingStatus.PENDING, ProcessingStatus.PROCESSING):
+        if time.monotonic() >= deadline:
+            return
+        await asyncio.sleep(poll_interval)
+        await run_in_threadpool(db.refresh, artifact)
@@ -0,0 +1,379 @@
+import base64
+import io
+import math
+import os
+import uuid
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+from app.core.optional import optional_import
+from app.services.assets import derivative_path, url_for
+
+# (name, fraction of triangles kept, max texture edge in px). Levels that would end
+# up under MIN_LOD_TRIANGLES are skipped: small models don't need them.
+MODEL_LOD_LADDER = [
+    ("lod1", 0.5, 1024),
+    ("lod2", 0.2, 512),
+    ("lod3", 0.05, 256),
+]
+MIN_LOD_TRIANGLES = 500
+# Thumbnails are rendered from a decimated copy of the scene
+THUMBNAIL_MAX_TRIANGLES = 20000
+
+_TEXTURE_SLOTS = (
+    "baseColorTexture", "metallicRoughnessTexture", "normalTexture",
+    "occlusionTexture", "emissiveTexture",
+)
+_MATERIAL_FIELDS = (
+    "name", "baseColorFactor", "emissiveFactor", "metallicFactor", "roughnessFactor",
+    "doubleSided", "alphaMode", "alphaCutoff",
+)
+
+class ModelParseError(ValueError):
+    """The file isn't a readable glTF model."""
+
+def _image_bytes(gltf, image) -> Optional[bytes]:
+    """Bytes of an embedded glTF image; None for external files, which uploads can't carry."""
+    if image.bufferView is not None:
+        view = gltf.bufferViews[image.bufferView]
+        start = view.byteOffset or 0
+        return gltf.binary_blob()[start:start + view.byteLength]
+    if image.uri and image.uri.startswith("data:"):
+        return base64.b64decode(image.uri.split(",", 1)[1])
+    return None
+
+def _primitive_triangles(gltf, primitive) -> int:
+    mode = 4 if primitive.mode is None else primitive.mode
+    if primitive.indices is not None:
+        count = gltf.accessors[primitive.indices].count
+    elif primitive.attributes.POSITION is not None:
+        count = gltf.accessors[primitive.attributes.POSITION].count
+    else:
+        return 0
+    if mode == 4:  # TRIANGLES
+        return count // 3
+    if mode in (5, 6):  # TRIANGLE_STRIP, TRIANGLE_FAN
+        return max(count - 2, 0)
+    return 0  # Points and lines
+
+def inspect_model(file_path: str) -> Dict[str, Any]:
+    """
+    Triangle and texture statistics of a GLB/glTF file, read from its accessors and
+    image headers without decoding any geometry or pixels.
+    """
+    pygltflib = optional_import("pygltflib")
+    Image = optional_import("PIL.Image")
+    if pygltflib is None:
+        return {}
+    try:
+        gltf = pygltflib.GLTF2().load(file_path)
+    except Exception as e:
+        raise ModelParseError(f"Invalid glTF file: {e}")
+
+    try:
+        mesh_triangles = [
+            sum(_primitive_triangles(gltf, primitive) for primitive in mesh.primitives)
+            for mesh in gltf.meshes
+        ]
+        # Meshes instanced by several nodes are drawn (and paid for) once per node
+        instanced = [node.mesh for node in gltf.nodes if node.mesh is not None]
+        triangle_count = sum(mesh_triangles[i] for i in instanced) if instanced else sum(mesh_triangles)
+    except (IndexError, TypeError) as e:
+        raise ModelParseError(f"Invalid glTF file: dangling accessor or mesh reference ({e})")
+
+    texture_sizes = []
+    if Image is not None:
+        for index, image in enumerate(gltf.images):
+            # Corrupt or unreadable embedded textures (UnidentifiedImageError is an
+            # OSError, bad base64 a ValueError) are a broken file, not a transient failure
+            try:
+                data = _image_bytes(gltf, image)
+                if data:
+                    with Image.open(io.BytesIO(data)) as img:
+                        texture_sizes.append(img.size)
+            except (OSError, ValueError, IndexError) as e:
+                raise ModelParseError(f"Invalid texture {index} in glTF file ({type(e).__name__})")
+
+    return {
+        "triangle_count": triangle_count,
+        "texture_count": len(gltf.images),
+        "texture_resolution": max((max(size) for size in texture_sizes), default=None),
+    }
+
+def decimate(mesh, target_faces: int):
+    """
+    Simplify a mesh to at most about `target_faces` triangles by vertex clustering:
+    vertices falling in the same grid cell (and, for textured meshes, the same UV
+    cell, which keeps texture seams apart) are merged. The grid resolution is
+    binary-searched to land just under the target.
+    """
+    np = optional_import("numpy")
+    trimesh = optional_import("trimesh")
+    if len(mesh.faces) <= target_faces:
+        return mesh
+
+    vertices = mesh.vertices
+    faces = mesh.faces
+    uv = getattr(mesh.visual, "uv", None)
+    extent = float(np.ptp(vertices, axis=0).max()) or 1.0
+    origin = vertices.min(axis=0)
+
+    def cluster(resolution: int):
+        keys = np.floor((vertices - origin) / extent * resolution).astype(np.int64)
+        if uv is not None:
+            keys = np.hstack([keys, np.floor(uv * resolution).astype(np.int64)])
+        _, inverse = np.unique(keys, axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        clustered = inverse[faces]
+        keep = (
+            (clustered[:, 0] != clustered[:, 1])
+            & (clustered[:, 1] != clustered[:, 2])
+            & (clustered[:, 0] != clustered[:, 2])
+        )
+        clustered = clustered[keep]
+        # Faces collapsed onto the same three clusters are duplicates
+        _, unique_rows = np.unique(np.sort(clustered, axis=1), axis=0, return_index=True)
+        return inverse, clustered[np.sort(unique_rows)]
+
+    low, high = 1, max(2, int(math.sqrt(len(faces))) * 4)
+    best = None
+    while low <= high:
+        resolution = (low + high) // 2
+        inverse, clustered = cluster(resolution)
+        if len(clustered) <= target_faces:
+            best = (inverse, clustered)
+            low = resolution + 1
+        else:
+            high = resolution - 1
+    if best is None:
+        best = cluster(1)
+    inverse, clustered = best
+
+    counts = np.bincount(inverse)[:, None]
+
+    def cluster_mean(values):
+        return np.column_stack([
+            np.bincount(inverse, weights=values[:, i]) for i in range(values.shape[1])
+        ]) / counts
+
+    visual = None
+    if uv is not None:
+        visual = trimesh.visual.TextureVisuals(uv=cluster_mean(uv), material=mesh.visual.material)
+    simplified = trimesh.Trimesh(
+        vertices=cluster_mean(vertices), faces=clustered, visual=visual, process=False
+    )
+    simplified.remove_unreferenced_vertices()
+    return simplified
+
+def _downscaled_material(material, max_size: int, cache: Dict):
+    """A copy of a PBR material with every texture fitted within `max_size`."""
+    PBRMaterial = optional_import("trimesh.visual.material").PBRMaterial
+    Image = optional_import("PIL.Image")
+    if not isinstance(material, PBRMaterial):
+        return material
+    fields = {name: getattr(material, name) for name in _MATERIAL_FIELDS}
+    for slot in _TEXTURE_SLOTS:
+        texture = getattr(material, slot)
+        if texture is not None and max(texture.size) > max_size:
+            # Materials often share textures; resize each one once per size
+            key = (id(texture), max_size)
+            if key not in cache:
+                resized = texture.copy()
+                resized.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
+                cache[key] = resized
+            texture = cache[key]
+        fields[slot] = texture
+    return PBRMaterial(**fields)
+
+def _max_texture_size(scene) -> int:
+    sizes = [
+        max(getattr(geometry.visual.material, slot).size)
+        for geometry in scene.geometry.values()
+        if getattr(geometry.visual, "material", None) is not None
+        for slot in _TEXTURE_SLOTS
+        if getattr(geometry.visual.material, slot, None) is not None
+    ]
+    return max(sizes, default=0)
+
+def _scene_triangles(scene) -> int:
+    return sum(
+        len(scene.geometry[name].faces)
+        for _, name in (scene.graph[node] for node in scene.graph.nodes_geometry)
+        if hasattr(scene.geometry[name], "faces")
+    )
+
+def _derived_scene(scene, ratio: float, max_texture_size: int, texture_cache: Dict):
+    """The scene with every mesh decimated to `ratio` and textures capped at `max_texture_size`."""
+    trimesh = optional_import("trimesh")
+    derived = trimesh.Scene()
+    meshes = {}
+    for name, geometry in scene.geometry.items():
+        if not isinstance(geometry, trimesh.Trimesh):
+            continue
+        mesh = decimate(geometry, max(4, int(len(geometry.faces) * ratio)))
+        if mesh is geometry:
+            mesh = geometry.copy()
+        material = getattr(mesh.visual, "material", None)
+        if material is not None:
+            mesh.visual.material = _downscaled_material(material, max_texture_size, texture_cache)
+        meshes[name] = mesh
+    # Node hierarchy is flattened; each instance keeps its world transform
+    for node in scene.graph.nodes_geometry:
+        transform, name = scene.graph[node]
+        if name not in meshes:
+            continue
+        if name in derived.geometry:
+            # Another instance of a mesh already added: reference it, don't store it twice
+            derived.graph.update(frame_to=node, matrix=transform, geometry=name)
+        else:
+            derived.add_geometry(meshes[name], node_name=node, geom_name=name, transform=transform)
+    return derived
+
+def _write_atomic(data: bytes, path: str) -> None:
+    temp_path = f"{path}.{uuid.uuid4().hex}.part"
+    with open(temp_path, "wb") as f:
+        f.write(data)
+    os.replace(temp_path, path)
+
+def load_scene(file_path: str):
+    """The model as a trimesh Scene, or None without trimesh."""
+    trimesh = optional_import("trimesh")
+    if trimesh is None:
+        return None
+    try:
+        return trimesh.load(file_path, force="scene")
+    except Exception as e:
+        raise ModelParseError(f"Invalid glTF file: {e}")
+
+def generate_model_variants(scene, sha256: str) -> List[Dict[str, Any]]:
+    """
+    Write decimated LODs as GLB, plus an `optimized` full-detail copy when embedded
+    textures exceed MODEL_TEXTURE_MAX_SIZE. Returned most detailed first.
+    """
+    os.makedirs(os.path.dirname(derivative_path(sha256, "", "")), exist_ok=True)
+    triangles = _scene_triangles(scene)
+    texture_size = _max_texture_size(scene)
+    texture_cache: Dict = {}
+
+    levels = []
+    if texture_size > settings.MODEL_TEXTURE_MAX_SIZE:
+        levels.append(("optimized", 1.0, settings.MODEL_TEXTURE_MAX_SIZE))
+    levels += [
+        (name, ratio, min(max_size, settings.MODEL_TEXTURE_MAX_SIZE))
+        for name, ratio, max_size in MODEL_LOD_LADDER
+        if triangles * ratio >= MIN_LOD_TRIANGLES
+    ]
+
+    variants = []
+    for name, ratio, max_size in levels:
+        derived = _derived_scene(scene, ratio, max_size, texture_cache)
+        path = derivative_path(sha256, name, ".glb")
+        _write_atomic(derived.export(file_type="glb"), path)
+        variants.append({
+            "name": name,
+            "format": "glb",
+            "url": url_for(path),
+            "size_bytes": os.path.getsize(path),
+            "triangle_count": _scene_triangles(derived),
+            "texture_resolution": min(texture_size, max_size) or None,
+        })
+    return variants
+
+def _face_colors(mesh):
+    """Per-face RGB in 0..1: the base color texture sampled at each face's UV centroid."""
+    np = optional_import("numpy")
+    PBRMaterial = optional_import("trimesh.visual.material").PBRMaterial
+    visual = mesh.visual
+    default = np.tile([0.72, 0.74, 0.78], (len(mesh.faces), 1))
+
+    if visual.kind == "texture":
+        material = visual.material
+        if not isinstance(material, PBRMaterial):
+            return default
+        factor = (
+            np.asarray(material.baseColorFactor[:3]) / 255.0
+            if material.baseColorFactor is not None else np.ones(3)
+        )
+        texture = material.baseColorTexture
+        if texture is None or visual.uv is None:
+            return np.tile(factor, (len(mesh.faces), 1))
+        texture = texture.convert("RGB")
+        texture.thumbnail((256, 256))
+        pixels = np.asarray(texture, dtype=np.float64) / 255.0
+        height, width = pixels.shape[:2]
+        centroids = visual.uv[mesh.faces].mean(axis=1) % 1.0
+        x = (centroids[:, 0] * (width - 1)).astype(int)
+        y = ((1.0 - centroids[:, 1]) * (height - 1)).astype(int)
+        return pixels[y, x] * factor
+    if visual.kind in ("face", "vertex"):
+        return visual.face_colors[:, :3] / 255.0
+    return default
+
+def render_model_thumbnail(scene, thumbnail_path: str, size: int = 400) -> None:
+    """
+    Render a shaded three-quarter view of the scene to a JPEG with a small software
+    rasterizer (painter's algorithm, Lambert shading), so no GPU or display is needed.
+    """
+    np = optional_import("numpy")
+    trimesh = optional_import("trimesh")
+    Image = optional_import("PIL.Image")
+    ImageDraw = optional_import("PIL.ImageDraw")
+
+    total = _scene_triangles(scene) or 1
+    triangles, colors = [], []
+    for node in scene.graph.nodes_geometry:
+        transform, name = scene.graph[node]
+        mesh = scene.geometry[name]
+        if not isinstance(mesh, trimesh.Trimesh) or not len(mesh.faces):
+            continue
+        budget = max(4, THUMBNAIL_MAX_TRIANGLES * len(mesh.faces) // total)
+        mesh = decimate(mesh, budget)
+        triangles.append(trimesh.transform_points(mesh.vertices, transform)[mesh.faces])
+        colors.append(_face_colors(mesh))
+    if not triangles:
+        raise ModelParseError("Model has no triangle meshes")
+    triangles = np.concatenate(triangles)
+    colors = np.concatenate(colors)
+
+    # glTF is Y-up: turn 35 degrees around Y, then tilt 25 degrees towards the viewer
+    yaw, pitch = math.radians(35), math.radians(25)
+    rotate_y = np.array([
+        [math.cos(yaw), 0, math.sin(yaw)], [0, 1, 0], [-math.sin(yaw), 0, math.cos(yaw)],
+    ])
+    rotate_x = np.array([
+        [1, 0, 0], [0, math.cos(pitch), -math.sin(pitch)], [0, math.sin(pitch), math.cos(pitch)],
+    ])
+    points = triangles.reshape(-1, 3)
+    points = (points - (points.min(axis=0) + points.max(axis=0)) / 2) @ (rotate_x @ rotate_y).T
+    triangles = points.reshape(-1, 3, 3)
+
+    normals = np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])
+    lengths = np.linalg.norm(normals, axis=1)
+    valid = lengths > 0
+    normals[valid] /= lengths[valid, None]
+    light = np.array([0.4, 0.6, 0.7])
+    light /= np.linalg.norm(light)
+    # abs(): tolerate inconsistent winding instead of rendering faces black
+    shade = 0.35 + 0.65 * np.abs(normals @ light)
+    fills = np.clip(colors * shade[:, None] * 255, 0, 255).astype(np.uint8)
+
+    # Render at twice the size and downsample, for antialiased edges
+    canvas = size * 2
+    span = float(max(np.ptp(points[:, 0]), np.ptp(points[:, 1]))) or 1.0
+    scale = canvas * 0.85 / span
+    screen = np.empty(triangles.shape[:2] + (2,))
+    screen[..., 0] = canvas / 2 + triangles[..., 0] * scale
+    screen[..., 1] = canvas / 2 - triangles[..., 1] * scale
+
+    image = Image.new("RGB", (canvas, canvas), (242, 242, 242))
+    draw = ImageDraw.Draw(image)
+    # The camera looks down -Z: draw the farthest (lowest z) faces first
+    for i in np.argsort(triangles[..., 2].mean(axis=1)):
+        if valid[i]:
+            draw.polygon([tuple(p) for p in screen[i]], fill=tuple(int(c) for c in fills[i]))
+    image = image.resize((size, size), Image.Resampling.LANCZOS)
+
+    os.makedirs(os.path.dirname(thumbnail_path), exist_ok=True)
+    temp_path = f"{thumbnail_path}.{uuid.uuid4().hex}.part"
+    image.save(temp_path, "JPEG", quality=85)
+    os.replace(temp_path, thumbnail_path)
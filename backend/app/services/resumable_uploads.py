@@ -0,0 +1,213 @@
+import asyncio
+import os
+import uuid
+import weakref
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Dict, List, Tuple
+from urllib.parse import unquote_plus
+
+import aiofiles
+import aiofiles.os
+from fastapi import HTTPException
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+from starlette.datastructures import UploadFile
+
+from app.core.config import settings
+from app.core.profiling import run_in_threadpool
+from app.models.artifact import AssetType
+from app.models.upload_session import UploadSession
+from app.services.assets import TMP_DIR, register_asset
+from app.services.file_upload import (
+    MAGIC_HEADER_SIZE, MIME_BY_EXTENSION, _too_large, check_file_type, detect_mime_type,
+    handle_local_file, upload_limits, validate_file,
+)
+from app.services.storage import get_storage
+
+SESSION_DIR = f"{TMP_DIR}/sessions"
+
+# One writer per session: requests in this process queue on the asyncio lock,
+# requests in other worker processes are turned away by lock_session's row lock
+_session_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+def session_path(upload_id: str) -> str:
+    return f"{SESSION_DIR}/{upload_id}.part"
+
+def session_lock(upload_id: str) -> asyncio.Lock:
+    lock = _session_locks.get(upload_id)
+    if lock is None:
+        lock = _session_locks[upload_id] = asyncio.Lock()
+    return lock
+
+def lock_session(db: Session, upload: UploadSession) -> None:
+    """
+    Reload the session row locked FOR UPDATE until the next commit or rollback, so
+    another worker process can't write or finalize it meanwhile (409 if one is).
+    """
+    try:
+        db.query(UploadSession).filter(UploadSession.id == upload.id).with_for_update(nowait=True).populate_existing().one()
+    except OperationalError:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Upload session is in use by another request")
+
+def _expiry() -> datetime:
+    return datetime.now(timezone.utc) + timedelta(hours=settings.UPLOAD_SESSION_TTL_HOURS)
+
+def create_session(
+    db: Session, creator_id: int, asset_type: AssetType, filename: str, upload_length: int,
+    direct: bool = False,
+) -> UploadSession:
+    """
+    Start a session; the size limit is checked up front, the file type on the first
+    chunk (or, for a direct upload, when it is finalized).
+    """
+    limits = upload_limits(asset_type)
+    if limits is None:
+        raise HTTPException(status_code=400, detail="Unsupported asset type")
+    if upload_length > limits[0]:
+        raise HTTPException(status_code=413, detail=_too_large(limits[0]))
+
+    upload = UploadSession(
+        id=str(uuid.uuid4()),
+        creator_id=creator_id,
+        asset_type=asset_type,
+        filename=os.path.basename(filename),
+        upload_length=upload_length,
+        upload_offset=0,
+        expires_at=_expiry(),
+    )
+    if direct:
+        upload.storage_key = session_path(upload.id)
+    os.makedirs(SESSION_DIR, exist_ok=True)
+    open(session_path(upload.id), "wb").close()
+    db.add(upload)
+    db.commit()
+    db.refresh(upload)
+    return upload
+
+async def append_chunk(upload: UploadSession, chunks: AsyncIterator[bytes]) -> None:
+    """
+    Write a PATCH body to the session file at upload.upload_offset. Bytes beyond the
+    recorded offset (from a PATCH that was cut off before it was recorded) are
+    discarded first. If the client disconnects mid-body, whatever reached the file
+    stays; the caller records the new offset from the file size either way.
+    """
+    offset = upload.upload_offset
+    position = offset
+    async with aiofiles.open(session_path(upload.id), "r+b") as f:
+        await f.truncate(offset)
+        await f.seek(offset)
+        try:
+            async for chunk in chunks:
+                if not chunk:
+                    continue
+                if position + len(chunk) > upload.upload_length:
+                    raise HTTPException(status_code=413, detail="Chunk exceeds Upload-Length")
+                if position == 0:
+                    detected_type = detect_mime_type(chunk[:MAGIC_HEADER_SIZE], upload.filename)
+                    type_error = check_file_type(detected_type, upload.asset_type, upload.filename)
+                    if type_error:
+                        raise HTTPException(status_code=400, detail=type_error)
+                    upload.mime_type = detected_type
+                await f.write(chunk)
+                position += len(chunk)
+        except HTTPException:
+            await f.truncate(offset)
+            raise
+
+def presign_direct_upload(upload: UploadSession) -> Dict[str, Any]:
+    """Presigned PUT for a direct upload; the Content-Type follows the file name."""
+    extension = os.path.splitext(upload.filename)[1].lstrip(".").lower()
+    content_type = MIME_BY_EXTENSION.get(extension, "application/octet-stream")
+    presigned = get_storage().presigned_put(upload.storage_key, content_type, upload.upload_length)
+    return {
+        "upload_url": presigned["url"],
+        "upload_method": presigned["method"],
+        "upload_headers": presigned["headers"],
+        "upload_url_expires_at": datetime.now(timezone.utc) + timedelta(seconds=settings.PRESIGNED_URL_EXPIRE_SECONDS),
+    }
+
+def record_offset(db: Session, upload: UploadSession) -> int:
+    """Store how far the session file got (after a complete or interrupted PATCH)."""
+    upload.upload_offset = os.path.getsize(session_path(upload.id))
+    upload.expires_at = _expiry()
+    db.commit()
+    return upload.upload_offset
+
+def _validate(path: str, upload: UploadSession) -> None:
+    with open(path, "rb") as f:
+        file = UploadFile(file=f, filename=upload.filename, size=upload.upload_length)
+        validation_result = validate_file(file, upload.asset_type)
+    if not validation_result["valid"]:
+        raise HTTPException(status_code=400, detail=validation_result["error"])
+
+async def finalize_session(db: Session, upload: UploadSession) -> Dict[str, Any]:
+    """
+    Hand the assembled file to the regular upload path: validate_file and
+    handle_local_file, which stores it by content hash. Registers the asset so
+    the artifact can be created with asset_sha256. The file is only read in the
+    threadpool.
+    """
+    path = session_path(upload.id)
+    await run_in_threadpool(_validate, path, upload)
+    upload_result = await handle_local_file(path, upload.filename, upload.asset_type)
+
+    def _complete() -> None:
+        register_asset(db, upload_result, upload.asset_type)
+        upload.asset_sha256 = upload_result["sha256"]
+        upload.mime_type = upload_result["mime_type"] or upload.mime_type
+        upload.completed_at = datetime.now(timezone.utc)
+        db.commit()
+
+    await run_in_threadpool(_complete)
+    await aiofiles.os.remove(path)
+    return upload_result
+
+async def finalize_direct_session(db: Session, upload: UploadSession) -> Dict[str, Any]:
+    """
+    Finalize a direct upload once its object is complete in storage. With a remote
+    backend the object is fetched for validation and deleted afterwards.
+    """
+    storage = get_storage()
+    size = await run_in_threadpool(storage.size, upload.storage_key)
+    if size != upload.upload_length:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Upload incomplete: {size or 0} of {upload.upload_length} bytes stored",
+        )
+    if not storage.is_local:
+        await run_in_threadpool(storage.download, upload.storage_key, session_path(upload.id))
+    upload.upload_offset = size
+    upload_result = await finalize_session(db, upload)
+    if not storage.is_local:
+        await run_in_threadpool(storage.delete, upload.storage_key)
+    return upload_result
+
+def sessions_for_storage_event(db: Session, event: Dict[str, Any]) -> List[UploadSession]:
+    """Open direct-upload sessions whose object an S3/MinIO ObjectCreated notification reports."""
+    keys = [
+        unquote_plus(record.get("s3", {}).get("object", {}).get("key", ""))
+        for record in event.get("Records", [])
+        if record.get("eventName", "").removeprefix("s3:").startswith("ObjectCreated")
+    ]
+    if not keys:
+        return []
+    return db.query(UploadSession).filter(
+        UploadSession.storage_key.in_(keys), UploadSession.completed_at.is_(None)
+    ).all()
+
+def collect_expired_sessions(db: Session) -> Tuple[int, int]:
+    """Delete sessions past expires_at and their partial files. Returns (sessions, bytes) removed."""
+    now = datetime.now(timezone.utc)
+    removed, freed = 0, 0
+    for upload in db.query(UploadSession).filter(UploadSession.expires_at < now).all():
+        path = session_path(upload.id)
+        if os.path.exists(path):
+            freed += os.path.getsize(path)
+            os.remove(path)
+        if upload.storage_key and not get_storage().is_local:
+            freed += get_storage().delete(upload.storage_key)
+        db.delete(upload)
+        removed += 1
+    db.commit()
+    return removed, freed
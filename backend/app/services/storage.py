@@ -0,0 +1,231 @@
+import hashlib
+import hmac
+import mimetypes
+import os
+import shutil
+import time
+from functools import lru_cache
+from typing import Any, Dict, Optional
+from urllib.parse import urlencode
+
+from app.core.config import settings
+from app.core.optional import optional_import
+from app.core.static_files import IMMUTABLE_CACHE_CONTROL, REVALIDATE_CACHE_CONTROL, is_content_addressed
+
+# Object keys are paths relative to the backend directory ("uploads/assets/ab/<sha>.jpg"),
+# so the local backend keeps the existing on-disk layout and URLs, and an S3 bucket
+# mirrors it. Processing always works on local files: with a remote backend the
+# uploads/ directory is a working cache that is published after each step.
+
+class StorageBackend:
+    """Where uploaded and derived files live, and how clients reach them."""
+
+    is_local = True
+
+    def url(self, key: str) -> str:
+        raise NotImplementedError
+
+    def key_for_url(self, url: str) -> str:
+        """Inverse of url(); URLs from before a backend switch map to their local path."""
+        base = self.url("")
+        return url[len(base):] if url.startswith(base) else url.lstrip("/")
+
+    def size(self, key: str) -> Optional[int]:
+        """Size of the stored object, None when it doesn't exist."""
+        raise NotImplementedError
+
+    def put_file(self, key: str, path: str) -> None:
+        """Store the local file `path` under `key`."""
+        raise NotImplementedError
+
+    def download(self, key: str, path: str) -> None:
+        """Copy the object to the local file `path`."""
+        raise NotImplementedError
+
+    def delete(self, key: str) -> int:
+        """Remove an object if it exists. Returns the bytes freed."""
+        raise NotImplementedError
+
+    def delete_prefix(self, prefix: str) -> int:
+        """Remove every object whose key starts with `prefix`. Returns the bytes freed."""
+        raise NotImplementedError
+
+    def presigned_put(self, key: str, content_type: str, content_length: int) -> Dict[str, Any]:
+        """
+        A URL the client PUTs the file to directly, with the headers it must send.
+        Valid for PRESIGNED_URL_EXPIRE_SECONDS.
+        """
+        raise NotImplementedError
+
+class LocalStorage(StorageBackend):
+    """Files on this node's disk, served by the /uploads mount."""
+
+    def url(self, key: str) -> str:
+        return f"/{key}"
+
+    def size(self, key: str) -> Optional[int]:
+        try:
+            return os.path.getsize(key)
+        except OSError:
+            return None
+
+    def put_file(self, key: str, path: str) -> None:
+        if os.path.abspath(path) != os.path.abspath(key):
+            os.makedirs(os.path.dirname(key), exist_ok=True)
+            shutil.copyfile(path, key)
+
+    def download(self, key: str, path: str) -> None:
+        if os.path.abspath(path) != os.path.abspath(key):
+            shutil.copyfile(key, path)
+
+    def delete(self, key: str) -> int:
+        size = self.size(key)
+        if size is None:
+            return 0
+        os.remove(key)
+        return size
+
+    def delete_prefix(self, prefix: str) -> int:
+        directory, name = os.path.split(prefix)
+        if not os.path.isdir(directory):
+            return 0
+        freed = 0
+        for entry in os.listdir(directory):
+            if not entry.startswith(name):
+                continue
+            path = os.path.join(directory, entry)
+            if os.path.isdir(path):
+                for root, _, files in os.walk(path):
+                    freed += sum(os.path.getsize(os.path.join(root, f)) for f in files)
+                shutil.rmtree(path)
+            else:
+                freed += self.delete(path)
+        return freed
+
+    def presigned_put(self, key: str, content_type: str, content_length: int) -> Dict[str, Any]:
+        # Same contract as S3: the API's PUT /storage/{key} endpoint checks the signature
+        expires = int(time.time()) + settings.PRESIGNED_URL_EXPIRE_SECONDS
+        query = urlencode({
+            "length": content_length,
+            "expires": expires,
+            "signature": sign_local_put(key, content_type, content_length, expires),
+        })
+        return {
+            "url": f"{settings.API_V1_STR}/storage/{key}?{query}",
+            "method": "PUT",
+            "headers": {"Content-Type": content_type},
+        }
+
+def sign_local_put(key: str, content_type: str, content_length: int, expires: int) -> str:
+    message = f"PUT\n{key}\n{content_type}\n{content_length}\n{expires}".encode()
+    return hmac.new(settings.SECRET_KEY.encode(), message, hashlib.sha256).hexdigest()
+
+class S3Storage(StorageBackend):
+    """
+    An S3-compatible bucket (AWS, or MinIO and friends via S3_ENDPOINT_URL).
+    Clients fetch files from S3_PUBLIC_URL (e.g. a CDN in front of the bucket).
+    """
+
+    is_local = False
+
+    def __init__(self) -> None:
+        boto3 = optional_import("boto3")
+        if boto3 is None:
+            raise RuntimeError("STORAGE_BACKEND=s3 requires boto3")
+        if not settings.S3_BUCKET:
+            raise RuntimeError("STORAGE_BACKEND=s3 requires S3_BUCKET")
+        config = optional_import("botocore.config")
+        self.bucket = settings.S3_BUCKET
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=settings.S3_ENDPOINT_URL or None,
+            region_name=settings.AWS_REGION,
+            aws_access_key_id=settings.AWS_ACCESS_KEY_ID or None,
+            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY or None,
+            # Path-style addressing: MinIO doesn't do per-bucket hostnames by default
+            config=config.Config(
+                signature_version="s3v4",
+                s3={"addressing_style": "path" if settings.S3_ENDPOINT_URL else "auto"},
+            ),
+        )
+        if settings.S3_PUBLIC_URL:
+            self.public_url = settings.S3_PUBLIC_URL.rstrip("/")
+        elif settings.S3_ENDPOINT_URL:
+            self.public_url = f"{settings.S3_ENDPOINT_URL.rstrip('/')}/{self.bucket}"
+        else:
+            self.public_url = f"https://{self.bucket}.s3.{settings.AWS_REGION}.amazonaws.com"
+
+    def url(self, key: str) -> str:
+        return f"{self.public_url}/{key}"
+
+    def size(self, key: str) -> Optional[int]:
+        botocore_exceptions = optional_import("botocore.exceptions")
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=key)["ContentLength"]
+        except botocore_exceptions.ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+
+    def put_file(self, key: str, path: str) -> None:
+        extra_args = {"ContentType": mimetypes.guess_type(key)[0] or "application/octet-stream"}
+        if key.startswith("uploads/assets/"):
+            # The content-addressed upload never changes; thumbnails and derivatives are
+            # regenerated in place when reprocessed
+            extra_args["CacheControl"] = (
+                IMMUTABLE_CACHE_CONTROL if is_content_addressed(key) else REVALIDATE_CACHE_CONTROL
+            )
+        for encoding, suffix in (("gzip", ".gz"), ("br", ".br")):
+            if key.endswith(suffix):
+                # Precompressed sibling: served with the type of the file it encodes
+                extra_args["ContentType"] = mimetypes.guess_type(key[:-len(suffix)])[0] or extra_args["ContentType"]
+                extra_args["ContentEncoding"] = encoding
+        self.client.upload_file(path, self.bucket, key, ExtraArgs=extra_args)
+
+    def download(self, key: str, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        temp_path = f"{path}.download"
+        self.client.download_file(self.bucket, key, temp_path)
+        os.replace(temp_path, path)
+
+    def delete(self, key: str) -> int:
+        size = self.size(key)
+        if size is None:
+            return 0
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+        return size
+
+    def delete_prefix(self, prefix: str) -> int:
+        freed = 0
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix):
+            objects = page.get("Contents", [])
+            if objects:
+                self.client.delete_objects(
+                    Bucket=self.bucket,
+                    Delete={"Objects": [{"Key": obj["Key"]} for obj in objects], "Quiet": True},
+                )
+                freed += sum(obj["Size"] for obj in objects)
+        return freed
+
+    def presigned_put(self, key: str, content_type: str, content_length: int) -> Dict[str, Any]:
+        # Content-Length is signed, so S3 rejects a PUT of any other size up front
+        url = self.client.generate_presigned_url(
+            "put_object",
+            Params={"Bucket": self.bucket, "Key": key, "ContentType": content_type, "ContentLength": content_length},
+            ExpiresIn=settings.PRESIGNED_URL_EXPIRE_SECONDS,
+        )
+        return {
+            "url": url,
+            "method": "PUT",
+            "headers": {"Content-Type": content_type, "Content-Length": str(content_length)},
+        }
+
+@lru_cache(maxsize=None)
+def get_storage() -> StorageBackend:
+    """The configured backend (STORAGE_BACKEND: "local" or "s3")."""
+    if settings.STORAGE_BACKEND == "s3":
+        return S3Storage()
+    if settings.STORAGE_BACKEND != "local":
+        raise RuntimeError(f"Unknown STORAGE_BACKEND {settings.STORAGE_BACKEND!r}")
+    return LocalStorage()
@@ -0,0 +1,177 @@
+import enum
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from itertools import islice
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import bindparam, delete, select, tuple_, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app.models.analytics import SketchScope, VisitorSketch
+from app.models.artifact import Artifact
+from app.services.analytics_partitions import archived_rows, events_table, iter_archive
+from app.services.hyperloglog import STANDARD_ERROR, HyperLogLog
+
+# Every written batch of events adds its visitors to the day sketches of their
+# artifacts, the artifacts' creators and the whole site, in the insert's own
+# transaction. Adding a visitor twice changes nothing, so replayed batches don't
+# inflate the counts. Longer periods and several artifacts are counted by merging
+# day sketches, which reads a few KB per day and artifact.
+
+MAX_SKETCH_DAYS = 3660
+REBUILD_BATCH_SIZE = 5000
+
+class VisitorPeriod(str, enum.Enum):
+    DAY = "day"
+    WEEK = "week"  # ISO weeks, starting on Monday
+    MONTH = "month"
+
+_table = VisitorSketch.__table__
+
+@lru_cache(maxsize=1)
+def _empty_sketch() -> bytes:
+    return HyperLogLog().to_bytes()
+
+def _day(value: Any) -> datetime:
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    value = value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+    return value.replace(hour=0, minute=0, second=0, microsecond=0)
+
+def visitor_key(user_id: Optional[int], session_id: Optional[str]) -> Optional[str]:
+    """Who an event counts as: the signed-in user, else the app session."""
+    if user_id is not None:
+        return f"u:{user_id}"
+    if session_id:
+        return f"s:{session_id}"
+    return None
+
+def _insert_missing(connection: Connection, keys: List[Tuple[SketchScope, int, datetime]]) -> None:
+    dialect = postgresql if connection.dialect.name == "postgresql" else sqlite
+    connection.execute(
+        dialect.insert(_table)
+        .values([
+            {"scope": scope, "scope_id": scope_id, "bucket_start": day, "registers": _empty_sketch()}
+            for scope, scope_id, day in keys
+        ])
+        .on_conflict_do_nothing(index_elements=["scope", "scope_id", "bucket_start"])
+    )
+
+def update_sketches(connection: Connection, rows: List[Dict[str, Any]]) -> None:
+    """Add the visitors of a batch of event rows to their day sketches (in the caller's transaction)."""
+    artifact_ids = {row["artifact_id"] for row in rows if row.get("artifact_id") is not None}
+    creators = dict(connection.execute(
+        select(Artifact.id, Artifact.creator_id).where(Artifact.id.in_(artifact_ids))
+    ).all()) if artifact_ids else {}
+
+    visitors: Dict[Tuple[SketchScope, int, datetime], Set[str]] = defaultdict(set)
+    for row in rows:
+        key = visitor_key(row.get("user_id"), row.get("session_id"))
+        if key is None:
+            continue
+        day = _day(row["created_at"])
+        visitors[(SketchScope.ALL, 0, day)].add(key)
+        artifact_id = row.get("artifact_id")
+        if artifact_id is not None:
+            visitors[(SketchScope.ARTIFACT, artifact_id, day)].add(key)
+            if creators.get(artifact_id) is not None:
+                visitors[(SketchScope.CREATOR, creators[artifact_id], day)].add(key)
+    if not visitors:
+        return
+
+    # Create missing sketches, then lock them all in one fixed order so concurrent
+    # flushes queue up instead of deadlocking
+    keys = sorted(visitors)
+    _insert_missing(connection, keys)
+    stored = connection.execute(
+        select(_table.c.id, _table.c.scope, _table.c.scope_id, _table.c.bucket_start, _table.c.registers)
+        .where(tuple_(_table.c.scope, _table.c.scope_id, _table.c.bucket_start).in_(keys))
+        .order_by(_table.c.id)
+        .with_for_update()
+    ).all()
+    changes = []
+    for sketch_id, scope, scope_id, bucket_start, registers in stored:
+        sketch = HyperLogLog.from_bytes(registers)
+        before = sketch.registers.copy()
+        sketch.add(visitors[(scope, scope_id, _day(bucket_start))])
+        if (sketch.registers != before).any():
+            changes.append({"sketch_id": sketch_id, "new_registers": sketch.to_bytes()})
+    if changes:
+        connection.execute(
+            update(_table).where(_table.c.id == bindparam("sketch_id")).values(registers=bindparam("new_registers")),
+            changes,
+        )
+
+def rebuild_sketches(db: Session) -> int:
+    """Recompute all sketches from the stored and archived events. Returns the number of events read."""
+    connection = db.connection()
+    connection.execute(delete(_table))
+    e = events_table(db).c
+    query = select(e.user_id, e.session_id, e.artifact_id, e.created_at).execution_options(
+        yield_per=REBUILD_BATCH_SIZE
+    )
+    read = 0
+    for batch in db.execute(query).mappings().partitions():
+        update_sketches(connection, [dict(row) for row in batch])
+        read += len(batch)
+    for columns in iter_archive():
+        rows = archived_rows(columns)
+        batch = list(islice(rows, REBUILD_BATCH_SIZE))
+        while batch:
+            update_sketches(connection, batch)
+            read += len(batch)
+            batch = list(islice(rows, REBUILD_BATCH_SIZE))
+    db.commit()
+    return read
+
+def _period_start(day: datetime, period: VisitorPeriod) -> datetime:
+    if period == VisitorPeriod.WEEK:
+        return day - timedelta(days=day.weekday())
+    if period == VisitorPeriod.MONTH:
+        return day.replace(day=1)
+    return day
+
+def count_unique_visitors(
+    db: Session,
+    scope: SketchScope,
+    scope_ids: Iterable[int],
+    period: VisitorPeriod,
+    start: datetime,
+    end: datetime,
+) -> Dict[str, Any]:
+    """
+    Estimated distinct visitors per period and over [start, end) (whole UTC days),
+    merged across `scope_ids` (e.g. several artifacts).
+    """
+    start, end = _day(start), _day(end - timedelta(microseconds=1)) + timedelta(days=1)
+    if (end - start).days > MAX_SKETCH_DAYS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_SKETCH_DAYS} days per query")
+
+    total = HyperLogLog()
+    periods: Dict[datetime, HyperLogLog] = defaultdict(HyperLogLog)
+    for bucket_start, registers in db.execute(
+        select(VisitorSketch.bucket_start, VisitorSketch.registers).where(
+            VisitorSketch.scope == scope,
+            VisitorSketch.scope_id.in_(list(scope_ids)),
+            VisitorSketch.bucket_start >= start,
+            VisitorSketch.bucket_start < end,
+        )
+    ):
+        sketch = HyperLogLog.from_bytes(registers)
+        periods[_period_start(_day(bucket_start), period)].merge(sketch)
+        total.merge(sketch)
+    return {
+        "period": period,
+        "start": start,
+        "end": end,
+        "standard_error": STANDARD_ERROR,
+        "unique_visitors": total.count(),
+        "periods": [
+            {"period_start": period_start, "unique_visitors": sketch.count()}
+            for period_start, sketch in sorted(periods.items())
+        ],
+    }
@@ -0,0 +1,176 @@
+import enum
+import math
+import os
+from typing import Any, Callable, Dict, List, Optional
+
+from app.models.artifact import Artifact, AssetType
+
+class DeviceClass(str, enum.Enum):
+    LOW = "low"
+    MID = "mid"
+    HIGH = "high"
+
+# Per device class: screen long edge in px, and the most detail worth sending
+DEVICE_PROFILES = {
+    DeviceClass.LOW: {"screen_px": 1280, "max_texture": 1024, "max_triangles": 50_000, "max_video_height": 540},
+    DeviceClass.MID: {"screen_px": 1920, "max_texture": 2048, "max_triangles": 150_000, "max_video_height": 720},
+    DeviceClass.HIGH: {"screen_px": 2560, "max_texture": 4096, "max_triangles": 500_000, "max_video_height": 1080},
+}
+
+# Camera field of view along the screen's long edge, and the real-world size of an
+# artifact at scale_factor 1
+AR_FIELD_OF_VIEW_DEGREES = 60
+ARTIFACT_BASE_SIZE_M = 1.0
+# With a bandwidth hint, a variant should download within this many seconds
+TARGET_DOWNLOAD_SECONDS = 4
+# Share of the declared bandwidth a video rendition's bitrate may use
+VIDEO_BANDWIDTH_SHARE = 0.8
+PREFERRED_IMAGE_FORMAT = "webp"
+
+class ClientProfile:
+    """What a client declared about itself: device class and, optionally, bandwidth."""
+
+    def __init__(self, device_class: DeviceClass = DeviceClass.MID, bandwidth_kbps: Optional[float] = None):
+        self.device_class = device_class
+        self.bandwidth_kbps = bandwidth_kbps
+
+    @property
+    def limits(self) -> Dict[str, int]:
+        return DEVICE_PROFILES[self.device_class]
+
+    @property
+    def max_bytes(self) -> Optional[float]:
+        if self.bandwidth_kbps is None:
+            return None
+        return self.bandwidth_kbps * 1000 / 8 * TARGET_DOWNLOAD_SECONDS
+
+def client_profile(
+    device_class: Optional[DeviceClass] = None,
+    bandwidth_kbps: Optional[float] = None,
+    save_data: Optional[str] = None,
+    downlink_mbps: Optional[float] = None,
+    device_memory_gb: Optional[float] = None,
+) -> ClientProfile:
+    """
+    Explicit parameters win; otherwise the Save-Data, Downlink and Device-Memory
+    client hints are used, and a mid-range device with unknown bandwidth assumed.
+    """
+    if device_class is None:
+        if save_data and save_data.strip().lower() == "on":
+            device_class = DeviceClass.LOW
+        elif device_memory_gb is not None:
+            device_class = (
+                DeviceClass.LOW if device_memory_gb <= 2
+                else DeviceClass.MID if device_memory_gb <= 4
+                else DeviceClass.HIGH
+            )
+        else:
+            device_class = DeviceClass.MID
+    if bandwidth_kbps is None and downlink_mbps:
+        bandwidth_kbps = downlink_mbps * 1000
+    return ClientProfile(device_class, bandwidth_kbps)
+
+def required_pixels(distance_meters: Optional[float], scale_factor: Optional[float], screen_px: int) -> float:
+    """Pixels the artifact spans on screen at this distance (the whole screen when unknown or close)."""
+    if not distance_meters or distance_meters <= 0:
+        return screen_px
+    size = (scale_factor or 1.0) * ARTIFACT_BASE_SIZE_M
+    visible_span = 2 * distance_meters * math.tan(math.radians(AR_FIELD_OF_VIEW_DEGREES) / 2)
+    return min(screen_px, screen_px * size / visible_span)
+
+def _pick(
+    candidates: List[Dict[str, Any]],
+    adequate: Callable[[Dict[str, Any]], bool],
+    allowed: Callable[[Dict[str, Any]], bool],
+) -> Dict[str, Any]:
+    """
+    From candidates ordered least to most detailed: the first adequate one, stepped
+    down while it's more than the client may receive (the least detailed at worst).
+    """
+    index = next((i for i, candidate in enumerate(candidates) if adequate(candidate)), len(candidates) - 1)
+    while index > 0 and not allowed(candidates[index]):
+        index -= 1
+    return candidates[index]
+
+def _within_bytes(candidate: Dict[str, Any], max_bytes: Optional[float]) -> bool:
+    return max_bytes is None or (candidate.get("size_bytes") or 0) <= max_bytes
+
+def _original(artifact: Artifact) -> Dict[str, Any]:
+    return {
+        "name": "original",
+        "format": os.path.splitext(artifact.asset_url or "")[1].lstrip(".").lower(),
+        "url": artifact.asset_url,
+        "size_bytes": artifact.file_size_bytes,
+        "triangle_count": artifact.triangle_count,
+        "texture_resolution": artifact.texture_resolution,
+    }
+
+def _select_image(variants: List[Dict[str, Any]], pixels: float, profile: ClientProfile) -> Optional[Dict[str, Any]]:
+    candidates = [v for v in variants if v.get("format") == PREFERRED_IMAGE_FORMAT and v.get("width")]
+    candidates = candidates or [v for v in variants if v.get("width")]
+    if not candidates:
+        return None
+    candidates.sort(key=lambda v: max(v["width"], v.get("height") or 0))
+    return _pick(
+        candidates,
+        lambda v: max(v["width"], v.get("height") or 0) >= pixels,
+        lambda v: max(v["width"], v.get("height") or 0) <= profile.limits["max_texture"]
+        and _within_bytes(v, profile.max_bytes),
+    )
+
+def _select_model(artifact: Artifact, variants: List[Dict[str, Any]], pixels: float, profile: ClientProfile) -> Dict[str, Any]:
+    # The optimized copy replaces the original as the full-detail level
+    full = next((v for v in variants if v.get("name") == "optimized"), _original(artifact))
+    lods = [v for v in variants if v.get("name", "").startswith("lod") and v.get("triangle_count")]
+    candidates = sorted(lods, key=lambda v: v["triangle_count"]) + [full]
+    full_triangles = full.get("triangle_count") or artifact.triangle_count or 0
+    # Geometric detail in proportion to the share of the screen the artifact covers
+    screen_share = pixels / profile.limits["screen_px"]
+
+    def adequate(v: Dict[str, Any]) -> bool:
+        textures_ok = not v.get("texture_resolution") or v["texture_resolution"] >= pixels
+        return textures_ok and (v.get("triangle_count") or full_triangles) >= full_triangles * screen_share
+
+    def allowed(v: Dict[str, Any]) -> bool:
+        return (
+            (v.get("triangle_count") or 0) <= profile.limits["max_triangles"]
+            and (v.get("texture_resolution") or 0) <= profile.limits["max_texture"]
+            and _within_bytes(v, profile.max_bytes)
+        )
+
+    return _pick(candidates, adequate, allowed)
+
+def _select_video(variants: List[Dict[str, Any]], pixels: float, profile: ClientProfile) -> Optional[Dict[str, Any]]:
+    candidates = sorted((v for v in variants if v.get("height") and v.get("bitrate")), key=lambda v: v["height"])
+    if not candidates:
+        return None
+    max_bitrate = profile.bandwidth_kbps * 1000 * VIDEO_BANDWIDTH_SHARE if profile.bandwidth_kbps else None
+    return _pick(
+        candidates,
+        lambda v: max(v["height"], v.get("width") or 0) >= pixels,
+        lambda v: v["height"] <= profile.limits["max_video_height"]
+        and (max_bitrate is None or v["bitrate"] <= max_bitrate),
+    )
+
+def select_variant(
+    artifact: Artifact, distance_meters: Optional[float], profile: ClientProfile
+) -> Optional[Dict[str, Any]]:
+    """
+    The stored variant (LOD, image size, video rendition) worth sending to this
+    client at this distance: enough pixels/triangles for the artifact's size on
+    screen, within the device's limits and the bandwidth hint. Falls back to the
+    original upload when there are no variants.
+    """
+    if not artifact.asset_url:
+        return None
+    variants = artifact.variants or []
+    pixels = required_pixels(distance_meters, artifact.scale_factor, profile.limits["screen_px"])
+
+    selected = None
+    if artifact.asset_type == AssetType.IMAGE:
+        selected = _select_image(variants, pixels, profile)
+    elif artifact.asset_type == AssetType.MODEL_3D and variants:
+        selected = _select_model(artifact, variants, pixels, profile)
+    elif artifact.asset_type == AssetType.VIDEO:
+        selected = _select_video(variants, pixels, profile)
+    return selected or _original(artifact)
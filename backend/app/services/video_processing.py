@@ -0,0 +1,154 @@
+import os
+import re
+import shutil
+import subprocess
+import uuid
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+from app.services.assets import derivative_path, url_for
+
+# (name, output height, video bitrate in kbit/s); renditions taller than the source
+# are skipped, except the smallest, which every video gets
+HLS_RENDITION_LADDER = [
+    ("360p", 360, 800),
+    ("540p", 540, 1400),
+    ("720p", 720, 2800),
+]
+HLS_AUDIO_BITRATE_KBPS = 96
+# Short segments so playback can start after the first ~2 seconds of video arrive
+HLS_SEGMENT_SECONDS = 2
+POSTER_MAX_WIDTH = 800
+
+_DURATION = re.compile(r"Duration: (\d+):(\d{2}):(\d{2}(?:\.\d+)?)")
+_VIDEO_STREAM = re.compile(r"Stream #\d+:\d+.*?: Video: .*?(\d{2,5})x(\d{2,5})")
+_ROTATION = re.compile(r"rotation of (-?\d+(?:\.\d+)?) degrees|rotate\s*:\s*(-?\d+)")
+
+class VideoProbeError(ValueError):
+    """ffmpeg can't read a video stream from the file."""
+
+def ffmpeg_binary() -> Optional[str]:
+    """Path of the configured ffmpeg executable, or None when it isn't installed."""
+    return shutil.which(settings.FFMPEG_PATH)
+
+def _run(args: List[str]) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [ffmpeg_binary(), "-hide_banner", "-nostdin", *args],
+        capture_output=True,
+        text=True,
+        timeout=settings.VIDEO_PROCESSING_TIMEOUT_SECONDS,
+    )
+
+def probe_video(file_path: str) -> Dict[str, Any]:
+    """Duration and display size (rotation applied) from ffmpeg's description of the input."""
+    # No output file: ffmpeg describes the input and exits with an error, as expected
+    info = _run(["-i", file_path]).stderr
+    stream = _VIDEO_STREAM.search(info)
+    if stream is None:
+        raise VideoProbeError("No video stream found")
+    width, height = int(stream.group(1)), int(stream.group(2))
+    rotation = _ROTATION.search(info)
+    if rotation and abs(round(float(rotation.group(1) or rotation.group(2)))) % 180 == 90:
+        width, height = height, width
+
+    duration = None
+    match = _DURATION.search(info)
+    if match:
+        hours, minutes, seconds = match.groups()
+        duration = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+    return {"width": width, "height": height, "duration": duration}
+
+def extract_poster(file_path: str, poster_path: str, duration: Optional[float]) -> None:
+    """Write a JPEG of a frame near the start (past any fade-in) as the video's poster."""
+    # One second in, or the middle of clips shorter than two seconds
+    position = min(1.0, duration / 2) if duration else 0.0
+    os.makedirs(os.path.dirname(poster_path), exist_ok=True)
+    temp_path = f"{poster_path}.{uuid.uuid4().hex}.jpg"
+    result = _run([
+        "-ss", f"{position:.3f}", "-i", file_path, "-frames:v", "1",
+        "-vf", f"scale='min({POSTER_MAX_WIDTH},iw)':-2", "-q:v", "3", "-y", temp_path,
+    ])
+    if result.returncode != 0 or not os.path.exists(temp_path):
+        raise RuntimeError(f"Poster extraction failed: {result.stderr.strip()[-500:]}")
+    os.replace(temp_path, poster_path)
+
+def _rendition_size(width: int, height: int, target_height: int) -> tuple:
+    # Even dimensions, as H.264 with 4:2:0 chroma requires
+    scaled_width = round(width * target_height / height / 2) * 2
+    return scaled_width, target_height
+
+def transcode_hls(file_path: str, sha256: str, source: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Transcode to the HLS rendition ladder (H.264/AAC, fixed keyframe interval so
+    every segment starts with a keyframe) under a content-addressed directory,
+    and write a master playlist. Returns the renditions, smallest first, with
+    the master playlist as the first entry.
+    """
+    output_dir = derivative_path(sha256, "hls", "")
+    temp_dir = f"{output_dir}.{uuid.uuid4().hex}.part"
+    os.makedirs(temp_dir)
+
+    ladder = [rung for rung in HLS_RENDITION_LADDER if rung[1] <= source["height"]] or HLS_RENDITION_LADDER[:1]
+    renditions = []
+    try:
+        for name, height, video_kbps in ladder:
+            width, height = _rendition_size(source["width"], source["height"], min(height, source["height"]))
+            result = _run([
+                "-i", file_path,
+                "-map", "0:v:0", "-map", "0:a:0?",
+                "-vf", f"scale={width}:{height}",
+                "-c:v", "libx264", "-preset", "veryfast", "-profile:v", "main", "-pix_fmt", "yuv420p",
+                "-b:v", f"{video_kbps}k", "-maxrate", f"{int(video_kbps * 1.07)}k",
+                "-bufsize", f"{video_kbps * 2}k",
+                "-force_key_frames", f"expr:gte(t,n_forced*{HLS_SEGMENT_SECONDS})", "-sc_threshold", "0",
+                "-c:a", "aac", "-b:a", f"{HLS_AUDIO_BITRATE_KBPS}k", "-ac", "2",
+                "-f", "hls", "-hls_time", str(HLS_SEGMENT_SECONDS), "-hls_playlist_type", "vod",
+                "-hls_segment_filename", f"{temp_dir}/{name}_%04d.ts",
+                "-y", f"{temp_dir}/{name}.m3u8",
+            ])
+            if result.returncode != 0:
+                raise RuntimeError(f"HLS transcode to {name} failed: {result.stderr.strip()[-500:]}")
+            renditions.append({
+                "name": name,
+                "format": "hls",
+                "width": width,
+                "height": height,
+                "bitrate": (video_kbps + HLS_AUDIO_BITRATE_KBPS) * 1000,
+                "playlist": f"{name}.m3u8",
+                "size_bytes": sum(
+                    os.path.getsize(os.path.join(temp_dir, f))
+                    for f in os.listdir(temp_dir) if f.startswith(f"{name}_")
+                ),
+            })
+
+        lines = ["#EXTM3U", "#EXT-X-VERSION:3"]
+        for rendition in renditions:
+            lines.append(
+                f"#EXT-X-STREAM-INF:BANDWIDTH={rendition['bitrate']},"
+                f"RESOLUTION={rendition['width']}x{rendition['height']}"
+            )
+            lines.append(rendition["playlist"])
+        with open(f"{temp_dir}/master.m3u8", "w") as f:
+            f.write("\n".join(lines) + "\n")
+
+        # Another worker may have finished the same content first; theirs is identical
+        if os.path.isdir(output_dir):
+            shutil.rmtree(temp_dir)
+        else:
+            os.replace(temp_dir, output_dir)
+    except BaseException:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        raise
+
+    variants = [{"name": "hls", "format": "hls", "url": url_for(f"{output_dir}/master.m3u8")}]
+    for rendition in renditions:
+        variants.append({
+            "name": rendition["name"],
+            "format": "hls",
+            "url": url_for(f"{output_dir}/{rendition['playlist']}"),
+            "width": rendition["width"],
+            "height": rendition["height"],
+            "bitrate": rendition["bitrate"],
+            "size_bytes": rendition["size_bytes"],
+        })
+    return variants
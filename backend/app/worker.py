@@ -0,0 +1,30 @@
+"""
+Celery worker for background media processing (MEDIA_PROCESSING_BACKEND=celery).
+
+    celery -A app.worker worker --concurrency 4
+
+Only imported by the worker and when tasks are queued, so the API never loads
+Celery at startup.
+"""
+from celery import Celery
+
+from app.core.config import settings
+from app.models import base  # noqa: F401 - registers all models with the mapper
+from app.services.media_processing import MediaValidationError, process_artifact_media
+
+celery_app = Celery("ar_map_explorer", broker=settings.REDIS_URL)
+celery_app.conf.update(
+    task_acks_late=True,  # A task lost with its worker is redelivered
+    worker_prefetch_multiplier=1,
+)
+
+@celery_app.task(bind=True, max_retries=settings.MEDIA_PROCESSING_MAX_RETRIES)
+def process_artifact_media_task(self, artifact_id: int) -> None:
+    try:
+        process_artifact_media(artifact_id, final_attempt=self.request.retries >= self.max_retries)
+    except MediaValidationError:
+        return
+    except Exception as e:
+        if self.request.retries >= self.max_retries:
+            return
+        raise self.retry(exc=e, countdown=settings.MEDIA_PROCESSING_RETRY_DELAY_SECONDS * 2 ** self.request.retries)
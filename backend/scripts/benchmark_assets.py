@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Asset Serving Benchmark for AR Map Explorer
+Serves the same files from a plain StaticFiles mount (the previous /uploads setup)
+and from AssetFiles, each under its own uvicorn process, and compares full-file
+throughput, 1 MiB Range requests (video seeking), ETag revalidation and glTF
+transfer size.
+
+Usage:
+    python scripts/benchmark_assets.py --size-mb 50 --concurrency 16 --duration 10
+"""
+
+import argparse
+import asyncio
+import gzip
+import hashlib
+import json
+import multiprocessing
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+MOUNTS = {"StaticFiles": 8701, "AssetFiles": 8702}
+
+def serve(mount: str, directory: str, port: int) -> None:
+    import uvicorn
+    from starlette.applications import Starlette
+    from starlette.staticfiles import StaticFiles
+    from app.core.static_files import AssetFiles, IMMUTABLE_CACHE_CONTROL
+
+    app = Starlette()
+    if mount == "AssetFiles":
+        app.mount("/uploads/assets", AssetFiles(directory=directory, cache_control=IMMUTABLE_CACHE_CONTROL))
+    else:
+        app.mount("/uploads/assets", StaticFiles(directory=directory))
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+
+def make_files(directory: str, size_mb: int):
+    """A large binary (video/GLB stand-in) and a glTF JSON with its .gz, content-addressed."""
+    video = os.urandom(size_mb * 1024 * 1024)
+    video_sha = hashlib.sha256(video).hexdigest()
+    gltf = json.dumps({
+        "asset": {"version": "2.0"},
+        "accessors": [{"bufferView": i, "componentType": 5126, "count": 1024, "type": "VEC3"} for i in range(20000)],
+    }).encode()
+    gltf_sha = hashlib.sha256(gltf).hexdigest()
+    paths = {}
+    for sha, data, ext in ((video_sha, video, ".mp4"), (gltf_sha, gltf, ".gltf")):
+        os.makedirs(f"{directory}/{sha[:2]}", exist_ok=True)
+        with open(f"{directory}/{sha[:2]}/{sha}{ext}", "wb") as f:
+            f.write(data)
+        paths[ext] = f"/uploads/assets/{sha[:2]}/{sha}{ext}"
+    with open(f"{directory}/{gltf_sha[:2]}/{gltf_sha}.gltf.gz", "wb") as f:
+        f.write(gzip.compress(gltf, compresslevel=9))
+    return paths, len(video), len(gltf)
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, max(0, round(p / 100 * len(values)) - 1))] if values else 0.0
+
+async def run_load(client, duration, concurrency, request):
+    """Call `request(client)` from `concurrency` workers for `duration` seconds."""
+    latencies, transferred, statuses = [], 0, {}
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        nonlocal transferred
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            response = await request(client)
+            latencies.append(time.perf_counter() - started)
+            transferred += response.num_bytes_downloaded  # On the wire, before decoding
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "requests_per_second": len(latencies) / elapsed,
+        "mb_per_second": transferred / elapsed / 1024 / 1024,
+        "bytes_per_response": transferred / max(len(latencies), 1),
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else 0.0,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "statuses": statuses,
+    }
+
+async def bench_mount(port, paths, video_size, args):
+    import httpx
+
+    base = f"http://127.0.0.1:{port}"
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base, timeout=120, limits=limits) as client:
+        for _ in range(50):
+            try:
+                await client.head(paths[".mp4"])
+                break
+            except httpx.TransportError:
+                await asyncio.sleep(0.1)
+        etag = (await client.get(paths[".mp4"], headers={"Range": "bytes=0-0"})).headers.get("etag")
+
+        def ranged(c):
+            start = random.randrange(0, video_size - 1024 * 1024)
+            return c.get(paths[".mp4"], headers={"Range": f"bytes={start}-{start + 1024 * 1024 - 1}"})
+
+        return {
+            "full": await run_load(client, args.duration, args.concurrency, lambda c: c.get(paths[".mp4"])),
+            "range_1mb": await run_load(client, args.duration, args.concurrency, ranged),
+            "revalidate": await run_load(
+                client, args.duration, args.concurrency,
+                lambda c: c.get(paths[".mp4"], headers={"If-None-Match": etag or '""'}),
+            ),
+            "gltf_gzip": await run_load(
+                client, args.duration, args.concurrency,
+                lambda c: c.get(paths[".gltf"], headers={"Accept-Encoding": "gzip"}),
+            ),
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare StaticFiles and AssetFiles throughput")
+    parser.add_argument("--size-mb", type=int, default=50, help="Size of the large test file")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per scenario")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    print("📦 AR Map Explorer - Asset Serving Benchmark")
+    print("============================================")
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        paths, video_size, gltf_size = make_files(directory, args.size_mb)
+        print(f"Files: {video_size / 1024 / 1024:.0f} MB binary, {gltf_size / 1024:.0f} KB glTF JSON")
+        for mount, port in MOUNTS.items():
+            server = multiprocessing.Process(target=serve, args=(mount, directory, port), daemon=True)
+            server.start()
+            try:
+                results[mount] = asyncio.run(bench_mount(port, paths, video_size, args))
+            finally:
+                server.terminate()
+                server.join()
+
+    print(f"\n{'scenario':<12} {'mount':<12} {'req/s':>9} {'MB/s':>9} {'KB/resp':>10} {'p50 ms':>8} {'p95 ms':>8}  statuses")
+    for scenario in ("full", "range_1mb", "revalidate", "gltf_gzip"):
+        for mount in MOUNTS:
+            r = results[mount][scenario]
+            print(
+                f"{scenario:<12} {mount:<12} {r['requests_per_second']:>9.1f} {r['mb_per_second']:>9.1f} "
+                f"{r['bytes_per_response'] / 1024:>10.1f} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f}  {r['statuses']}"
+            )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Login Throughput Benchmark for AR Map Explorer
+Measures bcrypt verify throughput per core for a range of cost factors, then runs
+a login storm against the in-process app and reports logins/s per password-pool
+worker, 503 rejections, and /artifacts/near latency during the storm.
+
+Usage:
+    python scripts/benchmark_login.py --rounds 10 11 12 --workers 2 --concurrency 64
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+BENCH_EMAIL = "login-benchmark@armapexplorer.com"
+BENCH_PASSWORD = "login-benchmark-password"
+API = "/api/v1"
+
+def bench_bcrypt(rounds: int, seconds: float = 2.0) -> float:
+    """Single-core bcrypt verifications per second at the given cost factor."""
+    from passlib.context import CryptContext
+    context = CryptContext(schemes=["bcrypt"], bcrypt__default_rounds=rounds)
+    hashed = context.hash(BENCH_PASSWORD)
+    done, started = 0, time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        context.verify(BENCH_PASSWORD, hashed)
+        done += 1
+    return done / (time.perf_counter() - started)
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, max(0, round(p / 100 * len(values)) - 1))] if values else 0.0
+
+async def login_storm(args):
+    import httpx
+    from app.main import app
+    from app.core.password_pool import password_pool
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=60) as client:
+        await client.post(f"{API}/auth/register", json={"email": BENCH_EMAIL, "password": BENCH_PASSWORD})
+        # Warm the pool (spawning workers) and rehash the user to the current cost factor
+        r = await client.post(f"{API}/auth/login/email", json={"email": BENCH_EMAIL, "password": BENCH_PASSWORD})
+        if r.status_code != 200:
+            sys.exit(f"❌ Benchmark login failed: {r.status_code} {r.text}")
+
+        logins, rejected, errors, near_latencies = [], 0, 0, []
+        deadline = time.perf_counter() + args.duration
+
+        async def login_worker():
+            nonlocal rejected, errors
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                r = await client.post(f"{API}/auth/login/email",
+                                      json={"email": BENCH_EMAIL, "password": BENCH_PASSWORD})
+                if r.status_code == 200:
+                    logins.append(time.perf_counter() - started)
+                elif r.status_code == 503:
+                    rejected += 1
+                    await asyncio.sleep(float(r.headers.get("Retry-After", 1)) / 10)
+                else:
+                    errors += 1
+
+        async def near_worker():
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                await client.get(f"{API}/artifacts/near", params={"lat": 47.6062, "lng": -122.3321, "radius": 1000})
+                near_latencies.append(time.perf_counter() - started)
+                await asyncio.sleep(0.05)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(login_worker() for _ in range(args.concurrency)), near_worker())
+        elapsed = time.perf_counter() - started
+        password_pool.shutdown()
+
+    rate = len(logins) / elapsed
+    print(f"   {len(logins):,} logins in {elapsed:.1f}s: {rate:,.1f} logins/s, "
+          f"{rate / max(args.workers, 1):,.1f} per pool worker")
+    print(f"   login p50 {percentile(logins, 50) * 1000:.0f} ms, p95 {percentile(logins, 95) * 1000:.0f} ms; "
+          f"{rejected:,} rejected with 503, {errors:,} errors")
+    if near_latencies:
+        print(f"   /artifacts/near during the storm: p50 {statistics.median(near_latencies) * 1000:.1f} ms, "
+              f"p95 {percentile(near_latencies, 95) * 1000:.1f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark bcrypt cost factors and login throughput")
+    parser.add_argument("--rounds", type=int, nargs="+", default=[10, 11, 12])
+    parser.add_argument("--workers", type=int, default=int(os.getenv("PASSWORD_HASH_WORKERS", 2)))
+    parser.add_argument("--queue-limit", type=int, default=int(os.getenv("PASSWORD_HASH_QUEUE_LIMIT", 32)))
+    parser.add_argument("--concurrency", type=int, default=64, help="Concurrent login clients")
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--skip-storm", action="store_true", help="Only measure raw bcrypt speed")
+    args = parser.parse_args()
+
+    print("🔐 AR Map Explorer - Login Benchmark")
+    print("===================================")
+    print(f"\n⏱️  bcrypt verify per core ({os.cpu_count()} cores available):")
+    for rounds in args.rounds:
+        rate = bench_bcrypt(rounds)
+        print(f"   cost {rounds:>2}: {rate:8.1f} verifies/s ({1000 / rate:6.1f} ms each)")
+
+    if args.skip_storm:
+        return
+
+    # Settings are read at import time, so configure the app before importing it
+    os.environ["BCRYPT_ROUNDS"] = str(args.rounds[-1])
+    os.environ["PASSWORD_HASH_WORKERS"] = str(args.workers)
+    os.environ["PASSWORD_HASH_QUEUE_LIMIT"] = str(args.queue_limit)
+    print(f"\n🌊 Login storm: {args.concurrency} clients, {args.workers} pool workers, "
+          f"queue limit {args.queue_limit}, cost {args.rounds[-1]}")
+    asyncio.run(login_storm(args))
+
+if __name__ == "__main__":
+    main()
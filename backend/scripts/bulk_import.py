@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Bulk Artifact Importer for AR Map Explorer
+Streams a CSV or GeoJSON FeatureCollection, validates rows with the ArtifactCreate
+rules in batches and loads them with PostgreSQL COPY (batched executemany on
+other databases). Interrupted imports can be resumed with --resume (same file,
+one run per job at a time).
+
+CSV columns: title, description, artifact_type, asset_type, category, tags (";"-separated),
+latitude, longitude, address, min_view_distance, max_view_distance, anchor_mode,
+scale_factor, asset_url, thumbnail_url, menu_data (JSON)
+GeoJSON: Point features with the same names as properties.
+
+Usage:
+    python scripts/bulk_import.py partner_pois.csv --creator-email partner@example.com --publish
+    python scripts/bulk_import.py partner_pois.geojson --resume 12
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from fastapi import HTTPException
+from app.core.database import SessionLocal
+from app.models.base import Base  # noqa: F401 - registers all models
+from app.models.import_job import ImportJob, ImportFormat, ImportStatus
+from app.models.user import User
+from app.services.bulk_import import IMPORT_BATCH_SIZE, create_import_job, format_from_filename, run_import
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import artifacts from CSV/GeoJSON")
+    parser.add_argument("path", help="CSV or GeoJSON file")
+    parser.add_argument("--format", choices=[f.value for f in ImportFormat],
+                        help="Defaults to the file extension")
+    parser.add_argument("--creator-email", help="Owner of the imported artifacts")
+    parser.add_argument("--publish", action="store_true", help="Publish artifacts immediately")
+    parser.add_argument("--resume", type=int, metavar="JOB_ID", help="Resume an interrupted import")
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    print("📦 AR Map Explorer - Bulk Import")
+    print("================================")
+
+    db = SessionLocal()
+    try:
+        if args.resume:
+            job = db.query(ImportJob).filter(ImportJob.id == args.resume).first()
+            if not job:
+                sys.exit(f"❌ Import job {args.resume} not found")
+            if job.status == ImportStatus.COMPLETED:
+                sys.exit(f"✅ Import job {job.id} already completed")
+            print(f"🔁 Resuming job {job.id} at record {job.position:,}")
+        else:
+            if not args.creator_email:
+                sys.exit("❌ --creator-email is required for a new import")
+            creator = db.query(User).filter(User.email == args.creator_email).first()
+            if not creator:
+                sys.exit(f"❌ User {args.creator_email} not found")
+            import_format = ImportFormat(args.format) if args.format else format_from_filename(args.path)
+            if import_format is None:
+                sys.exit("❌ Could not infer the format, pass --format csv|geojson")
+            job = create_import_job(db, Path(args.path).name, import_format, creator.id, args.publish)
+            print(f"🆕 Created import job {job.id}")
+
+        started = time.perf_counter()
+        resumed_at = job.position
+
+        def progress(job):
+            rate = (job.position - resumed_at) / max(time.perf_counter() - started, 1e-9)
+            print(f"   {job.position:,} records - {job.imported_count:,} imported, "
+                  f"{job.failed_count:,} failed ({rate:,.0f} records/s)", end="\r", flush=True)
+
+        with open(args.path, "rb") as stream:
+            try:
+                run_import(job, stream, batch_size=args.batch_size, progress=progress)
+            except KeyboardInterrupt:
+                sys.exit(f"\n⏸️  Interrupted - resume with: --resume {job.id}")
+            except HTTPException as e:
+                sys.exit(f"\n❌ {e.detail}")
+
+        print(f"\n🎉 Imported {job.imported_count:,} artifacts in {time.perf_counter() - started:.1f}s")
+        if job.failed_count:
+            print(f"⚠️  {job.failed_count:,} records failed validation, first errors:")
+            for error in (job.errors or [])[:10]:
+                print(f"   record {error['record']}: {error['error'].splitlines()[0]}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Asset Garbage Collector for AR Map Explorer
+Recounts references from artifacts to content-addressed assets, then deletes
+assets (and their thumbnails) nothing has referenced for the grace period.
+Also removes expired resumable upload sessions and their partial files.
+
+Usage:
+    python scripts/gc_assets.py
+    python scripts/gc_assets.py --grace-hours 1
+"""
+
+import argparse
+import sys
+from datetime import timedelta
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.base import Base  # noqa: F401 - registers all models
+from app.services.assets import collect_garbage, recount_references
+from app.services.resumable_uploads import collect_expired_sessions
+
+def main():
+    parser = argparse.ArgumentParser(description="Delete unreferenced content-addressed assets")
+    parser.add_argument("--grace-hours", type=float, default=settings.ASSET_GC_GRACE_HOURS,
+                        help="Keep unreferenced assets younger than this")
+    parser.add_argument("--skip-recount", action="store_true",
+                        help="Trust the stored ref counts instead of recomputing them")
+    args = parser.parse_args()
+
+    print("🧹 AR Map Explorer - Asset GC")
+    print("============================")
+
+    db = SessionLocal()
+    try:
+        if not args.skip_recount:
+            corrected = recount_references(db)
+            print(f"🔢 Recounted references ({corrected:,} counts corrected)")
+        removed, freed = collect_garbage(db, timedelta(hours=args.grace_hours))
+        print(f"🗑️  Removed {removed:,} unreferenced assets, freed {freed / 1024 / 1024:,.1f} MB")
+        removed, freed = collect_expired_sessions(db)
+        print(f"⏳ Removed {removed:,} expired upload sessions, freed {freed / 1024 / 1024:,.1f} MB")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Synthetic Data Generator for AR Map Explorer
+Creates a deterministic, city-scale dataset (users, artifacts, analytics events)
+for load testing: dense downtowns, sparse suburbs, and edge cases near the
+equator and the antimeridian. The same --seed and --reference-time (which the
+generated timestamps count back from) give the same data.
+
+Usage:
+    python scripts/generate_synthetic_data.py --artifacts 1000000 --users 20000 --events 5000000
+    python scripts/generate_synthetic_data.py --reference-time 2026-06-01T00:00:00
+    python scripts/generate_synthetic_data.py --purge   # remove previously generated data
+"""
+
+import argparse
+import math
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import delete, func, insert, select
+from app.core.database import engine
+from app.core.security import get_password_hash
+from app.models.base import Base  # noqa: F401 - registers all models
+from app.models.analytics import EventType
+from app.models.artifact import (
+    Artifact, ArtifactType, ArtifactStatus, AssetType, AnchorMode
+)
+from app.models.user import User, UserRole
+from app.services.analytics_partitions import delete_events, insert_events
+
+SYNTHETIC_TAG = "synthetic"
+SYNTHETIC_EMAIL_DOMAIN = "synthetic.armapexplorer.com"
+SYNTHETIC_PASSWORD = "synthetic-password"
+DEFAULT_REFERENCE_TIME = "2026-01-01T00:00:00"
+
+# (name, latitude, longitude, share of artifacts, downtown radius km, metro radius km)
+CITIES = [
+    ("Seattle", 47.6062, -122.3321, 0.10, 2.0, 30.0),
+    ("New York", 40.7580, -73.9855, 0.16, 3.0, 50.0),
+    ("San Francisco", 37.7749, -122.4194, 0.08, 2.0, 25.0),
+    ("London", 51.5074, -0.1278, 0.12, 3.0, 40.0),
+    ("Tokyo", 35.6812, 139.7671, 0.14, 4.0, 60.0),
+    ("São Paulo", -23.5505, -46.6333, 0.08, 3.0, 45.0),
+    ("Lagos", 6.5244, 3.3792, 0.05, 3.0, 35.0),
+    # Near the equator
+    ("Quito", -0.1807, -78.4678, 0.04, 2.0, 20.0),
+    ("Singapore", 1.2903, 103.8519, 0.07, 2.5, 20.0),
+    ("Nairobi", -1.2921, 36.8219, 0.04, 2.0, 25.0),
+    ("Kampala", 0.3476, 32.5825, 0.03, 2.0, 20.0),
+    # Near the antimeridian
+    ("Suva", -18.1416, 178.4419, 0.02, 1.5, 15.0),
+    ("Taveuni", -16.8000, -179.9800, 0.01, 1.0, 20.0),
+    ("Anadyr", 64.7337, 177.4968, 0.01, 1.0, 10.0),
+]
+RURAL_SHARE = 0.05  # Remaining artifacts scattered over populated latitudes
+
+# Within a metro area: dense downtown core, suburbs, sparse outskirts
+DOWNTOWN_SHARE = 0.6
+SUBURB_SHARE = 0.3
+
+ARTIFACT_TYPE_WEIGHTS = [
+    (ArtifactType.ART, 0.35), (ArtifactType.MENU, 0.25), (ArtifactType.INFO_CARD, 0.2),
+    (ArtifactType.WAYFINDING, 0.15), (ArtifactType.OBJECT_SCAN, 0.05),
+]
+ASSET_TYPE_WEIGHTS = [
+    (AssetType.IMAGE, 0.6), (AssetType.MODEL_3D, 0.2), (AssetType.VIDEO, 0.15), (AssetType.PDF, 0.05),
+]
+EVENT_TYPE_WEIGHTS = [
+    (EventType.MAP_VIEW, 0.45), (EventType.PREVIEW_OPEN, 0.25), (EventType.AR_ENTER, 0.12),
+    (EventType.AR_EXIT, 0.1), (EventType.INTERACT, 0.05), (EventType.SCREENSHOT, 0.025),
+    (EventType.REPORT, 0.005),
+]
+
+def _choice(rng: random.Random, weighted):
+    values, weights = zip(*weighted)
+    return rng.choices(values, weights=weights)[0]
+
+def _offset(lat: float, lng: float, north_m: float, east_m: float):
+    """Move a point by meters north/east, wrapping longitude into [-180, 180)."""
+    new_lat = max(-89.9, min(89.9, lat + north_m / 111000))
+    new_lng = lng + east_m / (111000 * max(math.cos(math.radians(lat)), 1e-6))
+    return new_lat, (new_lng + 180) % 360 - 180
+
+def sample_point(rng: random.Random):
+    """Draw a (latitude, longitude, city) triple from the synthetic density model."""
+    if rng.random() < RURAL_SHARE:
+        return rng.uniform(-55, 65), rng.uniform(-180, 180), None
+
+    city = rng.choices(CITIES, weights=[c[3] for c in CITIES])[0]
+    _, lat, lng, _, downtown_km, metro_km = city
+    roll = rng.random()
+    if roll < DOWNTOWN_SHARE:
+        distance = abs(rng.gauss(0, downtown_km * 1000 / 2))
+    elif roll < DOWNTOWN_SHARE + SUBURB_SHARE:
+        distance = rng.uniform(downtown_km, metro_km / 2) * 1000
+    else:
+        distance = rng.uniform(metro_km / 2, metro_km) * 1000
+    bearing = rng.uniform(0, 2 * math.pi)
+    lat, lng = _offset(lat, lng, distance * math.cos(bearing), distance * math.sin(bearing))
+    return lat, lng, city[0]
+
+def _batches(total: int, batch_size: int):
+    for start in range(0, total, batch_size):
+        yield start, min(batch_size, total - start)
+
+def generate_users(conn, rng: random.Random, count: int, batch_size: int):
+    # bcrypt is deliberately slow: hash once and share it across synthetic users
+    hashed_password = get_password_hash(SYNTHETIC_PASSWORD)
+    for start, size in _batches(count, batch_size):
+        rows = []
+        for i in range(start, start + size):
+            role = UserRole.EXPLORER
+            if i == 0:
+                role = UserRole.TENANT_ADMIN
+            elif i % 20 == 1:
+                role = UserRole.CREATOR
+            rows.append({
+                "email": f"user-{i}@{SYNTHETIC_EMAIL_DOMAIN}",
+                "hashed_password": hashed_password,
+                "full_name": f"Synthetic User {i}",
+                "role": role,
+                "is_active": True,
+                "is_verified": True,
+            })
+        conn.execute(insert(User), rows)
+
+def generate_artifacts(conn, rng: random.Random, count: int, creator_ids, batch_size: int, report, now: datetime):
+    for start, size in _batches(count, batch_size):
+        rows = []
+        for i in range(start, start + size):
+            lat, lng, city = sample_point(rng)
+            asset_type = _choice(rng, ASSET_TYPE_WEIGHTS)
+            min_view = rng.choice([0, 0, 5, 10, 25])
+            created = now - timedelta(days=rng.uniform(0, 365))
+            rows.append({
+                "title": f"Synthetic artifact {i}",
+                "description": f"Generated near {city or 'nowhere in particular'}",
+                "creator_id": rng.choice(creator_ids),
+                "artifact_type": _choice(rng, ARTIFACT_TYPE_WEIGHTS),
+                "asset_type": asset_type,
+                "category": city or "rural",
+                "tags": [SYNTHETIC_TAG],
+                "latitude": lat,
+                "longitude": lng,
+                "min_view_distance": min_view,
+                "max_view_distance": rng.choice([50, 100, 100, 250, 500, 2000]),
+                "anchor_mode": AnchorMode.GPS,
+                "scale_factor": round(rng.uniform(0.1, 3.0), 2),
+                "asset_url": f"/uploads/{asset_type.value}/synthetic-{i}",
+                "thumbnail_url": f"/uploads/thumbnails/synthetic-{i}_thumb.jpg",
+                "file_size_bytes": rng.randint(50_000, 50_000_000),
+                "is_open_now": True,
+                "status": ArtifactStatus.PUBLISHED if rng.random() < 0.9 else ArtifactStatus.DRAFT,
+                "is_featured": rng.random() < 0.01,
+                "report_count": 0,
+                "created_at": created,
+                "published_at": created,
+            })
+        conn.execute(insert(Artifact), rows)
+        report("artifacts", start + size, count)
+
+def generate_events(conn, rng: random.Random, count: int, user_ids, artifact_ids, batch_size: int, report,
+                    now: datetime):
+    for start, size in _batches(count, batch_size):
+        rows = []
+        for i in range(start, start + size):
+            event_type = _choice(rng, EVENT_TYPE_WEIGHTS)
+            distance = abs(rng.gauss(40, 60))
+            rows.append({
+                "user_id": rng.choice(user_ids),
+                "artifact_id": rng.choice(artifact_ids),
+                "event_type": event_type,
+                "session_id": f"synthetic-session-{i // 25}",
+                "dwell_time_seconds": rng.expovariate(1 / 45) if event_type == EventType.AR_EXIT else None,
+                "distance_meters": distance,
+                "event_metadata": {"synthetic": True},
+                "created_at": now - timedelta(seconds=rng.uniform(0, 90 * 86400)),
+            })
+        insert_events(conn, rows)
+        report("events", start + size, count)
+
+def purge(conn):
+    synthetic_users = select(User.id).where(User.email.like(f"%@{SYNTHETIC_EMAIL_DOMAIN}"))
+    delete_events(conn, lambda table: table.c.user_id.in_(synthetic_users))
+    conn.execute(delete(Artifact).where(Artifact.creator_id.in_(synthetic_users)))
+    conn.execute(delete(User).where(User.id.in_(synthetic_users)))
+
+def parse_reference_time(value: str) -> datetime:
+    """ISO 8601 timestamp as naive UTC (like the generated created_at values)."""
+    parsed = datetime.fromisoformat(value)
+    return parsed.astimezone(timezone.utc).replace(tzinfo=None) if parsed.tzinfo else parsed
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a deterministic synthetic dataset")
+    parser.add_argument("--artifacts", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=20_000)
+    parser.add_argument("--events", type=int, default=2_000_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=5_000)
+    parser.add_argument("--reference-time", type=parse_reference_time, default=DEFAULT_REFERENCE_TIME,
+                        help="Timestamps are generated up to this time (ISO 8601, UTC if no offset)")
+    parser.add_argument("--purge", action="store_true", help="Delete generated data and exit")
+    args = parser.parse_args()
+
+    print("🌍 AR Map Explorer - Synthetic Data Generator")
+    print("==========================================")
+
+    with engine.begin() as conn:
+        print("🧹 Removing previously generated data...")
+        purge(conn)
+    if args.purge:
+        print("✅ Synthetic data removed")
+        return
+
+    rng = random.Random(args.seed)
+    started = time.perf_counter()
+
+    def report(kind, done, total):
+        rate = done / max(time.perf_counter() - started, 1e-9)
+        print(f"   {kind}: {done:,}/{total:,} ({rate:,.0f} rows/s)", end="\r", flush=True)
+        if done == total:
+            print()
+
+    with engine.begin() as conn:
+        print(f"\n👤 Creating {args.users:,} users...")
+        generate_users(conn, rng, args.users, args.batch_size)
+        users = conn.execute(
+            select(User.id, User.role).where(User.email.like(f"%@{SYNTHETIC_EMAIL_DOMAIN}")).order_by(User.id)
+        ).all()
+        user_ids = [u.id for u in users]
+        creator_ids = [u.id for u in users if u.role in (UserRole.CREATOR, UserRole.TENANT_ADMIN)]
+
+        print(f"\n🗺️  Creating {args.artifacts:,} artifacts...")
+        generate_artifacts(conn, rng, args.artifacts, creator_ids, args.batch_size, report, args.reference_time)
+        artifact_ids = conn.execute(
+            select(Artifact.id).where(Artifact.creator_id.in_(creator_ids)).order_by(Artifact.id)
+        ).scalars().all()
+
+        print(f"\n📈 Creating {args.events:,} analytics events...")
+        if artifact_ids:
+            generate_events(
+                conn, rng, args.events, user_ids, artifact_ids, args.batch_size, report, args.reference_time
+            )
+
+        total = conn.execute(select(func.count()).select_from(Artifact)).scalar()
+
+    print(f"\n🎉 Done in {time.perf_counter() - started:.1f}s ({total:,} artifacts in database)")
+    print(f"   Log in as user-0@{SYNTHETIC_EMAIL_DOMAIN} (admin) or user-1@{SYNTHETIC_EMAIL_DOMAIN} (creator)")
+    print(f"   Password: {SYNTHETIC_PASSWORD}")
+
+if __name__ == "__main__":
+    main()
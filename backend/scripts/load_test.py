@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Load Test Harness for AR Map Explorer
+Drives the real FastAPI app (in-process, or a running server with --base-url)
+with a weighted mix of requests against the synthetic dataset, reports
+p50/p95/p99 latency and throughput per endpoint, and stores the results so runs
+can be compared between commits.
+
+Usage:
+    python scripts/generate_synthetic_data.py --artifacts 1000000
+    python scripts/load_test.py --duration 60 --concurrency 32
+    python scripts/load_test.py --compare load_test_results/<earlier run>.json
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import random
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import httpx
+from generate_synthetic_data import SYNTHETIC_EMAIL_DOMAIN, SYNTHETIC_PASSWORD, sample_point
+
+RESULTS_DIR = project_root / "load_test_results"
+API = "/api/v1"
+
+def _tiny_png() -> bytes:
+    from PIL import Image
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 64), color="orange").save(buffer, "PNG")
+    return buffer.getvalue()
+
+class Scenario:
+    """A named request generator with a relative weight in the traffic mix."""
+
+    def __init__(self, name, weight, request):
+        self.name = name
+        self.weight = weight
+        self.request = request
+
+def build_scenarios(state):
+    async def near(client, rng):
+        lat, lng, _ = sample_point(rng)
+        radius = rng.choice([250, 1000, 1000, 5000])
+        r = await client.get(f"{API}/artifacts/near", params={"lat": lat, "lng": lng, "radius": radius})
+        for artifact in r.json().get("artifacts", [])[:5] if r.status_code == 200 else []:
+            state["artifact_ids"].append(artifact["id"])
+        del state["artifact_ids"][:-1000]
+        return r
+
+    async def detail(client, rng):
+        if not state["artifact_ids"]:
+            return await near(client, rng)
+        lat, lng, _ = sample_point(rng)
+        artifact_id = rng.choice(state["artifact_ids"])
+        return await client.get(f"{API}/artifacts/{artifact_id}", params={"lat": lat, "lng": lng})
+
+    async def login(client, rng):
+        return await client.post(f"{API}/auth/login/email", json={
+            "email": f"user-{rng.randrange(state['users'])}@{SYNTHETIC_EMAIL_DOMAIN}",
+            "password": SYNTHETIC_PASSWORD,
+        })
+
+    async def me(client, rng):
+        return await client.get(f"{API}/auth/me", headers=state["creator_headers"])
+
+    async def upload(client, rng):
+        lat, lng, _ = sample_point(rng)
+        return await client.post(
+            f"{API}/artifacts/",
+            headers=state["creator_headers"],
+            data={"title": "Load test upload", "latitude": lat, "longitude": lng},
+            files={"file": ("load-test.png", state["png"], "image/png")},
+        )
+
+    scenarios = [
+        Scenario("GET /artifacts/near", 60, near),
+        Scenario("GET /artifacts/{id}", 20, detail),
+        Scenario("GET /auth/me", 10, me),
+        Scenario("POST /auth/login/email", 5, login),
+        Scenario("POST /artifacts/ (upload)", 2, upload),
+    ]
+    if state["in_process"]:
+        scenarios.append(Scenario("service get_clustered_artifacts", 3, clustered))
+    return scenarios
+
+async def clustered(client, rng):
+    """Clustering has no route yet, so time the service call directly (in-process only)."""
+    from starlette.concurrency import run_in_threadpool
+    from app.core.database import SessionLocal
+    from app.services.artifacts import get_clustered_artifacts
+
+    lat, lng, _ = sample_point(rng)
+
+    def run():
+        db = SessionLocal()
+        try:
+            get_clustered_artifacts(db, lat, lng, zoom_level=rng.randint(8, 16))
+        finally:
+            db.close()
+
+    await run_in_threadpool(run)
+    return httpx.Response(200)
+
+async def worker(client, scenarios, rng, deadline, results):
+    weights = [s.weight for s in scenarios]
+    while time.perf_counter() < deadline:
+        scenario = rng.choices(scenarios, weights=weights)[0]
+        start = time.perf_counter()
+        try:
+            response = await scenario.request(client, rng)
+            ok = response.status_code < 500
+        except Exception:
+            ok = False
+        results[scenario.name].append((time.perf_counter() - start, ok))
+
+def percentile(values, p):
+    if not values:
+        return None
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, round(p / 100 * len(values)) - 1))
+    return values[index]
+
+def summarize(results, elapsed):
+    summary = {}
+    for name, samples in sorted(results.items()):
+        latencies = [latency * 1000 for latency, _ in samples]
+        summary[name] = {
+            "requests": len(samples),
+            "errors": sum(1 for _, ok in samples if not ok),
+            "throughput_rps": round(len(samples) / elapsed, 2),
+            "mean_ms": round(statistics.fmean(latencies), 2),
+            "p50_ms": round(percentile(latencies, 50), 2),
+            "p95_ms": round(percentile(latencies, 95), 2),
+            "p99_ms": round(percentile(latencies, 99), 2),
+        }
+    return summary
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=project_root,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def print_summary(summary, baseline=None):
+    header = f"{'endpoint':34} {'reqs':>7} {'err':>5} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8}"
+    print(header)
+    print("-" * len(header))
+    for name, row in summary.items():
+        print(f"{name:34} {row['requests']:>7} {row['errors']:>5} {row['throughput_rps']:>8.1f} "
+              f"{row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f}")
+        before = (baseline or {}).get(name)
+        if before:
+            deltas = [
+                f"{key[:-3]} {100 * (row[key] - before[key]) / before[key]:+.1f}%"
+                for key in ("p50_ms", "p95_ms", "p99_ms") if before.get(key)
+            ]
+            print(f"{'':34} vs baseline: {', '.join(deltas)}")
+
+async def run(args):
+    if args.base_url:
+        transport, base_url = None, args.base_url
+    else:
+        from app.main import app
+        transport, base_url = httpx.ASGITransport(app=app), "http://load-test"
+
+    async with httpx.AsyncClient(transport=transport, base_url=base_url, timeout=30) as client:
+        r = await client.post(f"{API}/auth/login/email", json={
+            "email": f"user-1@{SYNTHETIC_EMAIL_DOMAIN}", "password": SYNTHETIC_PASSWORD,
+        })
+        if r.status_code != 200:
+            sys.exit("❌ Could not log in as the synthetic creator - run generate_synthetic_data.py first")
+
+        state = {
+            "in_process": transport is not None,
+            "users": args.users,
+            "creator_headers": {"Authorization": f"Bearer {r.json()['access_token']}"},
+            "artifact_ids": [],
+            "png": _tiny_png(),
+        }
+        scenarios = build_scenarios(state)
+        results = defaultdict(list)
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(*(
+            worker(client, scenarios, random.Random(args.seed + i), deadline, results)
+            for i in range(args.concurrency)
+        ))
+        return summarize(results, time.perf_counter() - started)
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the AR Map Explorer API")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds to run")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent virtual users")
+    parser.add_argument("--users", type=int, default=20_000, help="Synthetic users available for login")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--base-url", help="Target a running server instead of the in-process app")
+    parser.add_argument("--compare", help="Earlier results file to compare against "
+                                          "(default: most recent run in load_test_results/)")
+    args = parser.parse_args()
+
+    print("🚦 AR Map Explorer - Load Test")
+    print("=============================")
+    print(f"   {args.concurrency} virtual users for {args.duration:.0f}s against "
+          f"{args.base_url or 'the in-process app'}\n")
+
+    previous = sorted(RESULTS_DIR.glob("*.json"))
+    baseline_path = Path(args.compare) if args.compare else (previous[-1] if previous else None)
+
+    summary = asyncio.run(run(args))
+
+    RESULTS_DIR.mkdir(exist_ok=True)
+    revision = git_revision()
+    result_path = RESULTS_DIR / f"{datetime.utcnow():%Y%m%dT%H%M%S}-{revision}.json"
+    result_path.write_text(json.dumps({
+        "revision": revision,
+        "created_at": datetime.utcnow().isoformat(),
+        "duration_s": args.duration,
+        "concurrency": args.concurrency,
+        "target": args.base_url or "in-process",
+        "endpoints": summary,
+    }, indent=2))
+
+    baseline = None
+    if baseline_path and baseline_path.exists():
+        baseline_data = json.loads(baseline_path.read_text())
+        baseline = baseline_data["endpoints"]
+        print(f"Comparing against {baseline_path.name} ({baseline_data['revision']})\n")
+    print_summary(summary, baseline)
+    print(f"\n💾 Results saved to {result_path.relative_to(project_root)}")
+
+if __name__ == "__main__":
+    main()
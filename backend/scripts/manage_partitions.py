@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Analytics Partitions for AR Map Explorer
+Creates the analytics event partitions for the coming periods ahead of time, then
+archives the partitions older than the retention period to compressed column
+files (ANALYTICS_ARCHIVE_DIR) and drops them. A partition is only expired once the
+rollups have processed every event it can still receive. Run it daily from cron.
+
+Usage:
+    python scripts/manage_partitions.py
+    python scripts/manage_partitions.py --retention-days 90 --dry-run
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.base import Base  # noqa: F401 - registers all models
+from app.services.analytics_partitions import ensure_upcoming_partitions, expire_partitions
+from app.services.analytics_rollups import rolled_up_until
+
+def main():
+    parser = argparse.ArgumentParser(description="Create upcoming and expire old analytics event partitions")
+    parser.add_argument("--retention-days", type=int, default=settings.ANALYTICS_RETENTION_DAYS,
+                        help="Archive and drop partitions whose events are all older than this")
+    parser.add_argument("--ahead", type=int, default=2, help="Periods to create partitions for in advance")
+    parser.add_argument("--archive-dir", default=settings.ANALYTICS_ARCHIVE_DIR)
+    parser.add_argument("--dry-run", action="store_true", help="Only list the partitions that would expire")
+    args = parser.parse_args()
+
+    print("🗂️  AR Map Explorer - Analytics Partitions")
+    print("=========================================")
+
+    db = SessionLocal()
+    try:
+        if not args.dry_run:
+            until = ensure_upcoming_partitions(db.connection(), args.ahead)
+            db.commit()
+            print(f"📅 Partitions exist up to {until:%Y-%m-%d}")
+        expired = expire_partitions(db, rolled_up_until(db), args.retention_days, args.archive_dir, args.dry_run)
+        for name, archived in expired:
+            if args.dry_run:
+                print(f"🔎 Would archive and drop {name}")
+            else:
+                print(f"📦 Archived {archived:,} events from {name} and dropped it")
+        if not expired:
+            print("✅ No partitions to expire")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
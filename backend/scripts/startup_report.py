@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Startup Report for AR Map Explorer
+Measures how long a fresh worker takes to import and start the API, lists the
+slowest imports and fails when boot time exceeds the budget.
+
+Usage:
+    python scripts/startup_report.py [--budget-ms 2000] [--runs 5] [--top 20]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+backend_dir = Path(__file__).parent.parent
+
+# Libraries that must only be loaded on first use, never at startup
+LAZY_MODULES = ["PIL", "trimesh", "magic", "pygltflib", "boto3", "celery", "brotli"]
+
+# Points at a port nothing listens on, so any DB access during startup fails loudly
+UNREACHABLE_DATABASE_URL = "postgresql://startup-check@127.0.0.1:9/startup_check"
+
+STARTUP_SNIPPET = """
+import asyncio, json, sys, time
+# Keep stdout for the result; background jobs the app starts may print meanwhile
+result, sys.stdout = sys.stdout, sys.stderr
+start = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+asyncio.run(app.main.app.router.startup())
+started = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "startup_ms": (started - imported) * 1000,
+    "loaded": sorted(m for m in sys.modules if "." not in m),
+}), file=result)
+"""
+
+def _run(args, extra_env=None):
+    env = os.environ.copy()
+    env["DATABASE_URL"] = UNREACHABLE_DATABASE_URL
+    env.update(extra_env or {})
+    return subprocess.run(
+        [sys.executable, *args],
+        cwd=backend_dir,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+
+def measure_startup():
+    """Boot the app once in a fresh interpreter and return its timings."""
+    result = _run(["-c", STARTUP_SNIPPET])
+    if result.returncode != 0:
+        raise RuntimeError(f"App failed to start without a database:\n{result.stderr}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def import_profile():
+    """Return (module, self_us, cumulative_us) tuples from `python -X importtime`."""
+    result = _run(["-X", "importtime", "-c", "import app.main"])
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|")
+        rows.append((module.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--budget-ms", type=float,
+                        default=float(os.getenv("STARTUP_BUDGET_MS", "2000")),
+                        help="Fail if median import + startup time exceeds this")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to boot")
+    parser.add_argument("--top", type=int, default=20, help="Slowest imports to list")
+    parser.add_argument("--json", action="store_true", help="Print a machine-readable report")
+    args = parser.parse_args()
+
+    runs = [measure_startup() for _ in range(args.runs)]
+    total_ms = statistics.median(r["import_ms"] + r["startup_ms"] for r in runs)
+    loaded = set(runs[0]["loaded"])
+    eager = [m for m in LAZY_MODULES if m in loaded]
+    slowest = sorted(import_profile(), key=lambda row: row[2], reverse=True)[:args.top]
+
+    report = {
+        "runs": args.runs,
+        "median_import_ms": round(statistics.median(r["import_ms"] for r in runs), 1),
+        "median_startup_ms": round(statistics.median(r["startup_ms"] for r in runs), 1),
+        "median_total_ms": round(total_ms, 1),
+        "budget_ms": args.budget_ms,
+        "eagerly_loaded_optional_modules": eager,
+        "slowest_imports": [
+            {"module": m, "self_ms": s / 1000, "cumulative_ms": c / 1000}
+            for m, s, c in slowest
+        ],
+    }
+    within_budget = total_ms <= args.budget_ms and not eager
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print("⏱️  AR Map Explorer - Startup Report")
+        print("===================================")
+        print(f"Import app.main:  {report['median_import_ms']:.1f} ms (median of {args.runs})")
+        print(f"Startup events:   {report['median_startup_ms']:.1f} ms")
+        print(f"Total:            {report['median_total_ms']:.1f} ms (budget {args.budget_ms:.0f} ms)")
+        print("\n🐢 Slowest imports (cumulative):")
+        for row in report["slowest_imports"]:
+            print(f"   {row['cumulative_ms']:8.1f} ms  {row['module']}")
+        if eager:
+            print(f"\n❌ Optional libraries loaded at startup: {', '.join(eager)}")
+        print("\n✅ Within budget" if within_budget else "\n❌ Over budget")
+
+    sys.exit(0 if within_budget else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Analytics Rollups for AR Map Explorer
+Rebuilds the hourly and daily analytics rollups the dashboards read, for every
+bucket that received events (late ones included) since the previous run. Run it
+from cron every few minutes, or keep it running with --loop. --rebuild also
+recomputes the unique-visitor sketches (normally kept up to date at ingestion),
+from the archived events too. --from-archive rebuilds the rollups of the hours
+whose events were archived by scripts/manage_partitions.py.
+
+Usage:
+    python scripts/update_rollups.py
+    python scripts/update_rollups.py --loop 300
+    python scripts/update_rollups.py --rebuild
+    python scripts/update_rollups.py --from-archive
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.core.database import SessionLocal
+from app.models.base import Base  # noqa: F401 - registers all models
+from app.services.analytics_rollups import rollup_archive, update_rollups
+from app.services.unique_visitors import rebuild_sketches
+
+def run(rebuild: bool, from_archive: bool = False) -> None:
+    db = SessionLocal()
+    try:
+        if from_archive:
+            started = time.perf_counter()
+            hours, days = rollup_archive(db)
+            print(f"🗄️  Rebuilt {hours:,} hourly and {days:,} daily artifact rollups from the archive "
+                  f"in {time.perf_counter() - started:.2f}s")
+        started = time.perf_counter()
+        hours, days = update_rollups(db, rebuild=rebuild)
+        print(f"📊 Rebuilt {hours:,} hourly and {days:,} daily artifact rollups "
+              f"in {time.perf_counter() - started:.2f}s")
+        if rebuild:
+            started = time.perf_counter()
+            read = rebuild_sketches(db)
+            print(f"👥 Rebuilt unique-visitor sketches from {read:,} events in {time.perf_counter() - started:.2f}s")
+    finally:
+        db.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Update the analytics rollup tables")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="Recompute every bucket that has events, and the visitor sketches")
+    parser.add_argument("--loop", type=float, metavar="SECONDS",
+                        help="Keep running, updating every SECONDS")
+    parser.add_argument("--from-archive", action="store_true",
+                        help="Also rebuild the rollups of archived (expired) events")
+    args = parser.parse_args()
+
+    print("📈 AR Map Explorer - Analytics Rollups")
+    print("======================================")
+
+    run(args.rebuild, args.from_archive)
+    while args.loop:
+        time.sleep(args.loop)
+        run(False)
+
+if __name__ == "__main__":
+    main()